@@ -0,0 +1,66 @@
+"""
+Scaling benchmark of the semantic analysis over generated stress
+sketches of growing size. Run it from the root of the repository:
+
+    python benchmarks/bench_analysis.py
+
+The time per thousand lines should stay flat as the sketches grow.
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import compiler.analysis as analysis
+import compiler.ast_builder_visitor as ast_builder_visitor
+import compiler.front_end as front_end
+import libraries.libs as libraries
+
+SIZES = [50, 100, 200, 400]
+ROUNDS = 3
+
+
+def stress_sketch(n_functions, conditions=20):
+    """
+    Generates a sketch with n_functions globals and functions, each
+    function with a chain of conditionals, a loop and a call
+    """
+    lines = ["int g{} = {};".format(i, i) for i in range(n_functions)]
+    lines.append("int arr[10] = {1, 2, 3, 4, 5, 6, 7, 8, 9, 10};")
+    for f in range(n_functions):
+        lines.append("int f{}(int a, int b) {{".format(f))
+        lines.append("    int x = a + b;")
+        for k in range(conditions):
+            lines.append("    if (x > {}) {{ x = x + g{} * arr[{}]; }}".format(k, (f + k) % n_functions, k % 10))
+        lines.append("    for (int i = 0; i < 3; i++) { x = x - i; }")
+        if f > 0:
+            lines.append("    x = x + f{}(x, {});".format(f - 1, f))
+        lines.append("    return x;")
+        lines.append("}")
+    lines.append("void setup(){ Serial.begin(9600); }")
+    lines.append("void loop(){{ f{}(1, 2); delay(100); }}".format(n_functions - 1))
+    return "\n".join(lines)
+
+
+def main():
+    front = front_end.FrontEnd()
+    for size in SIZES:
+        code = stress_sketch(size)
+        n_lines = code.count("\n") + 1
+        tree, errors = front.parse(code)
+        best = None
+        for _ in range(ROUNDS):
+            ast = ast_builder_visitor.ASTBuilderVisitor().visitProgram(tree)
+            engine = analysis.AnalysisEngine(libraries.LibraryManager())
+            start = time.perf_counter()
+            engine.execute(ast)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{n_lines:6d} lines, {len(engine.errors)} errors: {best * 1000:8.1f} ms "
+              f"({best * 1e6 / n_lines:6.1f} ms per 1k lines)")
+
+
+if __name__ == "__main__":
+    main()
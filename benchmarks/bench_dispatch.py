@@ -0,0 +1,93 @@
+"""
+Micro-benchmark of the per-node cost of ASTNode.accept over the ASTs
+of the sketches in tests/ without syntax errors. Run it from the root of the
+repository:
+
+    python benchmarks/bench_dispatch.py
+
+- before: the class name is converted with a regex and the visit
+  method looked up with getattr on every call
+- after: the visit method is taken from the dispatch table
+"""
+
+import dataclasses
+import glob
+import re
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import compiler.ast as ast
+import compiler.ast_builder_visitor as ast_builder_visitor
+import compiler.ast_visitor as ast_visitor
+import compiler.front_end as front_end
+
+ROUNDS = 20
+
+
+def legacy_accept(self, visitor, param):
+    NAME = re.compile(r'([A-Z][a-z]+)')
+    name = '_'.join([i.lower() for i in NAME.findall(str(type(self)))
+                     if not i == "Node"])
+    if name:
+        return getattr(visitor, f'visit_{name}')(self, param)
+    else:
+        raise Exception("Warning!")
+
+
+def no_visit(self, node, param):
+    return None
+
+
+# A visitor that does nothing, so only the dispatch is measured
+NullVisitor = type("NullVisitor", (), {
+    name: no_visit for name in
+    [name for name in dir(ast_visitor.ASTVisitor) if name.startswith("visit_")]
+    + [ast.visit_method_name(cls.__name__) for cls in vars(ast).values()
+       if isinstance(cls, type) and issubclass(cls, ast.ASTNode) and cls is not ast.ASTNode]
+})
+
+
+def collect(node, nodes):
+    if isinstance(node, list):
+        for child in node:
+            collect(child, nodes)
+    elif isinstance(node, ast.ASTNode):
+        nodes.append(node)
+        for field in dataclasses.fields(node):
+            if field.name not in ("function", "definition", "function_call"):
+                collect(getattr(node, field.name), nodes)
+
+
+def measure(nodes, accept):
+    visitor = NullVisitor()
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for node in nodes:
+            accept(node, visitor, None)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(nodes)
+
+
+def main():
+    front = front_end.FrontEnd()
+    nodes = []
+    for path in sorted(glob.glob("tests/*/*.txt")):
+        tree, errors = front.parse(open(path, encoding="utf-8").read())
+        if not errors:
+            collect(ast_builder_visitor.ASTBuilderVisitor().visitProgram(tree), nodes)
+    # IDNode and IDTypeNode override accept, so they are left out
+    nodes = [node for node in nodes if type(node).accept is ast.ASTNode.accept]
+    before = measure(nodes, legacy_accept)
+    after = measure(nodes, lambda node, visitor, param: node.accept(visitor, param))
+    print(f"{len(nodes)} nodes, best of {ROUNDS} rounds")
+    print(f"before (regex + getattr): {before * 1e9:8.1f} ns/node")
+    print(f"after  (dispatch table):  {after * 1e9:8.1f} ns/node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Cold/warm parse benchmark of the compiler front end over the
+sketches in tests/file-tests. Run it from the root of the repository:
+
+    python benchmarks/bench_front_end.py
+
+- cold: new lexer and parser for every sketch with empty DFA caches
+- fresh: new lexer and parser for every sketch, full LL prediction
+  (what transpile did before the warm front end)
+- warm: the long-lived FrontEnd with two-stage SLL/LL parsing
+"""
+
+import glob
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+from antlr4 import InputStream, CommonTokenStream, PredictionContextCache
+from antlr4.dfa.DFA import DFA
+from compiler.ArduinoLexer import ArduinoLexer
+from compiler.ArduinoParser import ArduinoParser
+import compiler.error_listener as error_listener
+import compiler.front_end as front_end
+
+ROUNDS = 5
+
+
+def reset_dfa():
+    ArduinoLexer.decisionsToDFA = [DFA(ds, i) for i, ds in enumerate(ArduinoLexer.atn.decisionToState)]
+    ArduinoParser.decisionsToDFA = [DFA(ds, i) for i, ds in enumerate(ArduinoParser.atn.decisionToState)]
+    ArduinoParser.sharedContextCache = PredictionContextCache()
+
+
+def fresh_parse(code):
+    listener = error_listener.CompilerErrorListener(False)
+    lexer = ArduinoLexer(InputStream(code))
+    lexer.removeErrorListeners()
+    lexer.addErrorListener(listener)
+    parser = ArduinoParser(CommonTokenStream(lexer))
+    parser.removeErrorListeners()
+    parser.addErrorListener(listener)
+    return parser.program(), listener.errors
+
+
+def measure(codes, parse, before=None):
+    best = None
+    for _ in range(ROUNDS):
+        total = 0
+        for code in codes:
+            if before is not None:
+                before()
+            start = time.perf_counter()
+            parse(code)
+            total += time.perf_counter() - start
+        best = total if best is None else min(best, total)
+    return best
+
+
+def main():
+    codes = [open(path, encoding="utf-8").read() for path in sorted(glob.glob("tests/file-tests/*.txt"))]
+    cold = measure(codes, fresh_parse, reset_dfa)
+    fresh = measure(codes, fresh_parse)
+    front = front_end.FrontEnd()
+    warm = measure(codes, front.parse)
+    print(f"{len(codes)} sketches, best of {ROUNDS} rounds")
+    print(f"cold  (empty DFA, new parser): {cold * 1000:8.2f} ms")
+    print(f"fresh (new parser, LL):        {fresh * 1000:8.2f} ms")
+    print(f"warm  (FrontEnd, SLL/LL):      {warm * 1000:8.2f} ms")
+    print(f"SLL parses: {front.sll_parses}, LL fallbacks: {front.ll_parses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Benchmark of the reads and writes of the pins: a million digitalWrite
+and a million analogRead through libraries.standard, as a sketch does
+them, on the ArduinoUno and BQzumBT328 boards. The best of REPEATS
+runs is shown. Run it from the root of the repository:
+
+    python benchmarks/bench_pins.py
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import libraries.standard as standard
+import robot_components.boards as boards
+import robot_components.elements as elements
+
+CALLS = 1000000
+REPEATS = 3
+DIGITAL_PIN = 13
+ANALOG_PIN = 14
+BOARDS = {"ArduinoUno": boards.ArduinoUno, "BQzumBT328": boards.BQzumBT328}
+
+
+def new_board(board_class):
+    board = board_class()
+    # ArduinoUno keeps the components of the GUI apart (in pines), so the
+    # elements are attached as the robots attach theirs
+    boards.Board.attach_pin(board, DIGITAL_PIN, elements.Element())
+    boards.Board.attach_pin(board, ANALOG_PIN, elements.Element())
+    board.set_pin_mode(DIGITAL_PIN, boards.Board.OUTPUT)
+    return board
+
+
+def bench(function, pin, *args):
+    best = None
+    for repeat in range(REPEATS):
+        start = time.perf_counter()
+        for i in range(CALLS):
+            function(pin, *args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    for name, board_class in BOARDS.items():
+        standard.board = new_board(board_class)
+        write = bench(standard.digital_write, DIGITAL_PIN, standard.HIGH)
+        read = bench(standard.analog_read, ANALOG_PIN)
+        print("{:11} digitalWrite {:.2f} s ({:.0f} ns/call), analogRead {:.2f} s ({:.0f} ns/call)".format(
+            name, write, write * 1e9 / CALLS, read, read * 1e9 / CALLS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark of the snapshots of a run: a line follower runs for a minute
+of simulated time on the "labyrinth" track, without GUI, with and
+without a checkpointer, and then the cost and the size of one snapshot
+are measured. Run it from the root of the repository:
+
+    python benchmarks/bench_snapshot.py
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import simulation.engine as engine
+import simulation.snapshot as snapshot
+from bench_time_scale import LINE_FOLLOWER, SIMULATED_MS
+
+SNAPSHOTS = 1000
+
+
+def run(sketch, checkpointer):
+    layer = layers.MobileRobotLayer(2)
+    layer.set_circuit(1)
+    layer.execute()
+    simulation = engine.SimulationEngine(layer)
+    simulation.set_time_scale(None)
+    simulation.set_checkpointer(checkpointer)
+    start = time.perf_counter()
+    simulation.run(sketch, SIMULATED_MS)
+    return time.perf_counter() - start, simulation
+
+
+def main():
+    sketch = transpiler.build(LINE_FOLLOWER, coroutines=True)
+    elapsed, simulation = run(sketch, None)
+    print("no snapshots    {:.2f} s".format(elapsed))
+    checkpointer = snapshot.Checkpointer()
+    elapsed, simulation = run(sketch, checkpointer)
+    print("with snapshots  {:.2f} s ({} snapshots kept)".format(elapsed, len(checkpointer.snapshots)))
+    start = time.perf_counter()
+    for i in range(SNAPSHOTS):
+        data = snapshot.Snapshot.take(simulation).to_bytes()
+    elapsed = time.perf_counter() - start
+    print("one snapshot    {:.0f} us, {} bytes".format(elapsed / SNAPSHOTS * 1e6, len(data)))
+
+
+if __name__ == '__main__':
+    main()
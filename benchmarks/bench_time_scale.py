@@ -0,0 +1,74 @@
+"""
+Benchmark of the fast-forward mode: a line follower runs for a minute
+of simulated time on the "circuit" and "labyrinth" tracks, without GUI
+and as fast as possible. Run it from the root of the repository:
+
+    python benchmarks/bench_time_scale.py
+
+The speed-up is the simulated time divided by the real time it took.
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import simulation.engine as engine
+
+SIMULATED_MS = 60000
+TRACKS = {"circuit": 0, "labyrinth": 1}
+
+LINE_FOLLOWER = """#include <Servo.h>
+
+Servo left;
+Servo right;
+
+void setup() {
+  left.attach(8);
+  right.attach(9);
+  pinMode(2, INPUT);
+  pinMode(3, INPUT);
+}
+
+void loop() {
+  int l = digitalRead(2);
+  int r = digitalRead(3);
+  if (l == 1 && r == 1) {
+    left.write(180);
+    right.write(0);
+  } else if (l == 1) {
+    left.write(90);
+    right.write(0);
+  } else {
+    left.write(180);
+    right.write(90);
+  }
+  delay(20);
+}
+"""
+
+
+def bench(sketch, track):
+    layer = layers.MobileRobotLayer(2)
+    layer.set_circuit(track)
+    layer.execute()
+    simulation = engine.SimulationEngine(layer)
+    simulation.set_time_scale(None)
+    start = time.perf_counter()
+    simulation.run(sketch, SIMULATED_MS)
+    return time.perf_counter() - start, simulation.steps
+
+
+def main():
+    sketch = transpiler.build(LINE_FOLLOWER)
+    for name, track in TRACKS.items():
+        elapsed, steps = bench(sketch, track)
+        print("{:10} {} steps in {:.2f} s, {:.0f}x real time".format(
+            name, steps, elapsed, SIMULATED_MS / 1000 / elapsed))
+
+
+if __name__ == '__main__':
+    main()
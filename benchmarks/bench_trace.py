@@ -0,0 +1,58 @@
+"""
+Benchmark of the cost of recording the signals of the pins: a million
+digitalWrite through libraries.standard on the BQzumBT328 board without
+recorder, with a recorder and the same value (nothing to record) and
+with a recorder and a new value every time (the worst case, one
+transition per write). The best of REPEATS runs is shown. Run it from
+the root of the repository:
+
+    python benchmarks/bench_trace.py
+"""
+
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import libraries.standard as standard
+import robot_components.boards as boards
+import robot_components.elements as elements
+import robot_components.robot_state as robot_state
+import simulation.trace as trace
+
+CALLS = 1000000
+REPEATS = 3
+PIN = 13
+
+
+def bench(recorder, values):
+    board = boards.BQzumBT328()
+    board.attach_pin(PIN, elements.Element())
+    board.set_pin_mode(PIN, boards.Board.OUTPUT)
+    board.recorder = recorder
+    standard.board = board
+    best = None
+    for repeat in range(REPEATS):
+        start = time.perf_counter()
+        for i in range(CALLS):
+            standard.digital_write(PIN, values[i & 1])
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    clock = robot_state.SimulatedClock()
+    cases = {
+        "no recorder": (None, (1, 1)),
+        "same value": (trace.TraceRecorder(clock=clock), (1, 1)),
+        "toggling": (trace.TraceRecorder(clock=clock), (0, 1)),
+    }
+    for name, (recorder, values) in cases.items():
+        elapsed = bench(recorder, values)
+        print("{:12} {:.2f} s ({:.0f} ns/call)".format(name, elapsed, elapsed * 1e9 / CALLS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Analysis engine of the compiler. It runs the declaration and the
+semantic analysis of a sketch, and every other check over the AST is
+written as a rule that is run during those same passes instead of
+walking the AST again.
+
+Rules are attached to the visit methods of the analyzers by name:
+a rule method enter_<name> is called before visit_<name> and
+exit_<name> after it, e.g. enter_while or exit_function_call.
+Warnings are deferred and only produced when the sketch has no
+errors, in the order in which their nodes were found.
+"""
+
+import compiler.ast as ast
+import compiler.ast_visitor as ast_visitor
+import compiler.semantical_errors as semantical_errors
+import output.console as console
+
+DECLARATIONS = 0
+SEMANTICS = 1
+
+
+class Rule:
+    """
+    Base of the analysis rules
+    """
+    stage = SEMANTICS
+
+    def start(self, engine):
+        """
+        Called before the analysis begins
+        Arguments:
+            engine: the engine running the rule
+        """
+        self.engine = engine
+
+    def warning(self, node):
+        """
+        Creates the warning of a node deferred by this rule
+        Arguments:
+            node: the deferred node
+        Returns:
+            the warning, or None if there is nothing to warn about
+        """
+        return None
+
+
+class FunctionNamesRule(Rule):
+    """
+    Names of the Python functions generated for every Arduino function,
+    so overloaded functions do not overwrite each other
+    """
+    stage = DECLARATIONS
+
+    def start(self, engine):
+        super().start(engine)
+        self.functions = {}
+
+    def exit_function(self, function: ast.FunctionNode):
+        if function.name not in self.functions:
+            self.functions[function.name] = [
+                {
+                    'name': function.name,
+                    'nparams': len(function.args) + len(function.opts_args)
+                }
+            ]
+        else:
+            self.functions[function.name].append(
+                {
+                    'name': str(function.name) + str(len(self.functions[function.name])),
+                    'nparams': len(function.args) + len(function.opts_args)
+                }
+            )
+
+
+class LoopUsageRule(Rule):
+    """
+    Warns about the use of loops, which block the simulation
+    """
+    LOOPS = {
+        ast.WhileNode: "while",
+        ast.DoWhileNode: "do while",
+        ast.ForNode: "for"
+    }
+
+    def enter_while(self, while_p):
+        self.engine.defer(self, while_p)
+
+    def enter_do_while(self, do_while):
+        self.engine.defer(self, do_while)
+
+    def enter_for(self, for_p):
+        self.engine.defer(self, for_p)
+
+    def warning(self, node):
+        return console.Warning("Uso", node.line, node.position,
+                               "No es recomendable el uso de bucles ({}), aunque sea correcto".format(
+                                   self.LOOPS[type(node)]))
+
+
+class NotImplementedRule(Rule):
+    """
+    Warns about the calls to library functions that the simulator
+    does not implement
+    """
+
+    def start(self, engine):
+        super().start(engine)
+        self.found = 0
+        self.pending = []
+
+    def enter_function_call(self, function_call: ast.FunctionCallNode):
+        self.pending.append(self.found)
+
+    def exit_function_call(self, function_call: ast.FunctionCallNode):
+        # The semantic analysis does not visit the parameters of functions
+        # that are not implemented, so the calls inside them are found here
+        if self.pending.pop() == self.found and function_call.parameters:
+            collector = _CallCollector()
+            collector.visit_children(function_call.parameters, None)
+            for call in collector.calls:
+                self.engine.defer(self, call)
+        self.found += 1
+        self.engine.defer(self, function_call)
+
+    def warning(self, function_call):
+        if isinstance(function_call.name, ast.MemberAccessNode):
+            f_name = function_call.name.member.value
+            lib_name = function_call.name.element.value
+            if lib_name != 'Serial':
+                name = function_call.name.element.type
+                if isinstance(name, ast.StringTypeNode):
+                    lib_name = 'String'
+                else:
+                    lib_name = name.type_name
+        else:
+            f_name = function_call.name.value
+            lib_name = "Standard"
+        lib_name = lib_name[0].upper() + lib_name[1:]
+        message = self.engine.library_manager.not_implemented(lib_name, f_name)
+        if message != "":
+            return console.Warning("No implementado", function_call.line, function_call.position, message)
+        return None
+
+
+class _CallCollector(ast_visitor.ASTVisitor):
+
+    def __init__(self):
+        self.calls = []
+
+    def visit_function_call(self, function_call: ast.FunctionCallNode, param):
+        super().visit_function_call(function_call, param)
+        self.calls.append(function_call)
+        return None
+
+
+def default_rules():
+    """
+    Returns:
+        the rules run by the transpiler
+    """
+    return [FunctionNamesRule(), LoopUsageRule(), NotImplementedRule()]
+
+
+class AnalysisEngine:
+
+    def __init__(self, library_manager, rules=None):
+        """
+        Constructor for the analysis engine
+        Arguments:
+            library_manager: the library manager shared by the whole
+            compilation
+            rules: the rules to run, the default ones if None
+        """
+        self.library_manager = library_manager
+        self.rules = default_rules() if rules is None else rules
+        self.errors = []
+        self.warnings = []
+        self.deferred = []
+
+    def execute(self, program: ast.ProgramNode):
+        """
+        Analyses a program, leaving the results in errors, warnings
+        and the rules
+        Arguments:
+            program: the AST of the program
+        """
+        self.errors = []
+        self.warnings = []
+        self.deferred = []
+        for rule in self.rules:
+            rule.start(self)
+        decl = _with_rules(semantical_errors.DeclarationAnalyzer,
+                           self.__rules(DECLARATIONS))(self.library_manager)
+        decl.visit_program(program, None)
+        semt = _with_rules(semantical_errors.SemanticAnalyzer,
+                           self.__rules(SEMANTICS))(self.library_manager,
+                                                     decl.symbols, decl.functions)
+        semt.visit_program(program, None)
+        self.errors.extend(decl.errors)
+        self.errors.extend(semt.errors)
+        if not self.errors:
+            for rule, node in self.deferred:
+                warning = rule.warning(node)
+                if warning is not None:
+                    self.warnings.append(warning)
+
+    def defer(self, rule, node):
+        """
+        Defers the warning of a node until the analysis ends
+        Arguments:
+            rule: the rule that creates the warning
+            node: the node to warn about
+        """
+        self.deferred.append((rule, node))
+
+    def get_rule(self, rule_type):
+        """
+        Finds the rule of a given type
+        Arguments:
+            rule_type: the class of the rule
+        Returns:
+            the rule, or None if the engine does not run it
+        """
+        for rule in self.rules:
+            if isinstance(rule, rule_type):
+                return rule
+        return None
+
+    def __rules(self, stage):
+        return [rule for rule in self.rules if rule.stage == stage]
+
+
+# Analyzer classes with hooks, by analyzer and hooked visit methods.
+# They are created once, so the dispatch of the AST stays cached
+
+_hooked_classes = {}
+
+
+def _with_rules(analyzer_cls, rules):
+    hooks = {}
+    for name in dir(analyzer_cls):
+        if name.startswith("visit_"):
+            event = name[len("visit_"):]
+            before = [getattr(rule, "enter_" + event) for rule in rules if hasattr(rule, "enter_" + event)]
+            after = [getattr(rule, "exit_" + event) for rule in rules if hasattr(rule, "exit_" + event)]
+            if before or after:
+                hooks[name] = (before, after)
+    key = (analyzer_cls, frozenset(hooks))
+    hooked_cls = _hooked_classes.get(key)
+    if hooked_cls is None:
+        methods = {name: _hooked(name, getattr(analyzer_cls, name)) for name in hooks}
+        hooked_cls = type(analyzer_cls.__name__, (analyzer_cls,), methods)
+        _hooked_classes[key] = hooked_cls
+
+    def create(*args):
+        analyzer = hooked_cls(*args)
+        analyzer.hooks = hooks
+        return analyzer
+    return create
+
+
+def _hooked(name, method):
+    def visit(self, node, param):
+        before, after = self.hooks[name]
+        for hook in before:
+            hook(node)
+        result = method(self, node, param)
+        for hook in after:
+            hook(node)
+        return result
+    return visit
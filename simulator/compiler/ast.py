@@ -15,9 +15,38 @@ def generate_setter(name):
     return lambda self, value: setattr(self, name, value)
 
 
+# The name of the visit method is taken from the name of the class
+# which must be NameNode, e.g. WhileNode -> visit_while
+
+VISIT_NAME = re.compile(r'([A-Z][a-z]+)')
+
+
+def visit_method_name(clsname):
+    name = '_'.join([i.lower() for i in VISIT_NAME.findall(clsname)
+                     if not i == "Node"])
+    if name:
+        return f'visit_{name}'
+    return None
+
+
+# Visit methods already resolved, by (visitor class, node class)
+
+_dispatch = {}
+
+
+def _resolve_visit(visitor, node_cls):
+    name = node_cls._visit_name
+    if name is None:
+        raise Exception("Warning!")
+    method = getattr(visitor, name).__func__
+    _dispatch[(visitor.__class__, node_cls)] = method
+    return method
+
+
 class BaseType(type):
     '''
-    This base adds setters to all the classes
+    This base adds setters to all the classes and resolves
+    the name of their visit method once
     '''
     def __new__(cls, clsname, bases, clsdict):
         new_dict = dict()
@@ -25,7 +54,9 @@ class BaseType(type):
             if not callable(val) and '__' not in name:
                 new_dict[f'set_{name}'] = generate_setter(name)
         clsdict.update(new_dict)
-        return super().__new__(cls, clsname, bases, clsdict)
+        new_cls = super().__new__(cls, clsname, bases, clsdict)
+        new_cls._visit_name = visit_method_name(clsname)
+        return new_cls
 
 
 @dataclass
@@ -36,17 +67,14 @@ class ASTNode(metaclass=BaseType):
 
     def accept(self, visitor, param):
         '''
-        This method take the name of the class which must be NameNode and then
-        apply the method named visitor.visit_name(param)
+        This method applies the method visitor.visit_name(param), where
+        name is taken from the name of the class, which must be NameNode.
+        The method is looked up only once per visitor and node class
         '''
-        NAME = re.compile(r'([A-Z][a-z]+)')
-        name = '_'.join([i.lower() for i in NAME.findall(str(type(self)))
-                         if not i == "Node"])
-        if name:
-            return getattr(visitor, f'visit_{name}')(self, param)
-        else:
-            raise Exception("Warning!")
-            print(f"Warning: {type(self)}.accept called from ASTNode!")
+        method = _dispatch.get((visitor.__class__, self.__class__))
+        if method is None:
+            method = _resolve_visit(visitor, self.__class__)
+        return method(visitor, self, param)
 
     def set_position(self, position):
         self.position = position
@@ -3,6 +3,7 @@
 
 # from ast import operator
 # from cmath import exp
+import sys
 from functools import reduce
 from operator import le
 from typing import List
@@ -87,7 +88,7 @@ class ASTBuilderVisitor(ArduinoVisitor):
         if ctx.v_type is not None:
             v_type = self.visitVar_type(ctx.v_type)
         if ctx.ID() is not None:
-            var_name = ctx.ID().getText()
+            var_name = sys.intern(ctx.ID().getText())
         if ctx.val is not None:
             expr = self.visitExpression(ctx.val)
         node = DeclarationNode(type=v_type, var_name=var_name, expr=expr)
@@ -102,7 +103,7 @@ class ASTBuilderVisitor(ArduinoVisitor):
         if ctx.v_type is not None:
             v_type = self.visitVar_type(ctx.v_type)
         if ctx.ID() is not None:
-            var_name = ctx.ID().getText()
+            var_name = sys.intern(ctx.ID().getText())
         if ctx.elems is not None:
             elements = self.visitArray_elements(ctx.elems)
         if ctx.a_index is not None:
@@ -125,7 +126,7 @@ class ASTBuilderVisitor(ArduinoVisitor):
         name = value = None
         elems = []
         if ctx.ID() is not None:
-            name = ctx.ID().getText()
+            name = sys.intern(ctx.ID().getText())
         if ctx.val is not None:
             value = self.visitExpression(ctx.val)
         if ctx.elems is not None:
@@ -202,7 +203,7 @@ class ASTBuilderVisitor(ArduinoVisitor):
         if ctx.v_type is not None:
             v_type = self.visitVar_type(ctx.v_type)
         if ctx.ID() is not None:
-            f_name = ctx.ID().getText()
+            f_name = sys.intern(ctx.ID().getText())
         if ctx.f_args is not None:
             args = self.visitFunction_args(ctx.f_args)
         if ctx.sentences is not None:
@@ -342,7 +343,7 @@ class ASTBuilderVisitor(ArduinoVisitor):
             member = IDNode(ctx.id_acc.text)
             node = MemberAccessNode(element, member)
         if ctx.array_name is not None:
-            name = ctx.array_name.text
+            name = sys.intern(ctx.array_name.text)
             indexes = []
             if ctx.indexes is not None:
                 for i in ctx.indexes:
@@ -418,7 +419,7 @@ class ASTBuilderVisitor(ArduinoVisitor):
             string_const = string_const.replace('"', '')
             node = StringNode(string_const)
         if ctx.ID() is not None and ctx.array_name is None and ctx.id_acc is None:
-            node = IDNode(ctx.ID().getText())
+            node = IDNode(sys.intern(ctx.ID().getText()))
         self.__add_line_info(node, ctx)
         return node
 
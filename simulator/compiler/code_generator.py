@@ -6,37 +6,65 @@ into a transpiler
 
 import compiler.ast as ast
 import compiler.ast_visitor as ast_visitor
+import compiler.source_map as source_map
 import libraries.libs as libraries
-import os
+import io
 
 
 class CodeGenerator(ast_visitor.ASTVisitor):
     VARIABLE = 1
     FUNCTION_CALL = 2
 
+    # Calls that become yield points in the coroutines, and the
+    # milliseconds they wait
+    DELAYS = {"delay": "{}", "delayMicroseconds": "({}) / 1000"}
+    SERIAL_READS = ["available", "read"]
+
     continue_line = False
 
-    def __init__(self, library_manager):
+    def __init__(self, library_manager, functions=None, coroutines=False, profile=False):
         """
         Constructor for code generator.
         Uses the ASTVisitor implementation. The pattern used
         is visitor.
+        Arguments:
+            library_manager: the library manager of the compilation
+            functions: the names of the generated functions, as found
+            by the analysis. If None they are found by FunctionDefiner
+            coroutines: True to generate every function as a generator
+            (a coroutine) that yields the milliseconds to wait in every
+            delay, and 0 in the loops and Serial reads, so the simulation
+            resumes it instead of blocking (see simulation.scheduler)
+            profile: True to call screen_updater.line before every line
+            of the sketch, so the profiler counts and times the lines
+            (see simulation.profiler). Without it nothing is added
+        The generator also builds the source map of the code (see
+        compiler.source_map), from the line and column of the sentence
+        of the sketch that is being written.
+        A Python function has a single scope, where the globals are
+        declared with 'global', so the parameters and locals that shadow
+        a visible variable (a global or a local of an enclosing block)
+        are given another name (see declare)
         """
         self.script_tabs = 0
         self.library_manager: libraries.LibraryManager = library_manager
         self.globals = []
-        self.functions = {}
+        self.scopes = []
+        self.functions = functions
+        self.coroutines = coroutines
+        self.profile = profile
+        self.in_function = False
         self.function_visitor = FunctionDefiner()
-        try:
-            os.mkdir('temp')
-        except FileExistsError:
-            pass
-        open('temp/__init__.py', 'a').close()
+        self.source = None
+        self.source_map = source_map.SourceMap()
+        self.script_line = 1
+        self.position = (0, 0)
 
     def visit_program(self, program: ast.ProgramNode, param):
-        self.function_visitor.visit_program(program, param)
-        self.functions = self.function_visitor.functions
-        self.script = open("temp/script_arduino.py", 'w', encoding='utf-8')
+        if self.functions is None:
+            self.function_visitor.visit_program(program, param)
+            self.functions = self.function_visitor.functions
+        self.script = io.StringIO()
         self.write_to_script("import libraries.standard as standard")
         self.write_endl()
         self.write_to_script("import libraries.serial as Serial")
@@ -53,6 +81,7 @@ class CodeGenerator(ast_visitor.ASTVisitor):
             self.write_endl()
         for c in program.code:
             c.accept(self, param)
+        self.source = self.script.getvalue()
         self.script.close()
         return None
 
@@ -64,20 +93,21 @@ class CodeGenerator(ast_visitor.ASTVisitor):
 
     def visit_program_code(self, program_code: ast.ProgramCodeNode, param):
         if program_code.declaration is not None:
+            self.set_source(program_code.declaration)
             program_code.declaration.accept(self, param)
             self.write_endl()
         if program_code.function is not None:
             self.write_endl()
+            self.set_source(program_code.function)
             program_code.function.accept(self, param)
         if program_code.macro is not None:
+            self.set_source(program_code.macro)
             program_code.macro.accept(self, param)
             self.write_endl()
         return None
 
     def visit_declaration(self, declaration: ast.DeclarationNode, param):
-        self.write_to_script(declaration.var_name)
-        if declaration.function is None:
-            self.globals.append(declaration.var_name)
+        self.write_to_script(self.declare(declaration.var_name))
         if declaration.expr is not None:
             self.write_to_script(" = ")
             declaration.expr.accept(self, param)
@@ -86,24 +116,20 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         return None
 
     def visit_array_declaration(self, array_declaration: ast.ArrayDeclarationNode, param):
-        self.write_to_script(array_declaration.var_name)
+        self.write_to_script(self.declare(array_declaration.var_name))
         self.write_to_script(" = [")
         if len(array_declaration.elements) > 0:
             self.visit_array_elements(array_declaration.elements, param)
         self.write_to_script("]")
         self.write_endl()
-        if array_declaration.function is None:
-            self.globals.append(array_declaration.var_name)
         return None
 
     def visit_define_macro(self, define_macro: ast.DefineMacroNode, param):
-        self.write_to_script("{} = ".format(define_macro.macro_name))
+        self.write_to_script("{} = ".format(self.declare(define_macro.macro_name)))
         if define_macro.expr is not None:
             define_macro.expr.accept(self, param)
         if len(define_macro.elements) > 0:
             self.visit_array_elements(define_macro.elements, param)
-        if define_macro.function is None:
-            self.globals.append(define_macro.macro_name)
         return None
 
     def visit_boolean_type(self, boolean_type: ast.BooleanTypeNode, param):
@@ -176,6 +202,7 @@ class CodeGenerator(ast_visitor.ASTVisitor):
                 self.write_to_script("def {}".format(func['name']))
                 break
 
+        self.open_scope()
         self.write_to_script("(")
         for arg in function.args:
             arg.set_function(function)
@@ -187,13 +214,22 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         for variable in self.globals:
             self.write_to_script("global {}".format(variable))
             self.write_endl()
+        if self.coroutines:
+            # Makes it a generator even if it never waits
+            self.write_to_script("yield from ()")
+            self.write_endl()
+        self.write_line_mark(function)
 
+        self.in_function = True
         if len(function.sentences) > 0:
             for sent in function.sentences:
+                self.write_line_mark(sent)
                 sent.accept(self, param)
                 self.write_endl()
         else:
             self.write_no_sentence()
+        self.in_function = False
+        self.close_scope()
         self.decrease_tab()
 
         return None
@@ -206,18 +242,20 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         self.write_endl()
 
         self.increase_tab()
+        self.open_scope()
+        self.write_back_edge(while_p)
         n_sents = len(while_p.sentences)
         if n_sents > 0:
             for i in range(0, n_sents):
                 sent = while_p.sentences[i]
+                self.write_line_mark(sent)
                 sent.accept(self, param)
                 if i + 1 < n_sents:
                     self.write_endl()
         else:
             self.write_no_sentence()
         self.write_endl()
-        self.write_to_script("screen_updater.refresh()")
-        self.write_endl()
+        self.close_scope()
         self.decrease_tab()
 
         return None
@@ -226,20 +264,22 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         self.write_to_script("while True:")
         self.write_endl()
         self.increase_tab()
+        self.open_scope()
+        self.write_back_edge(do_while)
         n_sents = len(do_while.sentences)
         if n_sents > 0:
             for i in range(0, n_sents):
                 sent = do_while.sentences[i]
+                self.write_line_mark(sent)
                 sent.accept(self, param)
                 if i + 1 < n_sents:
                     self.write_endl()
         else:
             self.write_no_sentence()
+        self.close_scope()
 
         self.write_endl()
-        self.write_to_script("screen_updater.update()")
-        self.write_endl()
-
+        self.write_line_mark(do_while)
         self.write_to_script("if ")
         if do_while.expression is not None:
             do_while.expression.accept(self, param)
@@ -256,9 +296,11 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         return None
 
     def visit_for(self, for_p: ast.ForNode, param):
-        self.write_to_script(f"for {for_p.assignment.var_name} in range(")
+        start = self.get_name(for_p.assignment.expr.value)
+        self.open_scope()
+        self.write_to_script(f"for {self.declare(for_p.assignment.var_name)} in range(")
         if for_p.assignment is not None:
-            self.write_to_script(for_p.assignment.expr.value)
+            self.write_to_script(start)
         self.write_to_script(", ")
         if for_p.condition is not None:
             for_p.condition.accept(self, param)
@@ -275,18 +317,19 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         self.write_endl()
 
         self.increase_tab()
+        self.write_back_edge(for_p)
         n_sents = len(for_p.sentences)
         if n_sents > 0:
             for i in range(0, n_sents):
                 sent = for_p.sentences[i]
+                self.write_line_mark(sent)
                 sent.accept(self, param)
                 if i + 1 < n_sents:
                     self.write_endl()
         else:
             self.write_no_sentence()
         self.write_endl()
-        self.write_to_script("screen_updater.update()")
-        self.write_endl()
+        self.close_scope()
         self.decrease_tab()
 
         return None
@@ -300,26 +343,31 @@ class CodeGenerator(ast_visitor.ASTVisitor):
 
         self.increase_tab()
         increases = True
+        self.open_scope()
         n_ifs = len(conditional_sentence.if_expr)
         if n_ifs > 0:
             for i in range(0, n_ifs):
                 if_sent = conditional_sentence.if_expr[i]
+                self.write_line_mark(if_sent)
                 if_sent.accept(self, param)
                 if i + 1 < n_ifs:
                     self.write_endl()
         else:
             self.write_no_sentence()
+        self.close_scope()
         if increases:
             self.decrease_tab()
 
         increases = True
         n_elses = len(conditional_sentence.else_expr)
+        self.open_scope()
         if n_elses > 0:
             else_written = False
             self.write_endl()
             for i in range(0, n_elses):
                 else_sent = conditional_sentence.else_expr[i]
                 if isinstance(else_sent, ast.ConditionalSentenceNode):
+                    self.set_source(else_sent)
                     self.write_to_script("el")
                     increases = False
                 elif not else_written:
@@ -327,11 +375,16 @@ class CodeGenerator(ast_visitor.ASTVisitor):
                     self.write_endl()
                     self.increase_tab()
                     else_written = True
+                if not isinstance(else_sent, ast.ConditionalSentenceNode):
+                    # An else if is written as an elif, where nothing
+                    # can be written before
+                    self.write_line_mark(else_sent)
                 else_sent.accept(self, param)
                 if i + 1 < n_elses:
                     self.write_endl()
             if increases:
                 self.decrease_tab()
+        self.close_scope()
 
         return None
 
@@ -343,11 +396,13 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         self.write_endl()
 
         self.increase_tab()
+        self.open_scope()
         if len(switch_sentence.cases) > 0:
             for case in switch_sentence.cases:
                 case.accept(self, param)
         else:
             self.write_no_sentence()
+        self.close_scope()
         self.decrease_tab()
 
         return None
@@ -363,6 +418,7 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         if len(case.sentences) > 0:
             for sent in case.sentences:
                 if not isinstance(sent, ast.BreakNode):
+                    self.write_line_mark(sent)
                     sent.accept(self, param)
                     self.write_endl()
         else:
@@ -380,9 +436,9 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         return None
 
     def visit_array_access(self, array_access: ast.ArrayAccessNode, param):
-        self.write_to_script(array_access.value)
+        self.write_to_script(self.get_name(array_access.value))
         for index in array_access.indexes:
-            self.write_to_script("[{}]".format(index.value))
+            self.write_to_script("[{}]".format(self.get_name(index.value)))
         return None
 
     def visit_arithmetic_expression(self, arithmetic_expression: ast.ArithmeticExpressionNode, param):
@@ -491,7 +547,7 @@ class CodeGenerator(ast_visitor.ASTVisitor):
 
     def visit_id(self, id_node: ast.IDNode, param):
         if param is None:
-            self.write_to_script(id_node.value)
+            self.write_to_script(self.get_name(id_node.value))
         else:
             if param == self.FUNCTION_CALL:
                 method = None
@@ -510,11 +566,30 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         return None
 
     def visit_function_call(self, function_call: ast.FunctionCallNode, param):
+        if self.coroutines and self.is_delay(function_call):
+            self.write_to_script("(yield ")
+            return self.visit_delay(function_call, param)
+        closing = ""
+        if self.coroutines and self.is_serial_read(function_call):
+            self.write_to_script("(yield from screen_updater.resume(")
+            function_call.name.set_function_call(function_call)
+            function_call.name.accept(self, self.FUNCTION_CALL)
+            for parameter in function_call.parameters:
+                self.write_to_script(", ")
+                parameter.accept(self, param)
+            self.write_to_script("))")
+            return None
         if function_call.name is not None:
             function_call.name.set_function_call(function_call)
             name = function_call.name.accept(self, self.FUNCTION_CALL)
             if name is not None:
                 if name in self.functions:
+                    if self.coroutines and self.in_function:
+                        self.write_to_script("(yield from ")
+                        closing = ")"
+                    elif self.coroutines:
+                        self.write_to_script("screen_updater.complete(")
+                        closing = ")"
                     for f in self.functions[name]:
                         if len(function_call.parameters) == f['nparams']:
                             self.write_to_script(f['name'])
@@ -536,18 +611,59 @@ class CodeGenerator(ast_visitor.ASTVisitor):
                     self.write_to_script(", ")
                 function_call.parameters[i].accept(self, param)
             self.write_to_script(")")
+        self.write_to_script(closing)
+        return None
+
+    def is_delay(self, function_call: ast.FunctionCallNode):
+        """
+        Checks if a call is to one of the delays of Arduino
+        Arguments:
+            function_call: the call
+        Returns:
+            True if it is a delay
+        """
+        return isinstance(function_call.name, ast.IDNode) and function_call.name.value in self.DELAYS \
+            and function_call.name.value not in self.functions
+
+    def visit_delay(self, function_call: ast.FunctionCallNode, param):
+        """
+        Writes the milliseconds a delay waits, as the value yielded
+        by the coroutine
+        Arguments:
+            function_call: the call to the delay
+        """
+        template = self.DELAYS[function_call.name.value]
+        prefix, suffix = template.split("{}")
+        self.write_to_script(prefix)
+        for parameter in function_call.parameters:
+            parameter.accept(self, param)
+        self.write_to_script(suffix)
+        self.write_to_script(")")
         return None
 
+    def is_serial_read(self, function_call: ast.FunctionCallNode):
+        """
+        Checks if a call reads from Serial
+        Arguments:
+            function_call: the call
+        Returns:
+            True if it reads from Serial
+        """
+        name = function_call.name
+        return isinstance(name, ast.MemberAccessNode) and name.element is not None \
+            and name.element.value == "Serial" and name.member is not None \
+            and name.member.value in self.SERIAL_READS
+
     def visit_member_access(self, member_access: ast.MemberAccessNode, param):
         if member_access.element is not None:
-            elem = member_access.element.value
+            elem = self.get_name(member_access.element.value)
         if member_access.member is not None:
             method = member_access.member.value
             for key in self.library_manager.library_methods:
                 found_method = self.library_manager.find(key, method)
                 if found_method is not None:
                     if found_method[3] != -1:
-                        var = member_access.function_call.parameters[found_method[3]].value
+                        var = self.get_name(member_access.function_call.parameters[found_method[3]].value)
                         self.write_to_script("{} = {}.{}".format(
                             var, elem, found_method[1]))
                     else:
@@ -596,6 +712,7 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         tabs = ""
 
         if not self.continue_line:
+            self.source_map.add(self.script_line, *self.position)
             while i < self.script_tabs:
                 tabs += "\t"
                 i += 1
@@ -607,12 +724,100 @@ class CodeGenerator(ast_visitor.ASTVisitor):
         Writes an end line to the current line
         """
         self.script.write("\n")
+        self.script_line += 1
         self.continue_line = False
 
     def write_no_sentence(self):
         self.write_to_script("pass")
         self.write_endl()
 
+    def set_source(self, node):
+        """
+        Sets the position in the sketch of the code written from now on
+        Arguments:
+            node: the node of the sketch that is being written
+        """
+        self.position = (node.line, node.position)
+
+    def write_line_mark(self, node):
+        """
+        Starts a line of the sketch: sets its position and writes, when
+        profiling, the call that counts it and times it until the next one
+        Arguments:
+            node: the node of the line in the sketch
+        """
+        self.set_source(node)
+        if self.profile:
+            self.write_to_script("screen_updater.line({})".format(node.line))
+            self.write_endl()
+
+    def write_back_edge(self, loop):
+        """
+        Writes the start of an iteration of a loop, where the simulation
+        can advance while the sketch is busy, and where the iterations
+        are counted so a loop that never ends can be stopped. It is the
+        first statement of the body, so a continue cannot skip it
+        Arguments:
+            loop: the node of the loop in the sketch
+        """
+        self.write_line_mark(loop)
+        if self.coroutines:
+            self.write_to_script("yield screen_updater.check({})".format(loop.line))
+        else:
+            self.write_to_script("screen_updater.refresh({})".format(loop.line))
+        self.write_endl()
+
+    def open_scope(self):
+        """
+        Enters the scope of a function or a block
+        """
+        self.scopes.append({})
+
+    def close_scope(self):
+        """
+        Leaves the current scope
+        """
+        self.scopes.pop()
+
+    def declare(self, name):
+        """
+        Declares a variable in the current scope. A global keeps its
+        name, and so does a local unless the name is taken by a visible
+        variable, in which case it is given the first free one of
+        name_1, name_2...
+        Arguments:
+            name: the name of the variable in the sketch
+        Returns:
+            its name in the generated code
+        """
+        if not self.scopes:
+            self.globals.append(name)
+            return name
+        visible = set(self.globals)
+        for scope in self.scopes:
+            visible.update(scope.values())
+        python_name = name
+        suffix = 0
+        while python_name in visible:
+            suffix += 1
+            python_name = "{}_{}".format(name, suffix)
+        self.scopes[-1][name] = python_name
+        return python_name
+
+    def get_name(self, name):
+        """
+        Finds the name in the generated code of a visible variable
+        Arguments:
+            name: the name of the variable in the sketch
+        Returns:
+            its name in the generated code, the same one if it is not
+            a local (e.g. a global or a number)
+        """
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return name
+
     def increase_tab(self):
         """
         Increases the indentation
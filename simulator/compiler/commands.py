@@ -1,22 +1,8 @@
 import traceback
-import importlib.util
-import sys
-import time
 import output.console as console
 import compiler.transpiler as transpiler
-import libraries.standard as standard
-import libraries.serial as serial
-import robot_components.robot_state as state
-
-module = None
-
-
-def _import_module():
-    global module
-    spec = importlib.util.spec_from_file_location('temp.script_arduino', 'temp/script_arduino.py')
-    module = importlib.util.module_from_spec(spec)
-    sys.modules['temp.script_arduino'] = module
-    spec.loader.exec_module(module)
+import compiler.source_map as source_map
+import simulation.engine as engine
 
 
 class Command:
@@ -35,9 +21,7 @@ class Command:
         self.ready = False
 
     def prepare_exec(self):
-        standard.board = self.controller.robot_layer.robot.board
-        standard.state = state.State()
-        serial.cons = self.controller.console
+        self.controller.engine.prepare(self.controller.console)
         self.ready = True
 
 
@@ -46,10 +30,13 @@ class Compile(Command):
     def __init__(self, controller):
         super().__init__(controller)
         self.ast = None
+        self.sketch = None
 
     def execute(self):
         try:
-            warns, errors, self.ast = transpiler.transpile(self.controller.get_code())
+            self.sketch = transpiler.build(self.controller.get_code(), coroutines=True,
+                                           profile=self.controller.profiling)
+            warns, errors, self.ast = self.sketch.warnings, self.sketch.errors, self.sketch.ast
             if len(errors) > 0:
                 self.print_errors(errors)
                 return False
@@ -94,20 +81,20 @@ class Setup(Command):
         super().__init__(controller)
 
     def execute(self):
-        global module
         if not self.ready:
             self.prepare_exec()
-            _import_module()
-        curr_time_ns = time.time_ns()
-        if (
-                not standard.state.exec_time_us > curr_time_ns / 1000
-                and not standard.state.exec_time_ms > curr_time_ns / 1000000
-        ):
-            try:
-                module.setup()
-            except Exception:
-                self.controller.console.write_error(
-                    console.Error("Error de ejecución", 0, 0, "El sketch no se ha podido ejecutar correctamente"))
+            if self.controller.out_of_process:
+                # The child process runs the sketch without coroutines
+                self.controller.engine.start_process(transpiler.build(self.controller.get_code()))
+                return True
+            self.controller.engine.load(self.controller.compile_command.sketch)
+        try:
+            self.controller.engine.setup()
+        except engine.LoopBudgetExceeded as e:
+            self.controller.console.write_error(console.Error("Error de ejecución", e.line, 0, str(e)))
+            return False
+        except Exception as e:
+            self.controller.console.write_error(source_map.runtime_error(e, self.controller.engine.source_map))
         return True
 
 
@@ -117,18 +104,14 @@ class Loop(Command):
         super().__init__(controller)
 
     def execute(self):
-        global module
-        if not self.ready:
-            self.prepare_exec()
-        curr_time_ns = time.time_ns()
-        if (
-                not standard.state.exec_time_us > curr_time_ns / 1000
-                and not standard.state.exec_time_ms > curr_time_ns / 1000000
-                and not standard.state.exited and self.controller.executing
-        ):
+        # The engine has been prepared by the setup: preparing it again
+        # would stop the coroutine or the process of the sketch
+        if self.controller.executing:
             try:
-                module.loop()
-            except Exception:
-                self.controller.console.write_error(
-                    console.Error("Error de ejecución", 0, 0, "El sketch no se ha podido ejecutar correctamente"))
+                self.controller.engine.frame()
+            except engine.LoopBudgetExceeded as e:
+                self.controller.console.write_error(console.Error("Error de ejecución", e.line, 0, str(e)))
+                self.controller.executing = False
+            except Exception as e:
+                self.controller.console.write_error(source_map.runtime_error(e, self.controller.engine.source_map))
                 self.controller.executing = False
@@ -0,0 +1,200 @@
+"""
+Cache for the results of the transpiler. Compiling a sketch means
+lexing, parsing, building the AST, analysing it and generating its
+Python code, so the results are stored under a hash of everything
+that can change them: the code of the sketch, the libraries known
+by the simulator and the version of the simulator itself.
+
+The cache is a bounded LRU kept in memory, that can optionally be
+persisted to disk so it survives between executions.
+"""
+
+import hashlib
+import linecache
+import os
+import pickle
+import types
+from collections import OrderedDict
+
+SIMULATOR_VERSION = "1.0.0"
+MODULE_NAME = "script_arduino"
+SCRIPT_FILENAME = "<script_arduino>"
+
+
+class CacheEntry:
+    """
+    Results of compiling a sketch
+    """
+
+    def __init__(self, warnings, errors, ast, script, source_map=None):
+        """
+        Constructor for a cache entry
+        Arguments:
+            warnings: the warnings of the compilation
+            errors: the errors of the compilation
+            ast: the AST of the sketch, None if it could not be built
+            script: the generated Python code, None if there were errors
+            source_map: the map from the generated lines to the sketch
+            (see compiler.source_map), None if there were errors
+        """
+        self.warnings = warnings
+        self.errors = errors
+        self.ast = ast
+        self.script = script
+        self.source_map = source_map
+        self.code = None
+
+    def new_module(self):
+        """
+        Creates a fresh module from the generated code, so every
+        execution starts from the initial values of the globals.
+        The code is compiled only the first time
+        Returns:
+            the module, or None if the sketch has errors
+        """
+        if self.script is None:
+            return None
+        if self.code is None:
+            self.code = compile(self.script, SCRIPT_FILENAME, "exec")
+        linecache.cache[SCRIPT_FILENAME] = (
+            len(self.script), None, self.script.splitlines(True), SCRIPT_FILENAME)
+        module = types.ModuleType(MODULE_NAME)
+        exec(self.code, module.__dict__)
+        return module
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["code"] = None
+        return state
+
+    def __setstate__(self, state):
+        # Entries stored before the source maps have none
+        state.setdefault("source_map", None)
+        self.__dict__.update(state)
+
+
+class CompileCache:
+    """
+    Bounded LRU cache of compilation results
+    """
+
+    def __init__(self, max_entries=32, persist_dir=None):
+        """
+        Constructor for the compile cache
+        Arguments:
+            max_entries: the maximum number of entries kept, both
+            in memory and on disk
+            persist_dir: the directory where the entries are stored,
+            None to keep them only in memory
+        """
+        self.max_entries = max_entries
+        self.persist_dir = persist_dir
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, code, libraries, coroutines=False, profile=False):
+        """
+        Computes the key under which a sketch is stored
+        Arguments:
+            code: the code of the sketch
+            libraries: the names of the libraries known by the simulator
+            coroutines: True if the code is generated as coroutines
+            profile: True if the code is generated to be profiled
+        Returns:
+            the hexadecimal hash of the code, libraries, options and version
+        """
+        digest = hashlib.sha256()
+        digest.update(SIMULATOR_VERSION.encode("utf-8"))
+        digest.update(b"\0")
+        if coroutines:
+            digest.update(b"coroutines\0")
+        if profile:
+            digest.update(b"profile\0")
+        digest.update(",".join(sorted(libraries)).encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(code.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """
+        Finds the entry stored under a key
+        Arguments:
+            key: the key of the entry
+        Returns:
+            the entry, or None if it is not cached
+        """
+        entry = self.entries.get(key)
+        if entry is None and self.persist_dir is not None:
+            entry = self.__load(key)
+            if entry is not None:
+                self.__insert(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, entry):
+        """
+        Stores an entry, evicting the least recently used ones
+        if the cache is full
+        Arguments:
+            key: the key of the entry
+            entry: the entry to store
+        """
+        self.__insert(key, entry)
+        if self.persist_dir is not None:
+            self.__store(key, entry)
+
+    def clear(self):
+        """
+        Removes all the entries kept in memory
+        """
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __insert(self, key, entry):
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def __path(self, key):
+        return os.path.join(self.persist_dir, key + ".pickle")
+
+    def __load(self, key):
+        try:
+            with open(self.__path(key), "rb") as file:
+                entry = pickle.load(file)
+        except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError):
+            return None
+        if not isinstance(entry, CacheEntry):
+            return None
+        return entry
+
+    def __store(self, key, entry):
+        try:
+            os.makedirs(self.persist_dir, exist_ok=True)
+            tmp_path = self.__path(key) + ".tmp"
+            with open(tmp_path, "wb") as file:
+                pickle.dump(entry, file, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.__path(key))
+            self.__prune()
+        except (OSError, pickle.PickleError, RecursionError):
+            pass
+
+    def __prune(self):
+        files = [os.path.join(self.persist_dir, name)
+                 for name in os.listdir(self.persist_dir) if name.endswith(".pickle")]
+        if len(files) <= self.max_entries:
+            return
+        files.sort(key=os.path.getmtime)
+        for path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
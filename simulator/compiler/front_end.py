@@ -0,0 +1,80 @@
+"""
+Front end of the compiler: turns the code of a sketch into the
+parse tree of the ANTLR grammar.
+
+The lexer, token stream and parser are built once and only their
+input is reset between compilations. Parsing is done in two stages:
+first with SLL prediction and a bail-out error strategy, which is
+enough for almost every sketch, and only if that fails with full LL
+prediction and the usual error recovery, so the syntax errors are
+exactly the ones reported by a plain LL parse.
+"""
+
+from antlr4 import InputStream, CommonTokenStream
+from antlr4.atn.PredictionMode import PredictionMode
+from antlr4.error.ErrorStrategy import BailErrorStrategy, DefaultErrorStrategy
+from antlr4.error.Errors import ParseCancellationException
+from compiler.ArduinoLexer import ArduinoLexer
+from compiler.ArduinoParser import ArduinoParser
+import compiler.error_listener as error_listener
+
+
+class FrontEnd:
+    """
+    Long-lived lexer and parser for Arduino sketches
+    """
+
+    def __init__(self):
+        """
+        Constructor for the front end
+        """
+        self.lexer = ArduinoLexer(InputStream(""))
+        self.stream = CommonTokenStream(self.lexer)
+        self.parser = ArduinoParser(self.stream)
+        self.lexer.removeErrorListeners()
+        self.parser.removeErrorListeners()
+        self.sll_parses = 0
+        self.ll_parses = 0
+
+    def parse(self, code):
+        """
+        Parses the code of a sketch
+        Arguments:
+            code: the code to parse
+        Returns:
+            the parse tree and the list of lexical and syntax errors
+        """
+        listener = error_listener.CompilerErrorListener(False)
+        self.lexer.addErrorListener(listener)
+        try:
+            self.lexer.inputStream = InputStream(code)
+            tree = self.__parse_sll()
+            if tree is not None:
+                self.sll_parses += 1
+                return tree, listener.errors
+            listener.errors.clear()
+            self.lexer.reset()
+            self.parser.addErrorListener(listener)
+            tree = self.__parse_ll()
+            self.ll_parses += 1
+            return tree, listener.errors
+        finally:
+            self.lexer.removeErrorListeners()
+            self.parser.removeErrorListeners()
+
+    def __parse_sll(self):
+        self.stream.setTokenSource(self.lexer)
+        self.parser.setTokenStream(self.stream)
+        self.parser._interp.predictionMode = PredictionMode.SLL
+        self.parser._errHandler = BailErrorStrategy()
+        try:
+            return self.parser.program()
+        except ParseCancellationException:
+            return None
+
+    def __parse_ll(self):
+        self.stream.setTokenSource(self.lexer)
+        self.parser.setTokenStream(self.stream)
+        self.parser._interp.predictionMode = PredictionMode.LL
+        self.parser._errHandler = DefaultErrorStrategy()
+        return self.parser.program()
@@ -2,6 +2,7 @@ import libraries.libs as libraries
 import output.console as console
 import compiler.ast as ast
 import compiler.ast_visitor as ast_visitor
+import compiler.symbol_table as symbol_table
 from simulator.compiler.ast import StringTypeNode, VoidTypeNode
 
 
@@ -15,7 +16,7 @@ class Semantic:
         decl.visit_program(ast, None)
         self.errors = decl.errors
         semt = SemanticAnalyzer(self.library_manager,
-                                decl.globals, decl.locals, decl.functions)
+                                decl.symbols, decl.functions)
         semt.visit_program(ast, None)
         self.errors.extend(semt.errors)
 
@@ -25,8 +26,7 @@ class DeclarationAnalyzer(ast_visitor.ASTVisitor):
     def __init__(self, library_manager: libraries.LibraryManager):
         self.library_manager = library_manager
         self.errors = []
-        self.globals = {}
-        self.locals = {}
+        self.symbols = symbol_table.SymbolTable()
         self.functions = {}
 
     def visit_program(self, program: ast.ProgramNode, param):
@@ -48,6 +48,7 @@ class DeclarationAnalyzer(ast_visitor.ASTVisitor):
     def visit_function(self, function: ast.FunctionNode, param):
         if function.type is not None:
             function.type.accept(self, param)
+        self.symbols.open_scope(function)
         if len(function.args) > 0:
             for arg in function.args:
                 arg.set_function(function)
@@ -60,6 +61,7 @@ class DeclarationAnalyzer(ast_visitor.ASTVisitor):
             for sent in function.sentences:
                 sent.set_function(function)
                 sent.accept(self, param)
+        self.symbols.close_scope()
         if function.name not in self.functions:
             self.functions[function.name] = [function]
         else:
@@ -74,26 +76,71 @@ class DeclarationAnalyzer(ast_visitor.ASTVisitor):
                                "La función ya ha sido declarada")
         return None
 
+    def visit_while(self, while_p: ast.WhileNode, param):
+        if while_p.expression is not None:
+            while_p.expression.accept(self, param)
+        self.symbols.open_scope(while_p)
+        self.visit_children(while_p.sentences, param)
+        self.symbols.close_scope()
+        return None
+
+    def visit_do_while(self, do_while: ast.DoWhileNode, param):
+        if do_while.expression is not None:
+            do_while.expression.accept(self, param)
+        self.symbols.open_scope(do_while)
+        self.visit_children(do_while.sentences, param)
+        self.symbols.close_scope()
+        return None
+
+    def visit_for(self, for_p: ast.ForNode, param):
+        self.symbols.open_scope(for_p)
+        if for_p.assignment is not None:
+            for_p.assignment.accept(self, param)
+        if for_p.condition is not None:
+            for_p.condition.accept(self, param)
+        if for_p.expression is not None:
+            for_p.expression.accept(self, param)
+        self.visit_children(for_p.sentences, param)
+        self.symbols.close_scope()
+        return None
+
+    def visit_conditional_sentence(self, conditional_sentence: ast.ConditionalSentenceNode, param):
+        if conditional_sentence.condition is not None:
+            conditional_sentence.condition.accept(self, param)
+        self.symbols.open_scope(conditional_sentence, "if")
+        self.visit_children(conditional_sentence.if_expr, param)
+        self.symbols.close_scope()
+        self.symbols.open_scope(conditional_sentence, "else")
+        self.visit_children(conditional_sentence.else_expr, param)
+        self.symbols.close_scope()
+        return None
+
+    def visit_switch_sentence(self, switch_sentence: ast.SwitchSentenceNode, param):
+        if switch_sentence.expression is not None:
+            switch_sentence.expression.accept(self, param)
+        self.symbols.open_scope(switch_sentence)
+        self.visit_children(switch_sentence.cases, param)
+        self.symbols.close_scope()
+        return None
+
     def visit_declaration(self, declaration: ast.DeclarationNode, param):
         if declaration.type is not None:
             declaration.type.accept(self, param)
         if declaration.expr is not None:
             declaration.expr.accept(self, param)
-        dec = self.__lookfor_var(declaration.var_name, declaration.function)
+        dec = self.symbols.lookup_local(declaration.var_name)
         if dec is not None:
             self.add_error("Declaración", declaration,
                            "La variable ya ha sido declarada")
         else:
-            self.add_declaration(declaration.function,
-                                 declaration.var_name, declaration)
+            self.symbols.declare(declaration.var_name, declaration)
         return None
 
     def visit_array_declaration(self, array_declaration: ast.ArrayDeclarationNode, param):
         if array_declaration.type is not None:
             array_declaration.type.accept(self, param)
         self.visit_array_elements(array_declaration.elements, param)
-        dec = self.__lookfor_var(
-            array_declaration.var_name, array_declaration.function)
+        dec = self.symbols.lookup_local(array_declaration.var_name)
         if dec is not None:
             self.add_error("Declaración", array_declaration,
                            "El array ya ha sido declarado")
@@ -101,68 +148,35 @@ class DeclarationAnalyzer(ast_visitor.ASTVisitor):
             self.add_error("Tamaños", array_declaration,
                            "No se ha introducido el tamaño del array")
         else:
-            self.add_declaration(array_declaration.function,
-                                 array_declaration.var_name, array_declaration)
+            self.symbols.declare(array_declaration.var_name, array_declaration)
         return None
 
     def visit_define_macro(self, define_macro: ast.DefineMacroNode, param):
         if define_macro.expr is not None:
             define_macro.expr.accept(self, param)
-        dec = self.__lookfor_var(
-            define_macro.macro_name, define_macro.function)
+        dec = self.symbols.lookup_local(define_macro.macro_name)
         if dec is not None:
             self.add_error("Declaración", define_macro,
                            "La macro ya ha sido declarada")
         else:
-            self.add_declaration(define_macro.function,
-                                 define_macro.macro_name, define_macro)
+            self.symbols.declare(define_macro.macro_name, define_macro)
         return None
 
     def add_error(self, e_type, element, message):
         self.errors.append(
             console.Error(e_type, element.line, element.position, message))
 
-    def add_declaration(self, function, name, decl):
-        if function is not None:
-            if function.name in self.locals:
-                self.locals[function.name][name] = decl
-            else:
-                self.locals[function.name] = {name: decl}
-        else:
-            self.globals[name] = decl
-
-    def __lookfor_var(self, name, function):
-        if function is not None:
-            if function.name in self.locals:
-                if name in self.locals[function.name]:
-                    return self.locals[function.name][name]
-        else:
-            if name in self.globals:
-                return self.globals[name]
-        return None
 
 
 class SemanticAnalyzer(ast_visitor.ASTVisitor):
 
-    def __init__(self, library_manager: libraries.LibraryManager, globals, locals, functions):
+    def __init__(self, library_manager: libraries.LibraryManager, symbols, functions):
         self.errors = []
         self.library_manager = library_manager
-        self.globals = globals
-        self.locals = locals
+        self.symbols: symbol_table.SymbolTable = symbols
         self.functions = functions
-        self.numerical_types = [ast.IntTypeNode, ast.FloatTypeNode,
-                                ast.DoubleTypeNode, ast.ByteTypeNode,
-                                ast.ShortTypeNode, ast.LongTypeNode,
-                                ast.CharTypeNode, ast.BooleanTypeNode,
-                                ast.Size_tTypeNode, ast.WordTypeNode,
-                                ast.ULongTypeNode, ast.UIntTypeNode,
-                                ast.UCharTypeNode]
-        self.integer_types = [ast.IntTypeNode, ast.ByteTypeNode,
-                              ast.ShortTypeNode, ast.LongTypeNode,
-                              ast.CharTypeNode, ast.BooleanTypeNode,
-                              ast.Size_tTypeNode, ast.WordTypeNode,
-                              ast.ULongTypeNode, ast.UIntTypeNode,
-                              ast.UCharTypeNode]
+        self.numerical_types = symbol_table.NUMERICAL_TYPES
+        self.integer_types = symbol_table.INTEGER_TYPES
 
     def visit_program(self, program: ast.ProgramNode, param):
         self.visit_children(program.includes, param)
@@ -239,6 +253,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
         has_returned = False
         if function.type is not None:
             function.type.accept(self, param)
+        self.symbols.open_scope(function)
         if len(function.args) > 0:
             for arg in function.args:
                 arg.accept(self, param)
@@ -260,6 +275,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
                                    "Break debe ser usado dentro de un bucle o en case switch")
                 if isinstance(sent, ast.ReturnNode):
                     has_returned = True
+        self.symbols.close_scope()
         if function.name not in self.functions:
             self.functions[function.name] = [function]
         else:
@@ -298,11 +314,13 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
         if while_p.expression is not None:
             while_p.expression.set_function(while_p.function)
             while_p.expression.accept(self, param)
+        self.symbols.open_scope(while_p)
         if while_p.sentences is not None:
             for sent in while_p.sentences:
                 sent.set_is_loop_sent(True)
                 sent.set_function(while_p.function)
                 sent.accept(self, param)
+        self.symbols.close_scope()
         if self.check_in_types(while_p.expression.type, self.integer_types):
             self.add_error(
                 "Tipos", while_p, "El resultado de la condición debe ser int o boolean")
@@ -312,16 +330,19 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
         if do_while.expression is not None:
             do_while.expression.set_function(do_while.function)
             do_while.expression.accept(self, param)
+        self.symbols.open_scope(do_while)
         for sent in do_while.sentences:
             sent.set_is_loop_sent(True)
             sent.set_function(do_while.function)
             sent.accept(self, param)
+        self.symbols.close_scope()
         if self.check_in_types(do_while.expression.type, self.integer_types):
             self.add_error(
                 "Tipos", do_while, "El resultado de la condición debe ser int o boolean")
         return None
 
     def visit_for(self, for_p: ast.ForNode, param):
+        self.symbols.open_scope(for_p)
         if for_p.assignment is not None:
             for_p.assignment.set_function(for_p.function)
             for_p.assignment.accept(self, param)
@@ -336,6 +357,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
                 sent.set_is_loop_sent(True)
                 sent.set_function(for_p.function)
                 sent.accept(self, param)
+        self.symbols.close_scope()
         if self.check_in_types(for_p.assignment.type, self.integer_types):
             self.add_error(
                 "Tipos", for_p, "La variable del for debe ser int (en Arduino realmente no)")
@@ -352,6 +374,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
             conditional_sentence.condition.set_function(
                 conditional_sentence.function)
             conditional_sentence.condition.accept(self, param)
+        self.symbols.open_scope(conditional_sentence, "if")
         if conditional_sentence.if_expr is not None:
             for sent in conditional_sentence.if_expr:
                 sent.set_function(conditional_sentence.function)
@@ -362,6 +385,8 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
                 if isinstance(sent, ast.BreakNode) and not conditional_sentence.is_loop_sent:
                     self.add_error("Mal uso de identificador", sent,
                                    "Break debe usarse en bucles o en case switch")
+        self.symbols.close_scope()
+        self.symbols.open_scope(conditional_sentence, "else")
         if conditional_sentence.else_expr is not None:
             for sent in conditional_sentence.else_expr:
                 sent.set_function(conditional_sentence.function)
@@ -372,6 +397,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
                 if isinstance(sent, ast.BreakNode) and not conditional_sentence.is_loop_sent:
                     self.add_error("Mal uso de identificador", sent,
                                    "Break debe usarse en bucles o en case switch")
+        self.symbols.close_scope()
         if self.check_in_types(conditional_sentence.condition.type, self.integer_types):
             self.add_error(
                 "Tipos", conditional_sentence, "El resultado de la condición debe ser int o boolean")
@@ -381,6 +407,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
         if switch_sentence.expression is not None:
             switch_sentence.expression.set_function(switch_sentence.function)
             switch_sentence.expression.accept(self, param)
+        self.symbols.open_scope(switch_sentence)
         if switch_sentence.cases is not None:
             for case_block in switch_sentence.cases:
                 case_block.set_function(switch_sentence.function)
@@ -396,6 +423,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
                         self.add_error(
                             "Tipos", case_block,
                             "La sentencia case debe de tener una expresión del tipo marcado en switch")
+        self.symbols.close_scope()
         return None
 
     def visit_assignment(self, assignment: ast.AssignmentNode, param):
@@ -619,11 +647,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
         definition = None
         array_access.set_modifiable(True)
         if not isinstance(array_access.value, ast.ArrayAccessNode):
-            if array_access.value in self.globals:
-                definition = self.globals[array_access.value]
-            elif array_access.function.name in self.locals:
-                if array_access.value in self.locals[array_access.function.name]:
-                    definition = self.locals[array_access.function.name][array_access.value]
+            definition = self.symbols.lookup(array_access.value)
         if definition is not None:
             array_access.set_type(definition.type)
             definition_size = -1
@@ -638,10 +662,8 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
                         self.add_error("Índice", array_access.indexes[i],
                                        "El tipo del índice debe ser int (o cualquiera que sea compatible)")
                     else:
-                        index = array_access.indexes[i].value
-                        if isinstance(index, str):
-                            index = self.__get_declaration(index, array_access.function).expr.value
-                        if index >= definition.size[i]:
+                        index = self.__get_constant_index(array_access.indexes[i])
+                        if index is not None and index >= definition.size[i]:
                             self.add_error("Tamaños", array_access.indexes[i],
                                            "El índice sobrepasa el tamaño del array")
         else:
@@ -761,7 +783,7 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
             if self.check_in_types(type_2, self.integer_types):
                 self.add_error(
                     "Tipos", node, encabezado + " es char, pero su valor no es char o int")
-        elif type(type_1) in self.numerical_types:
+        elif symbol_table.describe(type_1).numerical:
             if self.check_in_types(type_2, self.numerical_types):
                 self.add_error(
                     "Tipos", node, encabezado + " es numérico, pero su valor no")
@@ -776,8 +798,8 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
         list_types = self.__look_for_elements(type_class_to_compare)
         if list_types is not None:
             return self.__check_elements(type_to_check, list_types)
-        if type(type_to_check) in self.numerical_types:
-            return type_class_to_compare not in self.numerical_types
+        if symbol_table.describe(type_to_check).numerical:
+            return not symbol_table.describe_class(type_class_to_compare).numerical
         return not type(type_to_check) is type_class_to_compare
 
     def check_in_types(self, var, types):
@@ -799,28 +821,38 @@ class SemanticAnalyzer(ast_visitor.ASTVisitor):
             return True
 
     def variable_defined(self, name, function):
-        if name in self.globals:
-            return True
-        if function is not None:
-            if function.name in self.locals:
-                return name in self.locals[function.name]
+        return self.symbols.lookup(name) is not None
 
     def __get_declaration(self, value, function):
         definition = None
         try:
-            if value in self.globals:
-                definition = self.globals[value]
-            elif function.name in self.locals:
-                if value in self.locals[function.name]:
-                    definition = self.locals[function.name][value]
+            definition = self.symbols.lookup(value)
         finally:
             return definition
 
+    def __get_constant_index(self, index):
+        """
+        Finds the value of an index known when compiling: a literal, or
+        a constant or a macro defined as a literal
+        Arguments:
+            index: the node of the index
+        Returns:
+            its value, None if it is only known when running
+        """
+        if isinstance(index, ast.IDNode):
+            definition = self.__get_declaration(index.value, index.function)
+            if isinstance(definition, ast.DefineMacroNode) or (
+                    isinstance(definition, ast.DeclarationNode) and definition.is_const):
+                index = definition.expr
+        if isinstance(index, ast.IntNode) and isinstance(index.value, int):
+            return index.value
+        return None
+
     def __check_elements(self, type_to_compare, types):
         if len(types) > 1:
             return True
-        if type(type_to_compare) in self.numerical_types:
-            return types[0] not in self.numerical_types
+        if symbol_table.describe(type_to_compare).numerical:
+            return not symbol_table.describe_class(types[0]).numerical
         return not type(type_to_compare) is types[0]
 
     def __look_for_elements(self, types):
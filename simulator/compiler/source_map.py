@@ -0,0 +1,100 @@
+"""
+Map from the lines of the Python code generated for a sketch back to
+the lines and columns of the sketch, so the errors of a run can tell
+where they happened in the sketch.
+
+The map only keeps the generated lines where the position in the
+sketch changes, in order, so finding the position of a line is a
+binary search. Nothing is done while the sketch runs: the map is only
+looked up when there is an error.
+"""
+
+import bisect
+from array import array
+
+import compiler.compile_cache as compile_cache
+import output.console as console
+
+ERROR_MESSAGE = "El sketch no se ha podido ejecutar correctamente ({}: {})"
+
+
+class SourceMap:
+
+    def __init__(self):
+        """
+        Constructor for the source map
+        """
+        self.generated = array("I")
+        self.lines = array("I")
+        self.columns = array("I")
+
+    def add(self, generated_line, line, column):
+        """
+        Maps a generated line, and the ones after it, to a position of
+        the sketch. The lines must be added in order
+        Arguments:
+            generated_line: the line in the generated code
+            line: the line in the sketch
+            column: the column in the sketch
+        """
+        if self.generated and self.lines[-1] == line and self.columns[-1] == column:
+            return
+        if self.generated and self.generated[-1] == generated_line:
+            self.lines[-1] = line
+            self.columns[-1] = column
+            return
+        self.generated.append(generated_line)
+        self.lines.append(line)
+        self.columns.append(column)
+
+    def find(self, generated_line):
+        """
+        Finds the position in the sketch of a generated line
+        Arguments:
+            generated_line: the line in the generated code
+        Returns:
+            the line and column in the sketch, None if it is not mapped
+        """
+        i = bisect.bisect_right(self.generated, generated_line) - 1
+        if i < 0:
+            return None
+        return self.lines[i], self.columns[i]
+
+    def locate(self, exception):
+        """
+        Finds where an exception raised by the sketch happened in the
+        sketch: in the last line of the generated code in its traceback
+        Arguments:
+            exception: the exception
+        Returns:
+            the line and column in the sketch, None if it did not happen
+            in the generated code
+        """
+        generated_line = None
+        traceback = exception.__traceback__
+        while traceback is not None:
+            if traceback.tb_frame.f_code.co_filename == compile_cache.SCRIPT_FILENAME:
+                generated_line = traceback.tb_lineno
+            traceback = traceback.tb_next
+        if generated_line is None:
+            return None
+        return self.find(generated_line)
+
+    def __len__(self):
+        return len(self.generated)
+
+
+def runtime_error(exception, source_map=None):
+    """
+    Describes an exception raised by the sketch as an error of the
+    console, at its position in the sketch
+    Arguments:
+        exception: the exception
+        source_map: the source map of the sketch, None if there is none
+    Returns:
+        the error
+    """
+    position = source_map.locate(exception) if source_map is not None else None
+    line, column = position if position is not None else (0, 0)
+    return console.Error("Error de ejecución", line, column,
+                         ERROR_MESSAGE.format(type(exception).__name__, exception))
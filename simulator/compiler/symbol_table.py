@@ -0,0 +1,168 @@
+"""
+Symbol table used by the semantic analysis.
+
+Scopes form a chain: the global scope, one scope per function and
+one per block (bodies of loops, branches of conditionals and switch
+statements, where the variable of a for belongs to the scope of its
+body). Besides the scopes, the table keeps an index from every name
+to the declarations currently visible, so looking a name up does not
+depend on how deep the scope chain is.
+
+The scopes are created by the declaration analysis and entered again,
+already filled, by the semantic analysis.
+"""
+
+import sys
+import compiler.ast as ast
+
+
+class TypeDescriptor:
+    """
+    Properties of a type, computed once per type class
+    """
+
+    def __init__(self, type_class, numerical, integer):
+        """
+        Constructor for a type descriptor
+        Arguments:
+            type_class: the class of the type node
+            numerical: True if the type is numerical
+            integer: True if the type is integer (or compatible)
+        """
+        self.type_class = type_class
+        self.numerical = numerical
+        self.integer = integer
+
+
+INTEGER_TYPES = frozenset([ast.IntTypeNode, ast.ByteTypeNode,
+                           ast.ShortTypeNode, ast.LongTypeNode,
+                           ast.CharTypeNode, ast.BooleanTypeNode,
+                           ast.Size_tTypeNode, ast.WordTypeNode,
+                           ast.ULongTypeNode, ast.UIntTypeNode,
+                           ast.UCharTypeNode])
+NUMERICAL_TYPES = INTEGER_TYPES | frozenset([ast.FloatTypeNode, ast.DoubleTypeNode])
+
+_descriptors = {}
+
+
+def describe_class(type_class):
+    """
+    Finds the descriptor of a type class
+    Arguments:
+        type_class: the class of the type node
+    Returns:
+        its descriptor
+    """
+    descriptor = _descriptors.get(type_class)
+    if descriptor is None:
+        descriptor = TypeDescriptor(type_class, type_class in NUMERICAL_TYPES,
+                                    type_class in INTEGER_TYPES)
+        _descriptors[type_class] = descriptor
+    return descriptor
+
+
+def describe(type_node):
+    """
+    Finds the descriptor of the type of a node
+    Arguments:
+        type_node: the type node (or None)
+    Returns:
+        its descriptor
+    """
+    return describe_class(type(type_node))
+
+
+class Scope:
+    """
+    Declarations of a scope
+    """
+
+    def __init__(self, parent):
+        """
+        Constructor for a scope
+        Arguments:
+            parent: the enclosing scope, None for the global one
+        """
+        self.parent = parent
+        self.symbols = {}
+
+
+class SymbolTable:
+
+    def __init__(self):
+        """
+        Constructor for the symbol table. It starts in the global scope
+        """
+        self.globals = Scope(None)
+        self.current = self.globals
+        self.scopes = {}
+        self.index = {}
+
+    def open_scope(self, owner, part=None):
+        """
+        Enters the scope of a node, creating it the first time
+        Arguments:
+            owner: the node (function, loop, conditional...) that
+            opens the scope
+            part: which of the scopes of the node, for the ones that
+            have more than one (if and else)
+        Returns:
+            the scope
+        """
+        key = (id(owner), part)
+        scope = self.scopes.get(key)
+        if scope is None:
+            scope = Scope(self.current)
+            self.scopes[key] = scope
+        else:
+            for name, node in scope.symbols.items():
+                self.index.setdefault(name, []).append(node)
+        self.current = scope
+        return scope
+
+    def close_scope(self):
+        """
+        Leaves the current scope
+        """
+        for name in self.current.symbols:
+            self.index[name].pop()
+        self.current = self.current.parent
+
+    def declare(self, name, node):
+        """
+        Declares a name in the current scope
+        Arguments:
+            name: the identifier
+            node: its declaration
+        """
+        name = sys.intern(name)
+        previous = self.current.symbols.get(name)
+        self.current.symbols[name] = node
+        visible = self.index.setdefault(name, [])
+        if previous is not None and visible and visible[-1] is previous:
+            visible[-1] = node
+        else:
+            visible.append(node)
+
+    def lookup(self, name):
+        """
+        Finds the visible declaration of a name
+        Arguments:
+            name: the identifier
+        Returns:
+            the declaration, or None if the name is not declared
+        """
+        visible = self.index.get(name)
+        if visible:
+            return visible[-1]
+        return None
+
+    def lookup_local(self, name):
+        """
+        Finds the declaration of a name in the current scope only
+        Arguments:
+            name: the identifier
+        Returns:
+            the declaration, or None if the name is not declared there
+        """
+        return self.current.symbols.get(name)
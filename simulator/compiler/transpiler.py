@@ -5,55 +5,87 @@ import sys
 sys.path.append(".")
 sys.path.append("./simulator")
 
-from antlr4 import *
-from compiler.ArduinoLexer import ArduinoLexer
-from compiler.ArduinoParser import ArduinoParser
 import compiler.ast_builder_visitor as ast_builder_visitor
-import compiler.error_listener as error_listener
+import compiler.front_end as front_end
 import compiler.warnings as warnings
 import compiler.semantical_errors as semantical_analysis
+import compiler.analysis as analysis
 import compiler.code_generator as code_generator
+import compiler.compile_cache as compile_cache
 import libraries.libs as libraries
 
+cache = compile_cache.CompileCache()
+front = front_end.FrontEnd()
 
-def transpile(code):
+
+def transpile(code, use_cache=True):
+    """
+    Transpiles an Arduino sketch into the Python code executed
+    by the simulator
+    Arguments:
+        code: the code of the sketch
+        use_cache: False to always compile the sketch
+    Returns:
+        the warnings, the errors and the AST of the sketch
+    """
+    entry = build(code, use_cache)
+    return list(entry.warnings), list(entry.errors), entry.ast
+
+
+def build(code, use_cache=True, coroutines=False, profile=False):
+    """
+    Compiles an Arduino sketch. The results are looked up in the
+    compile cache first, so a sketch that has not changed is not
+    parsed again
+    Arguments:
+        code: the code of the sketch
+        use_cache: False to always compile the sketch
+        coroutines: True to generate the functions as coroutines, which
+        yield in the delays and loops instead of blocking
+        profile: True to count and time the lines of the sketch (see
+        simulation.profiler)
+    Returns:
+        the compiled sketch, whose new_module method creates the
+        module to execute
+    """
+    key = None
+    if use_cache:
+        key = cache.make_key(code, libraries.LibraryManager().get_libraries(), coroutines, profile)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    entry = compile_cache.CacheEntry(*_compile(code, coroutines, profile))
+    if key is not None:
+        cache.put(key, entry)
+    return entry
+
+
+def _compile(code, coroutines=False, profile=False):
+    script = None
+    source_map = None
     errors = []
     warns = []
     ast = None
-    input = InputStream(code)
-
-    lexer = ArduinoLexer(input)
-    listener = error_listener.CompilerErrorListener(False)
-    lexer.removeErrorListeners()
-    lexer.addErrorListener(listener)
-
-    stream = CommonTokenStream(lexer)
-    parser = ArduinoParser(stream)
-    parser.removeErrorListeners()
-    parser.addErrorListener(listener)
 
     visitor = ast_builder_visitor.ASTBuilderVisitor()
 
     lib_manager = libraries.LibraryManager()
-    warning_analysis = warnings.WarningAnalyzer()
-    sem_analysis = semantical_analysis.Semantic(lib_manager)
-    code_gen = code_generator.CodeGenerator(lib_manager)
-    tree = parser.program()
-    errors.extend(listener.errors)
+    engine = analysis.AnalysisEngine(lib_manager)
+    tree, syntax_errors = front.parse(code)
+    errors.extend(syntax_errors)
     if len(errors) < 1:
         ast = visitor.visitProgram(tree)
-        sem_analysis.execute(ast)
-        try:
-            errors.extend(sem_analysis.errors)
-        except AttributeError:
-            pass
-        else:
-            if not errors:
-                code_gen.visit_program(ast, None)
-                warning_analysis.visit_program(ast, None)
-                warns = warning_analysis.warnings
+        engine.execute(ast)
+        errors.extend(engine.errors)
+        if not errors:
+            function_names = engine.get_rule(analysis.FunctionNamesRule)
+            code_gen = code_generator.CodeGenerator(lib_manager, function_names.functions, coroutines, profile)
+            code_gen.visit_program(ast, None)
+            script = code_gen.source
+            source_map = code_gen.source_map
+            warns = engine.warnings
 
-    return warns, errors, ast
+    return warns, errors, ast, script, source_map
 
 
 def test():
@@ -65,6 +97,3 @@ def test():
     warning_analysis = warnings.WarningAnalyzer()
     sem_analysis = semantical_analysis.Semantic(lib_manager)
     return sem_analysis.execute(ast)
-
-f = open('tests/file-tests/arrays.txt').read()
-transpile(f)
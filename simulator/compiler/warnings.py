@@ -7,11 +7,11 @@ import compiler.ast as ast
 
 class WarningAnalyzer(ast_visitor.ASTVisitor):
 
-    def __init__(self) -> None:
+    def __init__(self, lib_manager=None) -> None:
         self.warnings = []
         self.locals = {}
         self.globals = {}
-        self.lib_manager = libs.LibraryManager()
+        self.lib_manager = lib_manager if lib_manager is not None else libs.LibraryManager()
 
     def visit_declaration(self, declaration: ast.DeclarationNode, param):
         if declaration.type is not None:
@@ -0,0 +1,159 @@
+"""
+Headless autograder for the challenges. It checks every sketch of a
+directory against one of the challenges (0 to 6, the same numbers used
+by the challenge selector of the GUI), compiling them in parallel in a
+pool of processes, and writes a JSON or CSV report with the errors,
+warnings and times of each sketch.
+
+It does not need tkinter nor PIL. Run it from the root of the
+repository, where the solutions of the challenges are:
+
+    python simulator/grader.py <sketches directory> <challenge>
+           [--jobs N] [--format json|csv] [--output report]
+
+Only the code is graded: the circuit of the student is built in the
+GUI and is not part of the sketch.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import compiler.transpiler as transpiler
+import robot_components.robots as robots
+
+CHALLENGES = [robots.Challenge0Robot, robots.Challenge1Robot, robots.Challenge2Robot,
+              robots.Challenge3Robot, robots.Challenge4Robot, robots.Challenge5Robot,
+              robots.Challenge6Robot]
+SKETCH_EXTENSIONS = (".ino", ".txt")
+CSV_FIELDS = ["file", "passed", "compiles", "code", "errors", "warnings", "time_ms", "messages"]
+
+
+def find_sketches(directory):
+    """
+    Finds the sketches of a directory and its subdirectories
+    Arguments:
+        directory: the directory with the sketches
+    Returns:
+        the paths of the sketches, sorted
+    """
+    sketches = []
+    for root, dirs, files in os.walk(directory):
+        for file in files:
+            if file.lower().endswith(SKETCH_EXTENSIONS):
+                sketches.append(os.path.join(root, file))
+    return sorted(sketches)
+
+
+def grade_sketch(path, solution):
+    """
+    Grades a sketch
+    Arguments:
+        path: the path of the sketch
+        solution: the code of the solution of the challenge
+    Returns:
+        a dict with the result of the sketch
+    """
+    start = time.perf_counter()
+    with open(path, encoding="utf-8", errors="replace") as file:
+        code = file.read()
+    try:
+        warns, errors, ast = transpiler.transpile(code)
+        errors = [error.to_string() for error in errors]
+        warns = [warning.to_string() for warning in warns]
+    except Exception as e:
+        errors = ["Error interno del compilador: {}".format(e)]
+        warns = []
+    code_ok = robots.same_code(code, solution)
+    return {
+        "file": path,
+        "passed": code_ok and not errors,
+        "compiles": not errors,
+        "code": code_ok,
+        "errors": errors,
+        "warnings": warns,
+        "time_ms": round((time.perf_counter() - start) * 1000, 3)
+    }
+
+
+def grade(directory, challenge, jobs=None):
+    """
+    Grades all the sketches of a directory
+    Arguments:
+        directory: the directory with the sketches
+        challenge: the number of the challenge
+        jobs: the number of processes, one per core if None
+    Returns:
+        the results of the sketches, in the order of their paths
+    """
+    solution = CHALLENGES[challenge](None).get_code()
+    sketches = find_sketches(directory)
+    if not sketches:
+        return []
+    jobs = jobs or os.cpu_count() or 1
+    chunksize = max(1, len(sketches) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(grade_sketch, sketches, repeat(solution), chunksize=chunksize))
+
+
+def write_json(results, file):
+    """
+    Writes the report as JSON
+    Arguments:
+        results: the results of the sketches
+        file: the file to write to
+    """
+    json.dump(results, file, ensure_ascii=False, indent=2)
+    file.write("\n")
+
+
+def write_csv(results, file):
+    """
+    Writes the report as CSV, with the number of errors and warnings
+    and all their messages in one column
+    Arguments:
+        results: the results of the sketches
+        file: the file to write to
+    """
+    writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for result in results:
+        row = dict(result)
+        row["messages"] = " | ".join(result["errors"] + result["warnings"])
+        row["errors"] = len(result["errors"])
+        row["warnings"] = len(result["warnings"])
+        writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Corrector automático de los desafíos")
+    parser.add_argument("directory", help="directorio con los sketches de los alumnos")
+    parser.add_argument("challenge", type=int, choices=range(len(CHALLENGES)), help="número del desafío")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="número de procesos (uno por núcleo)")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json", help="formato del informe")
+    parser.add_argument("-o", "--output", default=None, help="fichero del informe (salida estándar si no se indica)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = grade(args.directory, args.challenge, args.jobs)
+    write = write_json if args.format == "json" else write_csv
+    if args.output is None:
+        write(results, sys.stdout)
+    else:
+        with open(args.output, "w", encoding="utf-8", newline="") as file:
+            write(results, file)
+    passed = sum(1 for result in results if result["passed"])
+    print("{} sketches, {} correctos, {:.2f} s".format(len(results), passed, time.perf_counter() - start),
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,10 +2,35 @@ import graphics.layers as layers
 import output.console as console
 import output.console_gamification as console_gamification
 import compiler.commands as commands
-import graphics.screen_updater as screen_updater
+import simulation.engine as engine
+import simulation.profiler as profiler
+import simulation.replay as replay
+import simulation.snapshot as snapshot
+import simulation.trace as trace
 from datetime import datetime
 
 
+class ViewObserver(engine.Observer):
+    """
+    Shows the simulation in the GUI and passes it the keys pressed
+    """
+
+    def __init__(self, view):
+        """
+        Constructor for the observer of the view
+        Arguments:
+            view: the main window
+        """
+        self.view = view
+
+    def before_steps(self, engine):
+        engine.keys_used = self.view.keys_used
+        engine.move_WASD = self.view.move_WASD
+
+    def after_steps(self, engine):
+        self.view.update_idletasks()
+
+
 class RobotsController:
 
     def __init__(self, view):
@@ -16,17 +41,29 @@ class RobotsController:
         self.compile_command = commands.Compile(self)
         self.setup_command = commands.Setup(self)
         self.loop_command = commands.Loop(self)
+        self.engine = engine.SimulationEngine()
+        self.engine.add_observer(ViewObserver(view))
+        self.recorder = trace.TraceRecorder()
+        self.engine.set_recorder(self.recorder)
+        self.run_recorder = None
+        self.checkpointer = snapshot.Checkpointer()
+        self.engine.set_checkpointer(self.checkpointer)
+        self.profiler = profiler.LineProfiler()
         self.executing = False
+        self.out_of_process = False
+        self.recording = False
+        self.profiling = False
         self.board = False
         self.new = True
 
     def execute(self, option_gamification):
         if not self.board:
-            screen_updater.layer = self.robot_layer
-            screen_updater.view = self.view
+            self.engine.set_layer(self.robot_layer)
             self.view.abort_after()
             self.robot_layer.execute()
             self.console.clear()
+            self.view.show_profile([])
+            self.__start_recording()
             if self.compile_command.execute():
                 if self.setup_command.execute():
                     self.executing = True
@@ -37,9 +74,7 @@ class RobotsController:
                 self.probe_robot(option_gamification)
 
     def drawing_loop(self):
-        screen_updater.refresh()
-        if not self.view.keys_used:
-            self.loop_command.execute()
+        self.loop_command.execute()
         self.view.identifier = self.view.after(10, self.drawing_loop)
 
     def stop(self):
@@ -47,9 +82,130 @@ class RobotsController:
         self.compile_command.reboot()
         self.setup_command.reboot()
         self.loop_command.reboot()
+        self.engine.stop_process()
+        if self.run_recorder is not None:
+            self.run_recorder.finish()
+        self.__show_profile()
         self.robot_layer.stop()
         self.view.abort_after()
 
+    def set_time_scale(self, option):
+        """
+        Changes how fast the simulation goes
+        :param option: Selected speed (x1: 0, x4: 1, x16: 2, as fast as possible: 3)
+        :return: None
+        """
+        self.engine.set_time_scale(engine.TIME_SCALES[option])
+
+    def set_out_of_process(self, out_of_process):
+        """
+        Chooses whether the sketches run in a child process, so a sketch
+        that never returns cannot block the GUI. It is used from the next
+        execution on
+        :param out_of_process: True to run them in a child process
+        :return: None
+        """
+        self.out_of_process = out_of_process
+
+    def set_recording(self, recording):
+        """
+        Chooses whether the executions are recorded, to replay them
+        later (see simulation.replay). It is used from the next
+        execution on, and only when the sketch does not run in a child
+        process
+        :param recording: True to record them
+        :return: None
+        """
+        self.recording = recording
+
+    def set_profiling(self, profiling):
+        """
+        Chooses whether the lines of the sketch are counted and timed.
+        It is used from the next execution on, and when the execution
+        stops the editor shows the time of every line
+        :param profiling: True to profile the lines
+        :return: None
+        """
+        self.profiling = profiling
+        self.engine.set_profiler(self.profiler if profiling else None)
+
+    def __show_profile(self):
+        """
+        Shows the time of every line of the sketch, if it has been profiled
+        :return: None
+        """
+        lines = self.profiler.lines() if self.engine.profiler is not None else []
+        if len(lines) > 0:
+            self.view.show_profile(lines)
+            for message in self.profiler.report():
+                self.console.write_output(message + "\n")
+            self.profiler.clear()
+
+    def save_recording(self, path):
+        """
+        Saves the recording of the last execution
+        :param path: Path of the recording
+        :return: None
+        """
+        if self.run_recorder is None:
+            raise replay.ReplayError("No se ha grabado ninguna ejecución")
+        self.run_recorder.save(path)
+
+    def save_snapshot(self, path):
+        """
+        Saves the last snapshot taken of the execution (one is taken
+        every few seconds of simulated time)
+        :param path: Path of the snapshot
+        :return: None
+        """
+        last = self.checkpointer.last()
+        if last is None:
+            raise snapshot.SnapshotError("Todavía no se ha tomado ninguna instantánea")
+        last.save(path)
+
+    def restore_snapshot(self, path):
+        """
+        Goes on with an execution from a snapshot, with the code of the
+        editor. The execution is not recorded
+        :param path: Path of the snapshot
+        :return: None
+        """
+        last = snapshot.Snapshot.load(path)
+        last.check(self.robot_layer)
+        self.engine.set_layer(self.robot_layer)
+        self.view.abort_after()
+        self.robot_layer.execute()
+        self.console.clear()
+        if self.run_recorder is not None:
+            self.run_recorder.finish()
+        self.engine.set_run_log(None)
+        if self.compile_command.execute():
+            self.engine.restore(last, self.compile_command.sketch, self.console)
+            self.setup_command.ready = True
+            self.executing = True
+            self.drawing_loop()
+
+    def __start_recording(self):
+        """
+        Starts recording the execution, if it has to be recorded
+        :return: None
+        """
+        if self.run_recorder is not None:
+            self.run_recorder.finish()
+        if self.recording and not self.out_of_process:
+            self.run_recorder = replay.RunRecorder(self.get_code())
+            self.engine.set_run_log(self.run_recorder)
+        else:
+            self.engine.set_run_log(None)
+
+    def export_trace(self, path):
+        """
+        Saves the signals of the pins recorded in the last execution
+        :param path: Path of the VCD file
+        :return: None
+        """
+        self.recorder.export_vcd(path)
+
     def zoom_in(self):
         self.robot_layer.zoom_in()
         self.view.change_zoom_label(self.robot_layer.drawing.zoom_percentage())
@@ -132,14 +288,13 @@ class RobotsController:
 
     def send_input(self, text):
         self.console.input(text)
+        if self.run_recorder is not None:
+            self.run_recorder.serial_input(text)
 
     def update_joystick(self, elem, value):
-        if elem == "dx":
-            self.robot_layer.robot.joystick.dx = value
-        elif elem == "dy":
-            self.robot_layer.robot.joystick.dy = value
-        elif elem == "button":
-            self.robot_layer.robot.joystick.value = value
+        self.robot_layer.robot.move_joystick(elem, value)
+        if self.run_recorder is not None:
+            self.run_recorder.joystick(elem, value)
 
     def filter_console(self, options):
         messages = []
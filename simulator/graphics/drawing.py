@@ -5,6 +5,8 @@ import robot_components.robots as rbts
 import subprocess
 import os
 import robot_components.robots as robots
+import graphics.image_cache as image_cache
+import graphics.raster as raster
 
 from pathlib import Path
 
@@ -17,7 +19,7 @@ class Drawing:
         """
         self.canvas = None
         self.robot = None
-        self.images = {}
+        self.image_cache = image_cache.ImageCache()
         self.canvas_images = {}
         self.scale = 0.2
         self.component = 0
@@ -37,10 +39,13 @@ class Drawing:
         self.component_to_attach_y = 0
         self.board = None
         self.points = 10
+        self.rendering = True
+        self.pending = {}
 
     def set_canvas(self, canvas: tk.Canvas):
         """
-        Sets the canvas in which the drawing is going to be done
+        Sets the canvas in which the drawing is going to be done.
+        Without a canvas (a headless simulation) nothing is drawn
         Arguments:
             canvas: the canvas
         """
@@ -72,12 +77,34 @@ class Drawing:
     def set_robot(self, robot):
         self.robot = robot
 
+    def set_rendering(self, rendering):
+        """
+        Turns the drawing on or off. While it is off, the changes of the
+        images are kept (only the last one of every image) and they are
+        drawn when it is turned on again
+        Arguments:
+            rendering: True to draw
+        """
+        if rendering and not self.rendering:
+            self.rendering = True
+            pending = self.pending
+            self.pending = {}
+            for group, (redraw, position) in pending.items():
+                if redraw is not None:
+                    redraw()
+                if position is not None:
+                    self.move_image(group, position[0], position[1])
+        self.rendering = rendering
+
     def empty_drawing(self):
         """
         Deletes all elements from the drawing
         """
+        if self.canvas is None:
+            return
         self.canvas.delete('all')
         self.canvas_images = {}
+        self.pending = {}
         self.wires = []
         self.buttons = []
 
@@ -85,14 +112,16 @@ class Drawing:
         """
         Deletes all the elements that have to be zoomed
         """
-        self.canvas.delete('actuator', 'button_left', 'button_right', 'block', 'arduinoBoard')
-        self.canvas.delete('robot', 'circuit', 'obstacle', 'wire',
-                           'light_1', 'light_2', 'light_3', 'light_4')
-        self.canvas.delete('prueba')
+        if self.canvas is None:
+            return
+        self.__delete('actuator', 'button_left', 'button_right', 'block', 'arduinoBoard')
+        self.__delete('robot', 'circuit', 'obstacle', 'wire',
+                      'light_1', 'light_2', 'light_3', 'light_4')
+        self.__delete('prueba')
         for component in self.components:
-            self.canvas.delete(component["group"])
+            self.__delete(component["group"])
         for button in self.buttons:
-            self.canvas.delete(button["group"])
+            self.__delete(button["group"])
 
     def draw_image(self, element, group):
         """
@@ -103,22 +132,29 @@ class Drawing:
             group: the tag where the image is going to
             be added to
         """
-        image = self.__open_image(element["image"], group)
+        if self.canvas is None:
+            return
+        image = self.image_cache.get(element["image"], 0, self.scale)
         return self.__add_to_canvas(element["x"], element["y"], image, group)
 
     def redraw_image(self, element, group):
         """
-        Redraws an already existing image
+        Redraws an already existing image. If it is on the canvas, its
+        item is kept and only its image and coords change
         Arguments:
             element: a dict whose content is the x and y
             coordinates and the image (as Image instance)
             group: the tag where the image is going to
             be added to
         """
-        self.canvas.delete(group)
-        del self.canvas_images[group]
-        image = self.__open_image(element["image"], group)
-        self.__add_to_canvas(element["x"], element["y"], image, group)
+        if self.canvas is None:
+            return
+        if not self.rendering:
+            element = dict(element)
+            self.pending[group] = (lambda: self.redraw_image(element, group), None)
+            return
+        image = self.image_cache.get(element["image"], 0, self.scale)
+        self.__update_on_canvas(element["x"], element["y"], image, group)
 
     def move_image(self, group, x, y):
         """
@@ -128,6 +164,12 @@ class Drawing:
             x: the x differential
             y: the y differential
         """
+        if self.canvas is None:
+            return
+        if not self.rendering:
+            redraw = self.pending.get(group, (None, None))[0]
+            self.pending[group] = (redraw, (x, y))
+            return
         current_x = self.canvas_images[group]["x"]
         current_y = self.canvas_images[group]["y"]
         scale_x = int(x * self.scale)
@@ -140,18 +182,23 @@ class Drawing:
 
     def rotate_image(self, element, angle, group):
         """
-        Rotates a image by an angle
+        Rotates a image by an angle. The rotated images are kept in the
+        image cache, so if the image is already on the canvas, only the
+        image of its item changes
         Arguments:
             element: a dict whose elements are the x and
             y coordinates and the image (as str path)
-            angle: the differential of the angle
+            angle: the angle of the image
             group: the group of the image(s)
         """
-        self.canvas.delete(group)
-        image = self.__open_image(element["image"], group)
-        rotated_img = self.images[element["image"]
-        ] = image.rotate(angle, expand=True)
-        self.__add_to_canvas(element["x"], element["y"], rotated_img, group)
+        if self.canvas is None:
+            return
+        if not self.rendering:
+            element = dict(element)
+            self.pending[group] = (lambda: self.rotate_image(element, angle, group), None)
+            return
+        sprite = self.image_cache.get(element["image"], angle, self.scale)
+        self.__update_on_canvas(element["x"], element["y"], sprite, group)
 
     def draw_rectangle(self, form: dict):
         """
@@ -161,6 +208,8 @@ class Drawing:
             y coordinates, the width and height of the
             rectangle and the color and group (tag of tkinter)
         """
+        if self.canvas is None:
+            return
         x = int(form["x"] * self.scale)
         y = int(form["y"] * self.scale) + self.hud_h
         width = int(form["width"] * self.scale)
@@ -170,6 +219,38 @@ class Drawing:
         self.canvas.create_rectangle(
             x, y, x + width, y + height, fill=color, tags=group)
 
+    def draw_raster(self, shapes: raster.Raster, group):
+        """
+        Draws the shapes of a raster as a single image, rendered once
+        per zoom and kept in the image cache. If the image would be too
+        big, the shapes are drawn as shapes of the canvas
+        Arguments:
+            shapes: the raster
+            group: the group (tag of tkinter) of the image
+        """
+        if self.canvas is None:
+            return
+        key = (shapes, self.scale)
+        entry = self.image_cache.find(key)
+        if entry is None:
+            if shapes.get_pixels(self.scale) > raster.MAX_PIXELS:
+                shapes.draw(self)
+                return
+            rendered = shapes.render(self.scale)
+            if rendered is None:
+                return
+            image, x, y = rendered
+            entry = (ImageTk.PhotoImage(image), x, y)
+            self.image_cache.put(key, entry, image.width * image.height * 4)
+        image, x, y = entry
+        item = self.canvas.create_image(x, y + self.hud_h, image=image, anchor="nw", tags=group)
+        self.canvas_images[group] = {
+            "x": x,
+            "y": y + self.hud_h,
+            "image": image,
+            "item": item
+        }
+
     def draw_part_wire(self, x, y):
         if self.component_to_attach is not None:
             self.draw_wire(x + self.dx, y + self.dy, self.component_to_attach_x + self.dx,
@@ -207,6 +288,8 @@ class Drawing:
             the arc, the width of the arc, the angle of the arc
             and the group (tag of tkinter)
         """
+        if self.canvas is None:
+            return
         x = int(form["x"] * self.scale)
         y = int(form["y"] * self.scale) + self.hud_h
         width = int(form["width"] * self.scale)
@@ -261,49 +344,70 @@ class Drawing:
         Updates the size of the canvas according
         to the scale and the size of it
         """
+        if self.canvas is None:
+            return
         w = self.width * self.scale
         h = self.height * self.scale
         self.canvas.configure(scrollregion=(0, 0, w, h))
 
-    def __add_to_canvas(self, x, y, image: Image, group):
+    def __add_to_canvas(self, x, y, image: ImageTk.PhotoImage, group):
         """
         Adds an image to the canvas
         Arguments:
             x: the x coordinate of the image
             y: the y coordinate of the image
-            image: the image to add (as Image instance)
+            image: the image to add, at the current zoom (as
+            PhotoImage instance)
             group: the group (tag of tkinter)
         """
-        width = int(image.width * self.scale)
-        height = int(image.height * self.scale)
-        res_img = image.resize((width, height), Image.LANCZOS)
         scale_x = x * self.scale
         scale_y = y * self.scale + self.hud_h
+        item = self.canvas.create_image(
+            scale_x, scale_y, image=image, tags=group)
         self.canvas_images[group] = {
             "x": scale_x,
             "y": scale_y,
-            "image": ImageTk.PhotoImage(res_img)
-        }
-        return self.canvas.create_image(
-            scale_x, scale_y, image=self.canvas_images[group]["image"], tags=group)
-
-    def __open_image(self, image_path, group):
-        image = None
-        if group not in self.images:
-            image = self.__get_image(image_path, group)
-        elif not self.images[group]["path"] == image_path:
-            image = self.__get_image(image_path, group)
-        else:
-            image = self.images[group]["image"]
-        return image
-
-    def __get_image(self, image_path, group):
-        image = Image.open(image_path)
-        self.images[group] = {
             "image": image,
-            "path": image_path
+            "item": item
         }
-        return image
+        return item
+
+    def __update_on_canvas(self, x, y, image: ImageTk.PhotoImage, group):
+        """
+        Changes the image of a group and its coords, keeping its item.
+        The item is only created if the group is not on the canvas
+        Arguments:
+            x: the x coordinate of the image
+            y: the y coordinate of the image
+            image: the new image, at the current zoom (as PhotoImage
+            instance)
+            group: the group (tag of tkinter)
+        Returns:
+            the item of the image
+        """
+        current = self.canvas_images.get(group)
+        if current is None or "item" not in current:
+            self.canvas.delete(group)
+            return self.__add_to_canvas(x, y, image, group)
+        scale_x = x * self.scale
+        scale_y = y * self.scale + self.hud_h
+        self.canvas.itemconfigure(current["item"], image=image)
+        self.canvas.coords(current["item"], scale_x, scale_y)
+        current["x"] = scale_x
+        current["y"] = scale_y
+        # The image is kept while it is shown, even if it leaves the cache
+        current["image"] = image
+        return current["item"]
+
+    def __delete(self, *groups):
+        """
+        Deletes groups from the canvas, and forgets their items
+        Arguments:
+            groups: the groups (tags of tkinter)
+        """
+        self.canvas.delete(*groups)
+        for group in groups:
+            self.canvas_images.pop(group, None)
 
     def draw_component(self, element, x, y):
         x_total = (x + self.dx) / self.scale
@@ -329,8 +433,7 @@ class Drawing:
         code = False
         circuit = False
 
-        if not user_code.replace(" ", "").replace("\n", "").replace("\t", "") == \
-               robot_code.replace(" ", "").replace("\n", "").replace("\t", ""):
+        if not rbts.same_code(user_code, robot_code):
             sol_code = tk.Label(self.probe_window, text="El código no es correcto",
                                 font=("Arial", 15), background="#006468")
             self.decrement_points(1)
@@ -4,12 +4,16 @@ import tkinter.messagebox as messagebox
 from tkinter.filedialog import askopenfilename, asksaveasfilename
 import tkinter.ttk as ttk
 import graphics.controller as controller
+import simulation.replay as replay
+import simulation.snapshot as snapshot
 import files.files_reader as files
 import subprocess
 import robot_components.robots as robots
 
 DARK_BLUE = "#006468"
 BLUE = "#17a1a5"
+# Backgrounds of the lines of the editor, from the fastest to the slowest
+HEAT_COLORS = ["#FFF4C2", "#FFE08A", "#FFC04D", "#FF8F3D", "#F2542D"]
 
 
 class MainApplication(tk.Tk):
@@ -111,6 +115,21 @@ class MainApplication(tk.Tk):
         if file != '':
             self.file_manager.save(file, content)
 
+    def export_trace(self, event=None):
+        file = asksaveasfilename(defaultextension=".vcd", filetypes=[
+            ("Value Change Dump", ".vcd")])
+        if file != '':
+            self.controller.export_trace(file)
+
+    def save_recording(self, event=None):
+        file = asksaveasfilename(defaultextension=".srun", filetypes=[
+            ("Grabación de la ejecución", ".srun")])
+        if file != '':
+            try:
+                self.controller.save_recording(file)
+            except replay.ReplayError as e:
+                messagebox.showerror("Grabación", str(e))
+
     def get_code(self):
         return self.editor_frame.text.get("1.0", tk.END)
 
@@ -149,6 +168,39 @@ class MainApplication(tk.Tk):
         self.controller.configure_layer(
             self.drawing_frame.canvas, self.drawing_frame.hud_canvas)
 
+    def change_speed(self, event):
+        self.controller.set_time_scale(self.selector_bar.speed_selector.current())
+
+    def save_snapshot(self, event=None):
+        file = asksaveasfilename(defaultextension=".snap", filetypes=[
+            ("Instantánea de la simulación", ".snap")])
+        if file != '':
+            try:
+                self.controller.save_snapshot(file)
+            except snapshot.SnapshotError as e:
+                messagebox.showerror("Instantánea", str(e))
+
+    def restore_snapshot(self, event=None):
+        if self.controller.board:
+            messagebox.showerror("Instantánea", "La placa Arduino no tiene instantáneas")
+            return
+        file = askopenfilename(filetypes=[("Instantánea de la simulación", ".snap")])
+        if file != '':
+            self.drawing_frame.canvas.focus_force()
+            try:
+                self.controller.restore_snapshot(file)
+            except (OSError, snapshot.SnapshotError) as e:
+                messagebox.showerror("Instantánea", str(e))
+
+    def change_process_mode(self, out_of_process):
+        self.controller.set_out_of_process(out_of_process)
+
+    def change_recording(self, recording):
+        self.controller.set_recording(recording)
+
+    def change_profiling(self, profiling):
+        self.controller.set_profiling(profiling)
+
     def change_track(self, event):
         self.controller.stop()
         self.__update_track()
@@ -255,6 +307,15 @@ class MainApplication(tk.Tk):
         else:
             self.drawing_frame.hide_hud()
 
+    def show_profile(self, lines):
+        """
+        Shows in the editor how many times every line has run and its time
+        :param lines: the lines, as tuples of the line, its count and its
+        time in seconds. If empty, the previous ones are hidden
+        :return: None
+        """
+        self.editor_frame.show_heatmap(lines)
+
     def show_keys_movements(self, show):
         """
         Show or hide the checkbox Keys Movement from the Hub
@@ -680,6 +741,26 @@ class MenuBar(tk.Menu):
             label="Ejecutar", command=application.execute, accelerator="F5")
         exec_menu.add_command(
             label="Detener", command=application.stop, accelerator="Ctrl+F5")
+        self.out_of_process = tk.BooleanVar(value=False)
+        exec_menu.add_checkbutton(
+            label="Ejecutar en un proceso aparte", variable=self.out_of_process,
+            command=lambda: application.change_process_mode(self.out_of_process.get()))
+        exec_menu.add_command(
+            label="Exportar señales (VCD)", command=application.export_trace)
+        self.recording = tk.BooleanVar(value=False)
+        exec_menu.add_checkbutton(
+            label="Grabar la ejecución", variable=self.recording,
+            command=lambda: application.change_recording(self.recording.get()))
+        exec_menu.add_command(
+            label="Guardar grabación...", command=application.save_recording)
+        self.profiling = tk.BooleanVar(value=False)
+        exec_menu.add_checkbutton(
+            label="Medir el tiempo de cada línea", variable=self.profiling,
+            command=lambda: application.change_profiling(self.profiling.get()))
+        exec_menu.add_command(
+            label="Guardar instantánea...", command=application.save_snapshot)
+        exec_menu.add_command(
+            label="Continuar desde una instantánea...", command=application.restore_snapshot)
         exec_menu.add_separator()
         exec_menu.add_command(
             label="Ampliar", command=lambda event: application.zoom_in(), accelerator="Ctrl++")
@@ -1004,6 +1085,25 @@ class EditorFrame(tk.Frame):
         self.rowconfigure(0, weight=1)
         self.columnconfigure(1, weight=1)
 
+        for i in range(len(HEAT_COLORS)):
+            self.text.tag_configure("heat_{}".format(i), background=HEAT_COLORS[i])
+
+    def show_heatmap(self, lines):
+        """
+        Colours the background of the lines by their time, and shows how
+        many times they have run and their time next to their numbers
+        Arguments:
+            lines: the lines, as tuples of the line, its count and its
+            time in seconds. If empty, the heatmap is hidden
+        """
+        for i in range(len(HEAT_COLORS)):
+            self.text.tag_remove("heat_{}".format(i), "1.0", tk.END)
+        longest = max([line[2] for line in lines], default=0)
+        for number, hits, seconds in lines:
+            level = int(seconds / longest * (len(HEAT_COLORS) - 1)) if longest > 0 else 0
+            self.text.tag_add("heat_{}".format(level), "{}.0".format(number), "{}.0+1line".format(number))
+        self.line_bar.set_profile({line[0]: line[1:] for line in lines})
+
     def create_file(self):
         self.text.delete("1.0", tk.END)
         self.text.insert(tk.END, "void setup(){\n")
@@ -1203,16 +1303,32 @@ class EditorFrame(tk.Frame):
             return keywords
 
     class LineNumberBar(tk.Canvas):
+        WIDTH = 30
+        PROFILE_WIDTH = 130
 
         def __init__(self, *args, **kwargs):
             tk.Canvas.__init__(self, *args, **kwargs)
             self.editor = None
+            self.profile = {}
 
         def attach(self, editor):
             self.editor = editor
 
+        def set_profile(self, profile):
+            """
+            Sets the counts and times shown next to the numbers of the
+            lines, widening the bar to fit them
+            Arguments:
+                profile: the count and the time in seconds, by line. If
+                empty, only the numbers are shown
+            """
+            self.profile = profile
+            self.config(width=self.PROFILE_WIDTH if profile else self.WIDTH)
+            self.show_lines()
+
         def show_lines(self, *args):
             self.delete("all")
+            right = int(self["width"]) - 2
 
             i = self.editor.index("@0,0")
             while True:
@@ -1220,10 +1336,14 @@ class EditorFrame(tk.Frame):
                 if dline is None:
                     break
                 line = str(i).split(".")[0]
-                x = 28 - 9 * len(line)
+                x = right - 9 * len(line)
                 y = dline[1]
                 self.create_text(x, y, anchor="nw", text=line,
                                  fill="white", font=('consolas', 12, 'bold'))
+                if int(line) in self.profile:
+                    hits, seconds = self.profile[int(line)]
+                    self.create_text(4, y + 2, anchor="nw", text="{}x {:.1f} ms".format(hits, seconds * 1000),
+                                     fill=DARK_BLUE, font=('consolas', 9))
                 i = self.editor.index("%s+1line" % i)
 
 
@@ -1490,6 +1610,9 @@ class SelectorBar(tk.Frame):
             "Consolas", 13), underline=1)
         self.track_selector = ttk.Combobox(self, state="readonly")
         self.gamification_option_selector = ttk.Combobox(self, state="readonly")
+        self.lb_speed = tk.Label(self, text="Velocidad:", bg=DARK_BLUE, fg="white", font=(
+            "Consolas", 13), underline=0)
+        self.speed_selector = ttk.Combobox(self, state="readonly", width=8)
 
         self.robot_selector['values'] = ["Robot móvil (2 infrarrojos)",
                                          "Robot móvil (3 infrarrojos)",
@@ -1505,6 +1628,8 @@ class SelectorBar(tk.Frame):
         self.gamification_option_selector['values'] = [
             "Libre", "Desafío 1", "Desafío 2", "Desafío 3", "Desafío 4", "Desafío 5", "Desafío 6"]
         self.gamification_option_selector.current(0)
+        self.speed_selector['values'] = ["x1", "x4", "x16", "Máxima"]
+        self.speed_selector.current(0)
 
         self.robot_selector.bind(
             "<<ComboboxSelected>>", application.change_robot)
@@ -1512,14 +1637,19 @@ class SelectorBar(tk.Frame):
             "<<ComboboxSelected>>", application.change_track)
         self.gamification_option_selector.bind(
             "<<ComboboxSelected>>", application.change_gamification_option)
+        self.speed_selector.bind(
+            "<<ComboboxSelected>>", application.change_speed)
         application.bind("<Alt-r>", lambda event: self.robot_selector.focus())
         application.bind("<Alt-i>", lambda event: self.track_selector.focus())
         application.bind("<Alt-o>", lambda event: self.gamification_option_selector.focus())
+        application.bind("<Alt-v>", lambda event: self.speed_selector.focus())
 
         self.lb_robot.grid(row=0, column=0)
         self.robot_selector.grid(row=0, column=1, padx=(5, 15))
         self.lb_track.grid(row=0, column=2)
         self.track_selector.grid(row=0, column=3, padx=(5, 10))
+        self.lb_speed.grid(row=0, column=4)
+        self.speed_selector.grid(row=0, column=5, padx=(5, 10))
 
     def hide_circuit_selector(self):
         if self.lb_track.winfo_ismapped():
@@ -2,6 +2,30 @@ import tkinter as tk
 import tkinter.ttk as ttk
 from PIL import Image, ImageTk
 
+# The speed of the arrows: slow below SLOW_VELOCITY, full above
+# FULL_VELOCITY and mid between them
+SLOW_VELOCITY = 100
+FULL_VELOCITY = 200
+ARROW_SCALE = 0.5
+
+
+def get_arrow(vel):
+    """
+    Gets the arrow that shows a velocity
+    Arguments:
+        vel: the velocity
+    Returns:
+        the speed of the arrow ("slow", "mid" or "full") and True if it
+        goes backwards
+    """
+    if abs(vel) < SLOW_VELOCITY:
+        speed = "slow"
+    elif abs(vel) > FULL_VELOCITY:
+        speed = "full"
+    else:
+        speed = "mid"
+    return speed, vel < 0
+
 
 class HUD:
 
@@ -11,7 +35,13 @@ class HUD:
         """
         self.canvas: tk.Canvas = None
         self.drawing = None
+        self.rendering = True
         self.draw_wire = False
+        # The last data shown, by kind, so it is only drawn when it changes
+        self.shown = {}
+        # The items of the images shown, by key, so their images are
+        # changed instead of creating them again
+        self.items = {}
 
     def set_canvas(self, canvas: tk.Canvas):
         """
@@ -21,12 +51,74 @@ class HUD:
         """
         self.canvas = canvas
         self.canvas.delete('all')
+        self.shown.clear()
+        self.items.clear()
         self.set_text()
 
     def reboot(self):
+        if self.canvas is None:
+            return
         self.canvas.delete('all')
+        self.shown.clear()
+        self.items.clear()
         self.set_text()
 
+    def _must_show(self, kind, data):
+        """
+        Checks if some data has to be drawn: there is a canvas, the HUD
+        is rendering and the data is not the one already shown
+        Arguments:
+            kind: the kind of data (e.g. "wheel")
+            data: the data
+        Returns:
+            True if it has to be drawn
+        """
+        if self.canvas is None or not self.rendering or self.shown.get(kind) == data:
+            return False
+        self.shown[kind] = data
+        return True
+
+    def _show_image(self, key, x, y, image, tags):
+        """
+        Shows an image, in the item that was created for its key the
+        first time
+        Arguments:
+            key: the key of the image (e.g. the index of a wheel)
+            x: the x coordinate of the image
+            y: the y coordinate of the image
+            image: the image (as PhotoImage instance), which must be kept
+            tags: the tags of the item
+        """
+        item = self.items.get(key)
+        if item is None:
+            self.items[key] = self.canvas.create_image(x, y, image=image, tags=tags)
+        else:
+            self.canvas.itemconfigure(item, image=image)
+
+    def _make_arrows(self, forward, backward):
+        """
+        Makes the arrows of all the speeds, resized and rotated, so they
+        are only made once per canvas. The HUD has the images of the
+        arrows in img_ff, img_mf and img_sf
+        Arguments:
+            forward: the angle of the arrows that go forwards
+            backward: the angle of the arrows that go backwards
+        Returns:
+            the arrows (as PhotoImage instances), by speed and by True if
+            they go backwards (see get_arrow)
+        """
+        w = int(self.img_ff.width * ARROW_SCALE)
+        h = int(self.img_ff.height * ARROW_SCALE)
+        arrows = {}
+        for speed, image in (("slow", self.img_sf), ("mid", self.img_mf), ("full", self.img_ff)):
+            resized = image.resize((w, h), Image.LANCZOS)
+            for backwards, angle in ((False, forward), (True, backward)):
+                if angle != 0:
+                    arrows[(speed, backwards)] = ImageTk.PhotoImage(resized.rotate(angle, expand=True))
+                else:
+                    arrows[(speed, backwards)] = ImageTk.PhotoImage(resized)
+        return arrows
+
     def set_text(self):
         """
         Shows the text of the data that the HUD is going to
@@ -45,6 +137,11 @@ class MobileHUD(HUD):
         self.img_ff = Image.open('assets/full-speed.png')
         self.img_mf = Image.open('assets/mid-speed.png')
         self.img_sf = Image.open('assets/slow-speed.png')
+        self.arrows = None
+
+    def set_canvas(self, canvas: tk.Canvas):
+        super().set_canvas(canvas)
+        self.arrows = self._make_arrows(0, 180)
 
     def set_text(self):
         """
@@ -62,46 +159,18 @@ class MobileHUD(HUD):
             "Consolas", 13), anchor="w", fill="white")
 
     def set_wheel(self, vels):
-        """
-        Method that gets all the velocities and calls display_wheels
-        for each velocity, so it can represent the wheel's direction
-        and velocity
-        """
-        self.canvas.delete('arr_img')
-        i = 0
-        self.imgs = []
-        for vel in vels:
-            self.__display_wheels(i, vel)
-            i += 1
-
-    def __display_wheels(self, i, vel):
         """
         Displays arrows in the direction that the wheels are moving
         and with a color that represents their velocity (blue fast,
-        yellow medium, red slow).
+        yellow medium, red slow). The arrow of a wheel is only changed
+        when its speed or direction changes
         Arguments:
-            i: the index of the wheel
-            vel: the velocity of the wheel
-        """
-        w = int(self.img_ff.width * 0.5)
-        h = int(self.img_ff.height * 0.5)
-        self.ff = self.img_ff.resize((w, h), Image.LANCZOS)
-        self.mf = self.img_mf.resize((w, h), Image.LANCZOS)
-        self.sf = self.img_sf.resize((w, h), Image.LANCZOS)
-        if abs(vel) < 100:
-            if vel < 0:
-                self.sf = self.sf.rotate(180, expand=True)
-            self.imgs.append(ImageTk.PhotoImage(self.sf))
-        elif abs(vel) > 200:
-            if vel < 0:
-                self.ff = self.ff.rotate(180, expand=True)
-            self.imgs.append(ImageTk.PhotoImage(self.ff))
-        else:
-            if vel < 0:
-                self.mf = self.mf.rotate(180, expand=True)
-            self.imgs.append(ImageTk.PhotoImage(self.mf))
-        y = 25 + (25 * i)
-        self.canvas.create_image(200, y, image=self.imgs[i], tags="arr_img")
+            vels: the velocities of the wheels
+        """
+        for i in range(len(vels)):
+            arrow = get_arrow(vels[i])
+            if self._must_show(("wheel", i), arrow):
+                self._show_image(("wheel", i), 200, 25 + (25 * i), self.arrows[arrow], "arr_img")
 
     def set_circuit(self, measurements):
         """
@@ -110,6 +179,8 @@ class MobileHUD(HUD):
             measurements: a list with the measurements of the
             light sensors. True if on track, False if else
         """
+        if not self._must_show("circuit", list(measurements)):
+            return
         self.canvas.delete("cir")
         text = ""
         for i in range(0, len(measurements)):
@@ -129,6 +200,8 @@ class MobileHUD(HUD):
         Arguments:
             dists: a list with the distances
         """
+        if not self._must_show("obstacle", list(dists)):
+            return
         self.canvas.delete("obs")
         text = ""
         for i in range(0, len(dists)):
@@ -156,6 +229,11 @@ class ActuatorHUD(HUD):
         self.img_ff = Image.open('assets/full-speed.png')
         self.img_mf = Image.open('assets/mid-speed.png')
         self.img_sf = Image.open('assets/slow-speed.png')
+        self.arrows = None
+
+    def set_canvas(self, canvas: tk.Canvas):
+        super().set_canvas(canvas)
+        self.arrows = self._make_arrows(-90, 90)
 
     def set_text(self):
         """
@@ -172,6 +250,8 @@ class ActuatorHUD(HUD):
         """
         Parses the button sates to data to show on the HUD
         """
+        if not self._must_show("pressed", list(but_states)):
+            return
         self.canvas.delete('but_text')
         for i in range(0, len(but_states)):
             text = "No pulsado"
@@ -185,31 +265,10 @@ class ActuatorHUD(HUD):
         Draws the direction arrows with the information
         of the velocity
         """
-        self.canvas.delete('arr_img')
-        w = int(self.img_ff.width * 0.5)
-        h = int(self.img_ff.height * 0.5)
-        self.ff = self.img_ff.resize((w, h), Image.LANCZOS)
-        self.mf = self.img_mf.resize((w, h), Image.LANCZOS)
-        self.sf = self.img_sf.resize((w, h), Image.LANCZOS)
-        if abs(vel) < 100:
-            if vel < 0:
-                self.sf = self.sf.rotate(90, expand=True)
-            else:
-                self.sf = self.sf.rotate(-90, expand=True)
-            self.img = ImageTk.PhotoImage(self.sf)
-        elif abs(vel) > 200:
-            if vel < 0:
-                self.ff = self.ff.rotate(90, expand=True)
-            else:
-                self.ff = self.ff.rotate(-90, expand=True)
-            self.img = ImageTk.PhotoImage(self.ff)
-        else:
-            if vel < 0:
-                self.mf = self.mf.rotate(90, expand=True)
-            else:
-                self.mf = self.mf.rotate(-90, expand=True)
-            self.img = ImageTk.PhotoImage(self.mf)
-        self.canvas.create_image(250, 25, image=self.img, tags="arr_img")
+        arrow = get_arrow(vel)
+        if not self._must_show("direction", arrow):
+            return
+        self._show_image("direction", 250, 25, self.arrows[arrow], "arr_img")
 
 
 class ArduinoBoardHUD(HUD):
@@ -0,0 +1,114 @@
+"""
+Cache of the images of the drawing, ready to be put on the canvas:
+opened, rotated and resized to a zoom. They are kept under their path,
+rotation and scale, so while an image is kept it is never resampled
+again, e.g. when a light sensor is repainted, when the robot turns to
+an angle it has already had or when the zoom goes back to a scale.
+Other images made for the canvas (e.g. the rendered circuits, see
+graphics.raster) can be kept under their own keys.
+
+The cache is an LRU bounded by the memory of its images (a PhotoImage
+takes 4 bytes per pixel). An image that is evicted while it is on the
+canvas is still kept by the drawing, so it is not lost.
+"""
+
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+MAX_BYTES = 128 * 1024 * 1024
+
+
+class ImageCache:
+
+    def __init__(self, max_bytes=MAX_BYTES):
+        """
+        Constructor for the image cache
+        Arguments:
+            max_bytes: the memory of the images kept, the least recently
+            used ones are evicted when it is exceeded
+        """
+        self.max_bytes = max_bytes
+        self.sources = {}
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, image_path, rotation, scale):
+        """
+        Gets an image rotated and resized
+        Arguments:
+            image_path: the path of the image
+            rotation: the angle of the image, in degrees
+            scale: the scale of the image
+        Returns:
+            the image (as PhotoImage instance)
+        """
+        key = (image_path, rotation % 360, scale)
+        photo = self.find(key)
+        if photo is not None:
+            return photo
+        image = self.open(image_path)
+        if key[1] != 0:
+            image = image.rotate(key[1], expand=True)
+        width = int(image.width * scale)
+        height = int(image.height * scale)
+        photo = ImageTk.PhotoImage(image.resize((width, height), Image.LANCZOS))
+        self.put(key, photo, width * height * 4)
+        return photo
+
+    def find(self, key):
+        """
+        Finds the image kept under a key
+        Arguments:
+            key: the key of the image
+        Returns:
+            the image, None if it is not kept
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, image, size):
+        """
+        Keeps an image under a key, evicting the least recently used
+        ones if the memory is exceeded
+        Arguments:
+            key: the key of the image, which is not kept yet
+            image: the image
+            size: the memory of the image, in bytes
+        """
+        self.entries[key] = (image, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            self.bytes -= self.entries.popitem(last=False)[1][1]
+
+    def open(self, image_path):
+        """
+        Opens an image, only the first time
+        Arguments:
+            image_path: the path of the image
+        Returns:
+            the image (as Image instance)
+        """
+        image = self.sources.get(image_path)
+        if image is None:
+            image = self.sources[image_path] = Image.open(image_path)
+            image.load()
+        return image
+
+    def clear(self):
+        """
+        Forgets all the images
+        """
+        self.sources.clear()
+        self.entries.clear()
+        self.bytes = 0
+
+    def __len__(self):
+        return len(self.entries)
@@ -19,6 +19,9 @@ class Layer:
         self._zoom_percentage()
         self.is_drawing = False
         self.is_board = False
+        # Something has changed since the last frame, so it must be drawn
+        # even if the robot does not move
+        self.changed = True
 
         self.rdr = filesr.RobotDataReader()
 
@@ -29,6 +32,7 @@ class Layer:
         self._drawing_config()
         self.robot_drawing.draw()
         self.is_drawing = True
+        self.changed = True
 
     def stop(self):
         """
@@ -37,6 +41,7 @@ class Layer:
         self.drawing.empty_drawing()
         self.hud.reboot()
         self.is_drawing = False
+        self.changed = True
 
     def zoom_in(self):
         """
@@ -63,6 +68,16 @@ class Layer:
         """
         pass
 
+    def set_rendering(self, rendering):
+        """
+        Turns the drawing of the robot and the hud on or off, e.g. to
+        draw only some of the steps of a fast simulation
+        Arguments:
+            rendering: True to draw
+        """
+        self.drawing.set_rendering(rendering)
+        self.hud.rendering = rendering
+
     def set_canvas(self, canvas, hud_canvas):
         """
         Sets the canvas that the drawing and will use
@@ -74,6 +89,39 @@ class Layer:
         self.drawing.set_size(self.robot_drawing.drawing_width,
                               self.robot_drawing.drawing_height)
         self.hud.set_canvas(hud_canvas)
+        self.changed = True
+
+    def get_state(self):
+        """
+        Gets the state of the layer: the one of its robot and of the
+        drawing of the robot
+        Returns:
+            the state, as a dict of plain values
+        """
+        return {"robot": self.robot.get_state(), "drawing": self.robot_drawing.get_state()}
+
+    def set_state(self, state):
+        """
+        Restores the state of the layer, drawing the robot again if it
+        is being drawn
+        Arguments:
+            state: the state, as given by get_state
+        """
+        self.robot.set_state(state["robot"])
+        self.robot_drawing.set_state(state["drawing"])
+        if self.is_drawing:
+            self._zoom_redraw()
+        self.changed = True
+
+    def _element_changed(self, element, value):
+        """
+        Called when the value of an element of the robot that the layer
+        has subscribed to changes
+        Arguments:
+            element: the element
+            value: its new value
+        """
+        self.changed = True
 
     def _zoom_config(self):
         """
@@ -140,7 +188,9 @@ class MobileRobotLayer(Layer):
         self.is_rotating = False
         self.is_moving = False
         self.circuit = None
+        self.circuit_opt = None
         self.obstacle = None
+        self.__subscribe()
 
     def move(self, using_keys, move_WASD):
         """
@@ -153,6 +203,9 @@ class MobileRobotLayer(Layer):
         else:
             v, da = self.__move_code()
 
+        if v == 0 and da == 0 and not self.changed:
+            # Idle: neither the robot nor the servos have changed
+            return
         future_p = self.robot_drawing.predict_movement(v)
         if (
                 v == 0
@@ -170,6 +223,8 @@ class MobileRobotLayer(Layer):
         if not self.is_moving:
             self.robot_drawing.change_angle(da)
         self.__hud_velocity()
+        # A frame that moves (or is not drawn) is followed by another one
+        self.changed = v != 0 or da != 0 or not self.hud.rendering
 
         # Overlapping check
         if self.circuit is not None:
@@ -183,6 +238,7 @@ class MobileRobotLayer(Layer):
         Arguments:
             circuit_opt: the number of the chosen circuit
         """
+        self.circuit_opt = circuit_opt
         circuit_name = self.__parse_circuit_opt(circuit_opt)
         map_tuple = self.rdr.parse_circuit(circuit_name)
         straights = map_tuple[0]
@@ -201,6 +257,52 @@ class MobileRobotLayer(Layer):
         self.robot = robots.MobileRobot(self.n_sens, self.robot_data)
         self.robot_drawing = robot_drawings.MobileRobotDrawing(
             self.drawing, self.n_sens)
+        self.__subscribe()
+
+    def get_state(self):
+        state = super().get_state()
+        state["is_moving"] = self.is_moving
+        state["is_rotating"] = self.is_rotating
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        self.is_moving = state["is_moving"]
+        self.is_rotating = state["is_rotating"]
+        self.light_changed = True
+
+    def __subscribe(self):
+        """
+        Subscribes to the changes of the servos, which move the robot,
+        and of the light sensors, which are repainted
+        """
+        self.changed = True
+        self.light_changed = True
+        self.__servo_changed(self.robot.servo_left, self.robot.servo_left.get_value())
+        self.robot.bus.subscribe(self.robot.servo_left, self.__servo_changed)
+        self.robot.bus.subscribe(self.robot.servo_right, self.__servo_changed)
+        for light in self.robot.light_sensors:
+            self.robot.bus.subscribe(light, self.__light_changed)
+
+    def __servo_changed(self, servo, value):
+        """
+        Computes the speed of the wheels when a servo is written
+        Arguments:
+            servo: the servo
+            value: the value written
+        """
+        self.wheels = (int((self.robot.servo_left.get_value() - 90) / 10),
+                       int((self.robot.servo_right.get_value() - 90) / 10))
+        self._element_changed(servo, value)
+
+    def __light_changed(self, light, value):
+        """
+        Marks the light sensors to be repainted when one of them changes
+        Arguments:
+            light: the light sensor
+            value: its new value
+        """
+        self.light_changed = True
 
     def __move_keys(self, movement):
         """
@@ -237,10 +339,7 @@ class MobileRobotLayer(Layer):
         """
         v = 0
         da = 0
-        # self.robot.servo_left.value = 0
-        # self.robot.servo_right.value = 0
-        v_i = int((self.robot.servo_left.get_value() - 90) / 10)
-        v_r = int((self.robot.servo_right.get_value() - 90) / 10)
+        v_i, v_r = self.wheels
         rotates = False
         if v_i >= 0 and v_r >= 0:
             if v_i != 0 or v_r != 0:
@@ -335,7 +434,9 @@ class MobileRobotLayer(Layer):
                 measurements.append(False)
                 values.append(0)
         self.robot.set_light_sens_value(values)
-        self.robot_drawing.repaint_light_sensors()
+        if self.light_changed:
+            self.light_changed = False
+            self.robot_drawing.repaint_light_sensors()
         self.hud.set_circuit(measurements)
 
     def __check_obstacle_collision(self, x, y):
@@ -391,10 +492,18 @@ class LinearActuatorLayer(Layer):
         Constuctor for LinearActuatorLayer
         """
         super().__init__()
-        self.hud = huds.ActuatorHUD()
         self.robot_data = self.rdr.parse_robot(3)
+        self.reset_robot()
+
+    def reset_robot(self):
+        """
+        Resets the robot
+        """
+        self.hud = huds.ActuatorHUD()
         self.robot = robots.LinearActuator(self.robot_data)
         self.robot_drawing = robot_drawings.LinearActuatorDrawing(self.drawing)
+        self.robot.bus.subscribe(self.robot.servo, self._element_changed)
+        self.changed = True
 
     def move(self, using_keys, move_WASD):
         """
@@ -407,10 +516,15 @@ class LinearActuatorLayer(Layer):
             v = self.__move_keys(move_WASD)
         else:
             v = self.__move_code()
+        if v == 0 and not self.changed:
+            # Idle: neither the block nor the servo have changed
+            return
         self.robot_drawing.move(v)
         self.hud.set_direction(v * 25)
         self.hud.set_pressed(
             [self.robot_drawing.but_left.pressed, self.robot_drawing.but_right.pressed])
+        # A frame that moves (or is not drawn) is followed by another one
+        self.changed = v != 0 or not self.hud.rendering
 
     def __move_keys(self, movement):
         """
@@ -0,0 +1,127 @@
+"""
+Offscreen drawing of shapes, so many shapes (e.g. the parts of a
+circuit) are shown in the canvas as a single image, rendered once per
+zoom (see Drawing.draw_raster).
+
+A raster has the draw_rectangle and draw_arc methods of the drawing,
+so the shapes draw themselves in it as they do in the drawing, and it
+rounds their coords in the same way, so they look the same. Tk draws
+the line of an arc centered on its ellipse, with its angles measured
+counterclockwise, while PIL draws it inwards and clockwise.
+"""
+
+from math import ceil
+
+from PIL import Image, ImageDraw
+
+# The biggest image rendered, bigger rasters are drawn as shapes of the
+# canvas (a PhotoImage takes 4 bytes per pixel)
+MAX_PIXELS = 16 * 1024 * 1024
+
+RECTANGLE = 0
+ARC = 1
+
+
+class Raster:
+
+    def __init__(self):
+        """
+        Constructor for the raster
+        """
+        self.shapes = []
+
+    def draw_rectangle(self, form: dict):
+        """
+        Adds a rectangle
+        Arguments:
+            form: the rectangle, as given to Drawing.draw_rectangle
+        """
+        self.shapes.append((RECTANGLE, form))
+
+    def draw_arc(self, form: dict):
+        """
+        Adds an arc
+        Arguments:
+            form: the arc, as given to Drawing.draw_arc
+        """
+        self.shapes.append((ARC, form))
+
+    def draw(self, drawing):
+        """
+        Draws the shapes as shapes of a drawing
+        Arguments:
+            drawing: the drawing
+        """
+        for kind, form in self.shapes:
+            if kind == RECTANGLE:
+                drawing.draw_rectangle(form)
+            else:
+                drawing.draw_arc(form)
+
+    def get_bounds(self, scale):
+        """
+        Gets the box of the shapes at a scale
+        Arguments:
+            scale: the scale
+        Returns:
+            the left, top, right and bottom of the box, in pixels, None if
+            there are no shapes
+        """
+        boxes = [self.__get_box(kind, form, scale) for kind, form in self.shapes]
+        if not boxes:
+            return None
+        return (min(box[0] for box in boxes), min(box[1] for box in boxes),
+                max(box[2] for box in boxes), max(box[3] for box in boxes))
+
+    def get_pixels(self, scale):
+        """
+        Returns:
+            the number of pixels of the image of the shapes at a scale
+        """
+        bounds = self.get_bounds(scale)
+        if bounds is None:
+            return 0
+        return (bounds[2] - bounds[0] + 1) * (bounds[3] - bounds[1] + 1)
+
+    def render(self, scale):
+        """
+        Renders the shapes at a scale, on a transparent background
+        Arguments:
+            scale: the scale
+        Returns:
+            the image (as Image instance) and the coordinates of its top
+            left corner in the canvas, None if there are no shapes
+        """
+        bounds = self.get_bounds(scale)
+        if bounds is None:
+            return None
+        left, top = bounds[0], bounds[1]
+        image = Image.new("RGBA", (bounds[2] - left + 1, bounds[3] - top + 1), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(image)
+        for kind, form in self.shapes:
+            x, y, width, height = self.__scale(form, scale)
+            x -= left
+            y -= top
+            if kind == RECTANGLE:
+                draw.rectangle((x, y, x + width, y + height), fill=form["color"])
+                continue
+            track_width = int(form["track_width"] * scale)
+            if track_width <= 0:
+                continue
+            half = track_width / 2
+            draw.arc((x - half, y - half, x + width + half, y + height + half),
+                     -(form["starting_angle"] + form["angle"]), -form["starting_angle"],
+                     fill="black", width=track_width)
+        return image, left, top
+
+    def __get_box(self, kind, form, scale):
+        x, y, width, height = self.__scale(form, scale)
+        if kind == RECTANGLE:
+            return x, y, x + width, y + height
+        half = ceil(int(form["track_width"] * scale) / 2)
+        return x - half, y - half, x + width + half, y + height + half
+
+    @staticmethod
+    def __scale(form, scale):
+        return (int(form["x"] * scale), int(form["y"] * scale),
+                int(form["width"] * scale), int(form["height"] * scale))
@@ -1,7 +1,9 @@
 from math import atan2, sqrt
 from math import cos, pi, sin
 import graphics.drawing as drawing
+import graphics.raster as raster
 import robot_components.boards as boards
+import robot_components.robot_state as robot_state
 
 
 class RobotDrawing:
@@ -45,6 +47,22 @@ class RobotDrawing:
         """
         self.drawing.empty_drawing()
 
+    def get_state(self):
+        """
+        Returns:
+            the state of the drawing (position, angle...) as a dict of
+            plain values
+        """
+        return robot_state.get_attributes(self)
+
+    def set_state(self, state):
+        """
+        Restores the state of the drawing. It is not drawn again
+        Arguments:
+            state: the state, as given by get_state
+        """
+        robot_state.set_attributes(self, state)
+
 
 class LinearActuatorDrawing(RobotDrawing):
 
@@ -144,6 +162,22 @@ class LinearActuatorDrawing(RobotDrawing):
         self.drawing.draw_image(self.but_right.get_image(), "button_right")
         self.drawing.draw_image(self.block.get_image(), "block")
 
+    def get_state(self):
+        state = super().get_state()
+        state["block"] = robot_state.get_attributes(self.block)
+        state["but_left"] = robot_state.get_attributes(self.but_left)
+        state["but_right"] = robot_state.get_attributes(self.but_right)
+        return state
+
+    def set_state(self, state):
+        state = dict(state)
+        robot_state.set_attributes(self.block, state.pop("block"))
+        robot_state.set_attributes(self.but_left, state.pop("but_left"))
+        robot_state.set_attributes(self.but_right, state.pop("but_right"))
+        super().set_state(state)
+        self.image["x"] = self.x
+        self.image["y"] = self.y
+
     class ActuatorElement:
 
         def __init__(self):
@@ -291,6 +325,21 @@ class MobileRobotDrawing(RobotDrawing):
             self.drawing.draw_image(sens.get_image(), "light_{}".format(i))
             i += 1
 
+    def get_state(self):
+        state = super().get_state()
+        state["light"] = [robot_state.get_attributes(sens) for sens in self.sensors["light"]]
+        state["sound"] = robot_state.get_attributes(self.sensors["sound"])
+        return state
+
+    def set_state(self, state):
+        state = dict(state)
+        for sens, sens_state in zip(self.sensors["light"], state.pop("light")):
+            robot_state.set_attributes(sens, sens_state)
+        robot_state.set_attributes(self.sensors["sound"], state.pop("sound"))
+        super().set_state(state)
+        self.robot["x"] = self.x
+        self.robot["y"] = self.y
+
     def predict_movement(self, vel):
         """
         Predicts the future position of the robot. Used to
@@ -606,13 +655,15 @@ class Circuit:
         self.parts = parts
         self.circuit_parts = []
         self.drawing = drawing
+        self.raster = raster.Raster()
         self.ROAD_WIDTH = 100
 
     def create_circuit(self):
         """
-        Creates and draws a circuit
+        Creates (only the first time) and draws a circuit
         """
-        self.create_straights()
+        if not self.circuit_parts:
+            self.create_straights()
         self.draw_circuit()
 
     def create_straights(self):
@@ -798,10 +849,13 @@ class Circuit:
 
     def draw_circuit(self):
         """
-        Draws the circuit
+        Draws the circuit. Its parts are drawn in a raster, which is
+        shown as a single image, rendered once per zoom
         """
-        for part in self.circuit_parts:
-            part.draw(self.drawing)
+        if not self.raster.shapes:
+            for part in self.circuit_parts:
+                part.draw(self.raster)
+        self.drawing.draw_raster(self.raster, "circuit")
 
     def __create_straight(self, x, y, width, height):
         """
@@ -1,18 +1,94 @@
-import time
-import graphics.layers as layers
+# The simulation engine (simulation.engine.SimulationEngine) that is
+# running the sketch, set when it is prepared. It is not imported here,
+# so the libraries can be used without tkinter (e.g. by the autograder)
+engine = None
+# The profiler of the lines of the sketch (simulation.profiler), set
+# when the engine is prepared, if the lines are profiled
+profiler = None
 
 
-layer: layers.Layer = None
-last_update = 0
-view = None
+def refresh(line=0):
+    """
+    Called on every iteration of the loops of the sketch, so the
+    simulation can advance while the sketch is busy
+    Arguments:
+        line: the line of the loop in the sketch
+    """
+    if engine is not None:
+        engine.check_budget(line)
+        engine.tick()
 
 
-def refresh():
-    global layer
-    global last_update
-    global view
-    curr_time = time.time_ns() / 1000000
-    if last_update + 16 <= curr_time:
-        layer.move(view.keys_used, view.move_WASD)
-        view.update_idletasks()
-        last_update = time.time_ns() / 1000000
+def check(line=0):
+    """
+    Called on every iteration of the loops of a sketch compiled as
+    coroutines, which yield what it returns
+    Arguments:
+        line: the line of the loop in the sketch
+    Returns:
+        0, as the loop does not wait
+    """
+    if engine is not None:
+        engine.check_budget(line)
+    return 0
+
+
+def line(number):
+    """
+    Called before every line of a sketch compiled to be profiled
+    Arguments:
+        number: the line in the sketch
+    """
+    if profiler is not None:
+        profiler.line(number)
+
+
+def advance():
+    """
+    Lets the simulation advance while the sketch is in a delay
+    """
+    if engine is not None:
+        engine.reset_budget()
+        engine.advance()
+
+
+def read_input():
+    """
+    Called when the sketch reads an input (a pin or Serial). A loop
+    that polls an input is waiting for it to change, so the read counts
+    as a wait for the budget of the loops
+    """
+    if engine is not None:
+        engine.reset_budget()
+
+
+def resume(function, *args):
+    """
+    Yield point of the coroutines of a sketch before a call that reads
+    an input (e.g. Serial.read), so it is read once the simulation has
+    advanced
+    Arguments:
+        function: the function to call
+        args: its arguments
+    Returns:
+        what the function returns
+    """
+    yield 0
+    read_input()
+    return function(*args)
+
+
+def complete(coroutine):
+    """
+    Runs a coroutine of a sketch to its end without waiting, for the
+    calls made outside the functions (e.g. in a global initialization)
+    Arguments:
+        coroutine: the coroutine
+    Returns:
+        what the coroutine returns
+    """
+    try:
+        while True:
+            next(coroutine)
+    except StopIteration as stop:
+        return stop.value
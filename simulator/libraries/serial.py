@@ -6,6 +6,7 @@ into other devices not implemented)
 
 import output.console as console
 import robot_components.boards as boards
+import graphics.screen_updater as screen_updater
 
 OK = 0
 ERROR = -1
@@ -91,6 +92,7 @@ def available():
     Returns:
         The number of bytes available to read
     """
+    screen_updater.read_input()
     return cons.get_read_bytes()
 
 
@@ -197,6 +199,7 @@ def read():
         The first byte of incoming serial data or -1 if
         none available
     """
+    screen_updater.read_input()
     return cons.read()
 
 
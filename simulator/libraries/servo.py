@@ -87,6 +87,7 @@ class Servo:
             angle: the value to write [0-180]
         """
         self.servo.value = angle
+        self.__record(angle)
 
     def write_microseconds(self, us):
         """
@@ -99,6 +100,7 @@ class Servo:
         """
         if self.servo is not None:
             self.servo.value = us
+            self.__record(us)
             return self.OK
         return self.ERROR
 
@@ -136,3 +138,14 @@ class Servo:
             self.servo.pin = -1
             return self.OK
         return self.ERROR
+
+    def __record(self, value):
+        """
+        Records the value written to the servo, if the signals of the
+        board are being recorded
+        Arguments:
+            value: the value written
+        """
+        recorder = getattr(self.board, "recorder", None)
+        if recorder is not None and self.servo.pin != -1:
+            recorder.record(self.servo.pin, value)
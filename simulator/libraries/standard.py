@@ -4,7 +4,6 @@ at: https://www.arduino.cc/reference/en/
 """
 
 import string
-import time
 import random as ran
 from math import cos, sin, sqrt, tan
 import robot_components.boards as boards
@@ -24,7 +23,6 @@ NOT_IMPL_WARNING = -2
 
 board: boards.Board = None
 state: robot_state.State = None
-start = time.time()
 
 
 def get_name():
@@ -167,6 +165,7 @@ def digital_read(pin):
     Returns:
         HIGH if reads 1, LOW if reads 0, None if else
     """
+    screen_updater.read_input()
     if board.is_digital(pin):
         return board.read(pin)
     return ran.randint(0, 1)
@@ -212,6 +211,7 @@ def analog_read(pin):
     Returns:
         the value that is read or None if error
     """
+    screen_updater.read_input()
     if board.is_analog(pin):
         return board.read(pin)
     return ran.randint(0, 1023)
@@ -275,6 +275,7 @@ def pulse_in(pin, value):
     Returns:
         The read value
     """
+    screen_updater.read_input()
     return board.read_pulse(pin, value)
 
 
@@ -313,9 +314,7 @@ def delay(ms):
     Arguments:
         ms: the number of milliseconds to pause
     """
-    state.exec_time_ms = int(time.time_ns() / 1000000) + ms
-    while time.time_ns() / 1000000 < state.exec_time_ms:
-        screen_updater.refresh()
+    state.clock.delay(ms, screen_updater.advance)
 
 
 def delay_microseconds(us):
@@ -324,7 +323,7 @@ def delay_microseconds(us):
     Arguments:
         us: the number of microseconds to pause
     """
-    state.exec_time_us = int(time.time_ns() / 1000) + us
+    state.exec_time_us = state.clock.micros() + us
 
 
 def micros():
@@ -332,9 +331,7 @@ def micros():
     Returns the number of microseconds since the Arduino board
     began running the current program
     """
-    now = time.time()
-    diff = now - start
-    return int(diff * 1000000)
+    return state.clock.micros()
 
 
 def millis():
@@ -342,9 +339,7 @@ def millis():
     Returns the number of milliseconds since the Arduino board
     began running the current program
     """
-    now = time.time()
-    diff = now - start
-    return int(diff * 1000)
+    return state.clock.millis()
 
 
 # Math
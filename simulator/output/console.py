@@ -2,7 +2,6 @@ import logging
 from datetime import datetime
 import os
 from time import time
-import tkinter as tk
 
 
 class ConsoleReportMessage:
@@ -67,9 +66,11 @@ class Warning(ConsoleReportMessage):
 
 class Console:
 
-    def __init__(self, text_widget: tk.Text):
+    def __init__(self, text_widget):
         """
         Constructor for console
+        Arguments:
+            text_widget: the tkinter Text where the messages are written
         """
         self.text_widget = text_widget
         self.logger = Logger()
@@ -161,10 +162,10 @@ class Console:
             message: the message to write
         """
         m_type = 'info'
-        self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.insert(tk.END, message, m_type)
+        self.text_widget.config(state="normal")
+        self.text_widget.insert("end", message, m_type)
         self.text_widget.see("end")
-        self.text_widget.config(state=tk.DISABLED)
+        self.text_widget.config(state="disabled")
         self.logger.write_log(m_type, message)
         self.messages.append((m_type, message))
 
@@ -199,17 +200,17 @@ class Console:
             msg_types: the type(s) of the message(s) to be
             displayed
         """
-        self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.delete('1.0', tk.END)
+        self.text_widget.config(state="normal")
+        self.text_widget.delete('1.0', "end")
         for m in self.messages:
             if m[0] in msg_types:
                 self.__insert_text(m[1], m[0])
-        self.text_widget.config(state=tk.DISABLED)
+        self.text_widget.config(state="disabled")
 
     def clear(self):
-        self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.delete("1.0", tk.END)
-        self.text_widget.config(state=tk.DISABLED)
+        self.text_widget.config(state="normal")
+        self.text_widget.delete("1.0", "end")
+        self.text_widget.config(state="disabled")
         self.messages = []
         self.input_msgs = []
 
@@ -220,10 +221,10 @@ class Console:
             message: the message to insert into the widget
             tag: the tag for the color of the text
         """
-        self.text_widget.config(state=tk.NORMAL)
-        self.text_widget.insert(tk.END, message + "\n", tag)
+        self.text_widget.config(state="normal")
+        self.text_widget.insert("end", message + "\n", tag)
         self.text_widget.see("end")
-        self.text_widget.config(state=tk.DISABLED)
+        self.text_widget.config(state="disabled")
 
 
 class Logger:
@@ -0,0 +1,43 @@
+"""
+Replays a run recorded in the GUI (Ejecutar > Grabar la ejecución),
+without GUI and as fast as possible, and shows what the sketch wrote
+and where the robot ended. Run it from the root of the repository:
+
+    python simulator/replayer.py <recording>
+"""
+
+import argparse
+import sys
+import time
+
+sys.path.append(".")
+sys.path.append("./simulator")
+
+import simulation.replay as replay
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproduce una ejecución grabada")
+    parser.add_argument("recording", help="fichero de la grabación (.srun)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        replayer = replay.Replayer(args.recording)
+        simulation = replayer.run()
+    except (OSError, replay.ReplayError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    for message in replayer.console.outputs:
+        print(message, end="")
+    for error in replayer.console.errors:
+        print(error, file=sys.stderr)
+    drawing = simulation.layer.robot_drawing
+    print("{} pasos ({} ms simulados) en {:.2f} s, robot en x={}, y={}".format(
+        simulation.steps, simulation.time_ms, time.perf_counter() - start, drawing.x, drawing.y),
+        file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,12 +3,47 @@ class Board:
     OUTPUT = 1
     INPUT_PULLUP = 2
 
+    # Capabilities of a pin, as bits
+    DIGITAL = 1
+    ANALOG = 2
+    TXRX = 4
+
+    # The recorder of the signals of the pins, if any (see
+    # simulation.trace)
+    recorder = None
+
     def __init__(self):
         """
-        Constructor for Arduino board
+        Constructor for Arduino board.
+        Besides the lists of pins by type and the used pins, the board
+        keeps arrays indexed by pin number (see compile_pins), so the
+        reads and writes of the sketch do not search the lists
         """
         self.pins = {}
         self.used_pins = {}
+        self.compile_pins()
+
+    def compile_pins(self):
+        """
+        Builds the arrays indexed by pin number from the lists of pins
+        and the used pins: the capabilities, the mode, the element and
+        the last value written of every pin. It must be called when the
+        lists of pins change
+        """
+        numbers = [pin for pin in self.used_pins]
+        for pin_type in ("digital", "analog", "txrx"):
+            numbers.extend(self.pins.get(pin_type, []))
+        n_pins = max(numbers) + 1 if numbers else 0
+        self.capabilities = [0] * n_pins
+        for pin_type, capability in (("digital", self.DIGITAL), ("analog", self.ANALOG), ("txrx", self.TXRX)):
+            for pin in self.pins.get(pin_type, []):
+                self.capabilities[pin] |= capability
+        self.modes = [self.INPUT] * n_pins
+        self.elements = [None] * n_pins
+        self.values = [0] * n_pins
+        for pin, used in self.used_pins.items():
+            self.elements[pin] = used["element"]
+            self.modes[pin] = used["mode"]
 
     def get_pin_element(self, pin):
         """
@@ -19,9 +54,19 @@ class Board:
             The element attached to the pin or None if there is none
             attached
         """
-        if pin in self.used_pins:
-            return self.used_pins[pin]["element"]
-        return None
+        return self.__element(pin)
+
+    def get_pin_value(self, pin):
+        """
+        Gets the last value written to a pin
+        Arguments:
+            pin: the pin
+        Returns:
+            The value, 0 if none has been written
+        """
+        if self.__element(pin) is None:
+            return 0
+        return self.values[pin]
 
     def get_digital_pins(self):
         """
@@ -74,7 +119,10 @@ class Board:
         Returns:
             True if is digital, False if else
         """
-        return pin in self.pins["digital"] or pin in self.pins["txrx"]
+        try:
+            return pin >= 0 and self.capabilities[pin] & (self.DIGITAL | self.TXRX) != 0
+        except (IndexError, TypeError):
+            return False
 
     def is_analog(self, pin):
         """
@@ -84,7 +132,10 @@ class Board:
         Returns:
             True if is analog, False if else
         """
-        return pin in self.pins["analog"]
+        try:
+            return pin >= 0 and self.capabilities[pin] & self.ANALOG != 0
+        except (IndexError, TypeError):
+            return False
 
     def is_txrx(self, pin):
         """
@@ -94,7 +145,7 @@ class Board:
         Returns:
             True if is tx/rx, False if else
         """
-        return pin in self.pins["txrx"]
+        return self.__capabilities(pin) & self.TXRX != 0
 
     def attach_pin(self, pin, elem):
         """
@@ -105,15 +156,14 @@ class Board:
         Returns:
             True if attached, False if else
         """
-        if (
-                pin in self.pins["analog"]
-                or pin in self.pins["digital"]
-                or pin in self.pins["txrx"]
-        ) and pin not in self.used_pins:
+        if self.__capabilities(pin) != 0 and pin not in self.used_pins:
             self.used_pins[pin] = {
                 "element": elem,
                 "mode": self.INPUT
             }
+            self.elements[pin] = elem
+            self.modes[pin] = self.INPUT
+            self.values[pin] = 0
             return True
         return False
 
@@ -127,6 +177,8 @@ class Board:
         """
         if pin in self.used_pins:
             del self.used_pins[pin]
+            self.elements[pin] = None
+            self.modes[pin] = self.INPUT
             return True
         return False
 
@@ -138,9 +190,17 @@ class Board:
         Returns:
             The value of the output or None if pin not input
         """
-        if self.__is_used_pin(pin):
-            if self.used_pins[pin]["mode"] == self.INPUT or self.used_pins[pin]["mode"] == self.INPUT_PULLUP:
-                return self.used_pins[pin]["element"].get_value(pin)
+        try:
+            element = self.elements[pin] if pin >= 0 else None
+        except (IndexError, TypeError):
+            return None
+        if element is not None:
+            mode = self.modes[pin]
+            if mode == self.INPUT or mode == self.INPUT_PULLUP:
+                value = element.get_value(pin)
+                if self.recorder is not None:
+                    self.recorder.record(pin, value)
+                return value
         return None
 
     def read_pulse(self, pin, value):
@@ -152,9 +212,9 @@ class Board:
         Returns:
             The value or None if no value
         """
-        if self.__is_used_pin(pin):
-            if self.used_pins[pin]["mode"] == self.INPUT:
-                return self.used_pins[pin]["element"].get_pulse(pin)
+        element = self.__element(pin)
+        if element is not None and self.modes[pin] == self.INPUT:
+            return element.get_pulse(pin, value)
         return None
 
     def write_value(self, pin, value):
@@ -166,10 +226,16 @@ class Board:
         Returns:
             True if operation done, False if else
         """
-        if self.__is_used_pin(pin):
-            if self.used_pins[pin]["mode"] == self.OUTPUT:
-                self.used_pins[pin]["element"].set_value(value)
-                return True
+        try:
+            element = self.elements[pin] if pin >= 0 else None
+        except (IndexError, TypeError):
+            return False
+        if element is not None and self.modes[pin] == self.OUTPUT:
+            element.set_value(pin, value)
+            self.values[pin] = value
+            if self.recorder is not None:
+                self.recorder.record(pin, value)
+            return True
         return False
 
     def set_pin_mode(self, pin, mode):
@@ -181,20 +247,37 @@ class Board:
         Returns:
             True if operation done, False if else
         """
-        if self.__is_used_pin(pin):
+        if self.__element(pin) is not None:
             self.used_pins[pin]["mode"] = mode
+            self.modes[pin] = mode
             return True
         return False
 
-    def __is_used_pin(self, pin):
+    def __capabilities(self, pin):
         """
-        Checks if a pin is being used
+        Gets the capabilities of a pin
         Arguments:
-            pin: the pin to check
+            pin: the pin
+        Returns:
+            The capability bits, 0 if it is not a pin of the board
+        """
+        try:
+            return self.capabilities[pin] if pin >= 0 else 0
+        except (IndexError, TypeError):
+            return 0
+
+    def __element(self, pin):
+        """
+        Gets the element attached to a pin
+        Arguments:
+            pin: the pin
         Returns:
-            True if used, False if else
+            The element or None if the pin is not used
         """
-        return pin in self.used_pins
+        try:
+            return self.elements[pin] if pin >= 0 else None
+        except (IndexError, TypeError):
+            return None
 
 
 class ArduinoUno(Board):
@@ -217,6 +300,7 @@ class ArduinoUno(Board):
         self.pins["v"] = [20, 21]
         self.pins["gnd"] = [22, 23, 24]
         self.pines = []
+        self.compile_pins()
 
     def is_txrx(self, pin):
         if pin == 0 or pin == 1:
@@ -398,3 +482,4 @@ class BQzumBT328(Board):
         self.pins["digital"] = list(map(lambda x: x, range(2, 14)))
         self.pins["analog"] = list(map(lambda x: x, range(14, 20)))
         self.pins["txrx"] = [0, 1]
+        self.compile_pins()
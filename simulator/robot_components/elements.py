@@ -1,4 +1,11 @@
+import robot_components.robot_state as robot_state
+
+
 class Element:
+    # The event bus where the changes of the value are published, if any
+    # (see robot_components.events)
+    bus = None
+    _value = None
 
     def __init__(self):
         """
@@ -6,6 +13,17 @@ class Element:
         """
         self.value = 0
 
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        if value != self._value:
+            self._value = value
+            if self.bus is not None:
+                self.bus.publish(self, value)
+
     def get_value(self, pin=-1):
         """
         Gets the value (digital or analog) of the element
@@ -15,7 +33,7 @@ class Element:
         Returns:
             The value of the element
         """
-        return self.value
+        return self._value
 
     def set_value(self, pin, value):
         """
@@ -25,7 +43,10 @@ class Element:
             element uses 2 or more pins)
             value: the value to write
         """
-        self.value = value
+        if value != self._value:
+            self._value = value
+            if self.bus is not None:
+                self.bus.publish(self, value)
 
     def get_pulse(self, pin, value):
         """
@@ -38,6 +59,28 @@ class Element:
         """
         return None
 
+    def get_state(self):
+        """
+        Returns:
+            the state of the element (its value, pins...) as a dict of
+            plain values
+        """
+        state = robot_state.get_attributes(self)
+        state["value"] = state.pop("_value", self.value)
+        return state
+
+    def set_state(self, state):
+        """
+        Restores the state of the element. Its value is set last, so
+        the change is published
+        Arguments:
+            state: the state, as given by get_state
+        """
+        state = dict(state)
+        value = state.pop("value")
+        robot_state.set_attributes(self, state)
+        self.value = value
+
 
 class Servo(Element):
 
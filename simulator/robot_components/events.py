@@ -0,0 +1,63 @@
+"""
+Event bus of the elements of a robot. Instead of reading the values of
+all the elements on every frame, the layers (and anything that shows
+them) subscribe to the elements they care about, and an element
+publishes an event only when its value changes: a servo written with a
+new angle, a button pressed, a sensor that goes from not detecting to
+detecting...
+"""
+
+
+class EventBus:
+
+    def __init__(self):
+        """
+        Constructor for the event bus
+        """
+        self.subscribers = {}
+
+    def watch(self, *elements):
+        """
+        Makes some elements publish their changes on this bus
+        Arguments:
+            elements: the elements
+        """
+        for element in elements:
+            element.bus = self
+
+    def subscribe(self, element, callback):
+        """
+        Calls a function every time the value of an element changes
+        Arguments:
+            element: the element
+            callback: the function, called with the element and its
+            new value
+        """
+        callbacks = self.subscribers.setdefault(element, [])
+        if callback not in callbacks:
+            callbacks.append(callback)
+
+    def unsubscribe(self, element, callback):
+        """
+        Stops calling a function when the value of an element changes
+        Arguments:
+            element: the element
+            callback: the function
+        """
+        callbacks = self.subscribers.get(element)
+        if callbacks is not None and callback in callbacks:
+            callbacks.remove(callback)
+            if not callbacks:
+                del self.subscribers[element]
+
+    def publish(self, element, value):
+        """
+        Lets the subscribers of an element know that its value has changed
+        Arguments:
+            element: the element
+            value: the new value
+        """
+        callbacks = self.subscribers.get(element)
+        if callbacks is not None:
+            for callback in callbacks:
+                callback(element, value)
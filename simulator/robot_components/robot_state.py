@@ -1,6 +1,202 @@
+"""
+State of the sketch that is running, and the clocks that measure its
+time: the real time one, used by the GUI, and the simulated one, whose
+time only advances when the sketch waits (or loops), so the simulation
+does not depend on the host.
+
+It also has the helpers used to save the state of the robots (their
+elements and drawings) as plain values, e.g. to record a run.
+"""
+
+import time
+
+PLAIN_TYPES = (bool, int, float, str)
+
+
+def get_attributes(obj):
+    """
+    Gets the attributes of an object whose values are plain (numbers,
+    strings or None), which are the ones that make up its state
+    Arguments:
+        obj: the object
+    Returns:
+        a dict with the attributes, by name
+    """
+    return {name: value for name, value in vars(obj).items() if value is None or isinstance(value, PLAIN_TYPES)}
+
+
+def set_attributes(obj, attributes):
+    """
+    Sets the attributes of an object
+    Arguments:
+        obj: the object
+        attributes: a dict with the attributes, by name
+    """
+    for name, value in attributes.items():
+        setattr(obj, name, value)
+
+
+class RealTimeClock:
+    """
+    Clock that follows the time of the host, or a multiple of it
+    """
+    real_time = True
+    SLICE_MS = 5
+
+    def __init__(self, scale=1, time_ms=0):
+        """
+        Constructor for the real time clock
+        Arguments:
+            scale: how many times faster than the host the time goes
+            time_ms: the time at which the clock starts
+        """
+        self.scale = scale
+        self.base_ms = time_ms
+        self.start = self._perf_counter()
+
+    def now_ms(self):
+        """
+        Returns:
+            the time of the clock, in milliseconds
+        """
+        return self.base_ms + (self._perf_counter() - self.start) * 1000 * self.scale
+
+    def millis(self):
+        """
+        Returns:
+            the whole milliseconds of the clock
+        """
+        return int(self.now_ms())
+
+    def micros(self):
+        """
+        Returns:
+            the whole microseconds of the clock
+        """
+        return int(self.now_ms() * 1000)
+
+    def tick(self):
+        """
+        Called on every iteration of the loops of the sketch. The time
+        of the host already goes on by itself
+        """
+        pass
+
+    def wait(self, ms):
+        """
+        Lets an amount of time pass
+        Arguments:
+            ms: the milliseconds to wait
+        """
+        if ms > 0:
+            self._sleep(ms / 1000 / self.scale)
+
+    def delay(self, ms, refresh):
+        """
+        Pauses the sketch, sleeping in slices so the simulation can
+        advance meanwhile
+        Arguments:
+            ms: the milliseconds to pause
+            refresh: called after every slice
+        """
+        end = self.now_ms() + ms
+        refresh()
+        remaining = end - self.now_ms()
+        while remaining > 0:
+            self._sleep(min(remaining / self.scale, self.SLICE_MS) / 1000)
+            refresh()
+            remaining = end - self.now_ms()
+
+    def _perf_counter(self):
+        """
+        Returns:
+            the time of the host, in seconds (see time.perf_counter)
+        """
+        return time.perf_counter()
+
+    def _sleep(self, seconds):
+        """
+        Sleeps the host
+        Arguments:
+            seconds: the seconds to sleep
+        """
+        time.sleep(seconds)
+
+
+class SimulatedClock:
+    """
+    Clock whose time only advances when the sketch waits, so a delay
+    takes no real time and the simulation is deterministic
+    """
+    real_time = False
+    ITERATION_US = 10
+
+    def __init__(self, time_ms=0):
+        """
+        Constructor for the simulated clock
+        Arguments:
+            time_ms: the time at which the clock starts
+        """
+        self.time_us = time_ms * 1000
+
+    def now_ms(self):
+        """
+        Returns:
+            the simulated time, in milliseconds
+        """
+        return self.time_us / 1000
+
+    def millis(self):
+        """
+        Returns:
+            the whole simulated milliseconds
+        """
+        return int(self.time_us // 1000)
+
+    def micros(self):
+        """
+        Returns:
+            the whole simulated microseconds
+        """
+        return int(self.time_us)
+
+    def tick(self):
+        """
+        Called on every iteration of the loops of the sketch, each of
+        them takes ITERATION_US. This way a loop that waits for a sensor
+        lets the simulation advance
+        """
+        self.time_us += self.ITERATION_US
+
+    def wait(self, ms):
+        """
+        Lets an amount of simulated time pass
+        Arguments:
+            ms: the milliseconds to wait
+        """
+        if ms > 0:
+            self.time_us += ms * 1000
+
+    def delay(self, ms, refresh):
+        """
+        Pauses the sketch: the time advances at once and then the
+        simulation catches up
+        Arguments:
+            ms: the milliseconds to pause
+            refresh: called once the time has advanced
+        """
+        self.wait(ms)
+        refresh()
+
+
 class State:
 
-    def __init__(self):
-        self.exec_time_ms = 0
+    def __init__(self, clock=None):
+        """
+        Constructor for the state of a sketch
+        Arguments:
+            clock: the clock of the sketch, a real time one if None
+        """
+        self.clock = RealTimeClock() if clock is None else clock
         self.exec_time_us = 0
         self.exited = False
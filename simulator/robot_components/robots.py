@@ -6,6 +6,21 @@ joystick)
 
 import robot_components.boards as boards
 import robot_components.elements as elements
+import robot_components.events as events
+
+
+def same_code(user_code, robot_code):
+    """
+    Compares the code of the user with the solution of a challenge,
+    ignoring spaces, tabs and line breaks
+    Arguments:
+        user_code: the code of the user
+        robot_code: the solution of the challenge
+    Returns:
+        True if both codes are the same
+    """
+    return user_code.replace(" ", "").replace("\n", "").replace("\t", "") == \
+        robot_code.replace(" ", "").replace("\n", "").replace("\t", "")
 
 
 class Robot:
@@ -13,6 +28,7 @@ class Robot:
     def __init__(self, board):
         self.board = board
         self.robot_elements = []
+        self.bus = events.EventBus()
 
     def get_data(self):
         pass
@@ -34,6 +50,45 @@ class Robot:
     def reset(self):
         pass
 
+    def get_elements(self):
+        """
+        Returns:
+            the elements of the robot whose state is saved, by name
+        """
+        return {}
+
+    def get_state(self):
+        """
+        Gets the state of the robot: the state of its elements and the
+        pins they are attached to, with their modes and last values
+        Returns:
+            the state, as a dict of plain values
+        """
+        elements = self.get_elements()
+        names = {element: name for name, element in elements.items()}
+        return {
+            "elements": {name: element.get_state() for name, element in elements.items()},
+            "pins": [[pin, names[used["element"]], used["mode"]]
+                     for pin, used in self.board.used_pins.items() if used["element"] in names],
+            "values": list(self.board.values)
+        }
+
+    def set_state(self, state):
+        """
+        Restores the state of the robot
+        Arguments:
+            state: the state, as given by get_state
+        """
+        elements = self.get_elements()
+        for pin in list(self.board.used_pins):
+            self.board.detach_pin(pin)
+        for pin, name, mode in state["pins"]:
+            self.board.attach_pin(pin, elements[name])
+            self.board.set_pin_mode(pin, mode)
+        self.board.values[:len(state["values"])] = state["values"]
+        for name, element_state in state["elements"].items():
+            elements[name].set_state(element_state)
+
 
 class MobileRobot(Robot):
 
@@ -58,8 +113,15 @@ class MobileRobot(Robot):
 
         self.sound = elements.UltrasoundSensor()
 
+        self.bus.watch(self.servo_left, self.servo_right, self.sound, *self.light_sensors)
         self.assign_pins(pins)
 
+    def get_elements(self):
+        elements = {"servo_left": self.servo_left, "servo_right": self.servo_right, "sound": self.sound}
+        for i in range(len(self.light_sensors)):
+            elements["light_{}".format(i + 1)] = self.light_sensors[i]
+        return elements
+
     def get_data(self):
         data = None
         if len(self.light_sensors) == 2:
@@ -299,8 +361,17 @@ class LinearActuator(Robot):
 
         self.joystick = elements.Joystick()
 
+        self.bus.watch(self.button_left, self.button_right, self.servo, self.joystick)
         self.assign_pins(pins)
 
+    def get_elements(self):
+        return {
+            "button_left": self.button_left,
+            "button_right": self.button_right,
+            "servo": self.servo,
+            "joystick": self.joystick
+        }
+
     def get_data(self):
         return {
             "button_left": self.button_left.pin,
@@ -436,6 +507,21 @@ class LinearActuator(Robot):
         self.board.detach_pin(self.joystick.pinb)
         self.joystick.pinb = -1
 
+    def move_joystick(self, elem, value):
+        """
+        Moves the joystick or presses its button, as the user does
+        in the GUI
+        Arguments:
+            elem: what changes ("dx", "dy" or "button")
+            value: its new value
+        """
+        if elem == "dx":
+            self.joystick.dx = value
+        elif elem == "dy":
+            self.joystick.dy = value
+        elif elem == "button":
+            self.joystick.value = value
+
 
 class ArduinoBoard(Robot):
 
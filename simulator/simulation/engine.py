@@ -0,0 +1,581 @@
+"""
+Simulation engine. It owns the robot of a layer (its board and the
+physics of the layer, i.e. its move method) and the setup and loop of
+the sketch, and advances the physics in fixed steps of simulated time,
+until it reaches the time of the clock of the sketch.
+
+With the real time clock (the one of the GUI) the steps follow the
+time of the host. With the simulated clock, the time only advances when
+the sketch waits, so the simulation runs as fast as possible and always
+does the same.
+
+The time scale chooses between them: a real time clock that goes 1, 4
+or 16 times faster than the host, or the simulated clock to go as fast
+as possible. When the simulation goes faster than real time, the layer
+only draws one of every few steps.
+
+The GUI is only an observer of the engine, so a simulation can also
+run without a display: without a canvas the drawing and the HUD of the
+layer do not draw anything.
+
+A sketch compiled as coroutines is not called but resumed by a
+scheduler (see simulation.scheduler): its delays and loops give the
+control back instead of blocking, so a frame of the GUI never waits
+for the sketch.
+
+A loop of the sketch that goes on for too long without waiting (e.g.
+a while (true) without a delay) is stopped with an error that tells
+its line, as the sketch would never give the control back.
+
+The sketch can also run in a child process (see
+simulation.process_runner), and then the engine only advances the
+physics with the values of the pins that the sketch leaves in shared
+memory.
+
+A recorder (see simulation.trace) can be given to the engine to record
+the signals of the pins of the board during every run.
+
+A run can also be recorded and replayed (see simulation.replay): the
+engine takes the times of the host (of its real time clocks and of its
+frames) and the keys from a run log, which either records them or
+gives back the ones of a recorded run.
+
+A checkpointer (see simulation.snapshot) can take snapshots of the run
+every few seconds, when a loop of the sketch ends, and a run can go on
+from one of them, even with a changed sketch.
+
+A sketch compiled to be profiled counts and times its lines in the
+profiler of the engine (see simulation.profiler), which is paused
+whenever the sketch gives the control back.
+
+The errors of the sketch are not caught by the engine, but its source
+map (see compiler.source_map) tells where they happened in the sketch.
+"""
+
+import inspect
+import time
+import libraries.standard as standard
+import libraries.serial as serial
+import robot_components.robot_state as robot_state
+import graphics.screen_updater as screen_updater
+import simulation.scheduler as scheduler
+import simulation.process_runner as process_runner
+
+STEP_MS = 16
+MAX_STEPS = 5
+FRAME_MS = 20
+TIME_SCALES = [1, 4, 16, None]
+MAX_RENDER_EVERY = 32
+MAX_BUSY_MS = 10000
+MAX_ITERATIONS = None
+
+
+class LoopBudgetExceeded(Exception):
+    """
+    Raised when a loop of the sketch goes over its budget
+    """
+
+    def __init__(self, line, message):
+        """
+        Constructor for the exception
+        Arguments:
+            line: the line of the loop in the sketch
+            message: the message for the user
+        """
+        super().__init__(message)
+        self.line = line
+
+
+class Observer:
+    """
+    Follows the simulation, e.g. to show it
+    """
+
+    def before_steps(self, engine):
+        """
+        Called before the engine advances, e.g. to read the input
+        of the user
+        Arguments:
+            engine: the engine
+        """
+        pass
+
+    def after_steps(self, engine):
+        """
+        Called after the engine has advanced one or more steps, e.g.
+        to show the new state of the robot
+        Arguments:
+            engine: the engine
+        """
+        pass
+
+
+class SimulationEngine:
+
+    def __init__(self, layer=None, step_ms=STEP_MS, max_steps=MAX_STEPS,
+                 max_busy_ms=MAX_BUSY_MS, max_iterations=MAX_ITERATIONS):
+        """
+        Constructor for the simulation engine
+        Arguments:
+            layer: the layer whose robot is simulated
+            step_ms: the simulated time of every step, in milliseconds
+            max_steps: the maximum number of steps of one advance with
+            the real time clock (at 1x), so a slow sketch does not make
+            the simulation fall further and further behind
+            max_busy_ms: the budget of the loops of the sketch, the
+            milliseconds (of the clock of the sketch) they can go on
+            without waiting in a call to setup or loop. None for no limit
+            max_iterations: the budget of the loops of the sketch, in
+            iterations without waiting in a call to setup or loop. None
+            for no limit
+        """
+        self.layer = layer
+        self.step_ms = step_ms
+        self.max_steps = max_steps
+        self.max_busy_ms = max_busy_ms
+        self.max_iterations = max_iterations
+        self.iterations = 0
+        self.busy_start_ms = 0
+        self.time_scale = 1
+        self.render_every = 1
+        self.observers = []
+        self.module = None
+        self.source_map = None
+        self.coroutines = False
+        self.scheduler = scheduler.Scheduler()
+        self.loop_start_ms = None
+        self.runner = None
+        self.recorder = None
+        self.run_log = None
+        self.checkpointer = None
+        self.profiler = None
+        self.clock = None
+        self.keys_used = False
+        self.move_WASD = {key: False for key in "wasdWASD"}
+        self.time_ms = 0
+        self.steps = 0
+
+    def set_layer(self, layer):
+        """
+        Sets the layer whose robot is simulated
+        Arguments:
+            layer: the layer
+        """
+        self.layer = layer
+
+    def set_time_scale(self, time_scale, render_every=None):
+        """
+        Sets how fast the simulation goes. It can be changed while a
+        sketch is running, except in a child process
+        Arguments:
+            time_scale: how many times faster than real time, None to go
+            as fast as possible
+            render_every: draw one of every render_every steps, by default
+            the time scale (MAX_RENDER_EVERY when as fast as possible)
+        """
+        if self.run_log is not None:
+            self.run_log.time_scale(time_scale)
+        self.time_scale = time_scale
+        if render_every is None:
+            render_every = MAX_RENDER_EVERY if time_scale is None else time_scale
+        self.render_every = render_every
+        if self.clock is not None and self.runner is None:
+            self.__set_clock(self.__new_clock(self.clock.now_ms()))
+
+    def set_recorder(self, recorder):
+        """
+        Sets the recorder of the signals of the pins of the board, which
+        records from the next run on
+        Arguments:
+            recorder: the recorder (see simulation.trace), None to stop
+            recording
+        """
+        self.recorder = recorder
+
+    def set_run_log(self, run_log):
+        """
+        Sets the run log that records (or replays) the runs, from the
+        next one on
+        Arguments:
+            run_log: the run log (see simulation.replay), None to stop
+            recording
+        """
+        self.run_log = run_log
+
+    def set_checkpointer(self, checkpointer):
+        """
+        Sets the checkpointer that takes the snapshots of the runs, from
+        the next one on
+        Arguments:
+            checkpointer: the checkpointer (see simulation.snapshot), None
+            to stop taking them
+        """
+        self.checkpointer = checkpointer
+
+    def set_profiler(self, profiler):
+        """
+        Sets the profiler of the lines of the sketches compiled to be
+        profiled, from the next run on
+        Arguments:
+            profiler: the profiler (see simulation.profiler), None to
+            stop profiling
+        """
+        self.profiler = profiler
+
+    def add_observer(self, observer: Observer):
+        """
+        Adds an observer of the simulation
+        Arguments:
+            observer: the observer
+        """
+        if observer not in self.observers:
+            self.observers.append(observer)
+
+    def remove_observer(self, observer: Observer):
+        """
+        Removes an observer of the simulation
+        Arguments:
+            observer: the observer
+        """
+        if observer in self.observers:
+            self.observers.remove(observer)
+
+    def prepare(self, console=None, clock=None):
+        """
+        Prepares the libraries to run a sketch on the board of the robot,
+        starting the simulated time again
+        Arguments:
+            console: the console used by Serial
+            clock: the clock of the sketch, the one of the time scale if
+            None
+        """
+        if clock is None:
+            clock = self.__new_clock()
+        standard.board = self.layer.robot.board
+        if standard.board is not None:
+            standard.board.recorder = self.recorder
+        standard.state = robot_state.State(clock)
+        serial.cons = console
+        screen_updater.engine = self
+        screen_updater.profiler = self.profiler
+        self.scheduler.stop()
+        self.stop_process()
+        if self.recorder is not None:
+            self.recorder.clear()
+        if self.checkpointer is not None:
+            self.checkpointer.clear()
+        if self.profiler is not None:
+            self.profiler.clear()
+        if self.run_log is not None:
+            self.run_log.start(self)
+        self.__set_clock(clock)
+        self.time_ms = 0
+        self.steps = 0
+
+    def restore(self, snapshot, sketch, console=None):
+        """
+        Goes on with a run from a snapshot of it, with a sketch that can
+        have changed since the snapshot was taken: its setup is not run
+        and its globals take the values they had, when they still exist
+        Arguments:
+            snapshot: the snapshot (see simulation.snapshot)
+            sketch: the compiled sketch
+            console: the console used by Serial
+        Raises:
+            SnapshotError: if the snapshot is of another robot
+        """
+        snapshot.check(self.layer)
+        self.layer.set_state(snapshot.layer)
+        self.prepare(console, self.__new_clock(snapshot.clock_ms))
+        self.load(sketch)
+        snapshot.restore_sketch(self)
+        self.time_ms = snapshot.time_ms
+        self.steps = snapshot.steps
+
+    def load(self, sketch):
+        """
+        Creates the module of a compiled sketch
+        Arguments:
+            sketch: the compiled sketch (a compile cache entry)
+        """
+        self.module = sketch.new_module()
+        self.source_map = sketch.source_map
+        self.coroutines = inspect.isgeneratorfunction(self.module.setup)
+
+    def start_process(self, sketch):
+        """
+        Runs a compiled sketch in a child process instead of in this
+        one. Its clock goes at the time scale the simulation has when
+        it starts (the fastest real time one if it is as fast as possible)
+        Arguments:
+            sketch: the compiled sketch, not compiled as coroutines
+        """
+        scale = self.time_scale
+        if scale is None:
+            scale = max(time_scale for time_scale in TIME_SCALES if time_scale is not None)
+            self.__set_clock(robot_state.RealTimeClock(scale, self.clock.now_ms()))
+        self.runner = process_runner.ProcessRunner(self.layer.robot.board, serial.cons)
+        self.runner.start(sketch.script, scale, sketch.source_map)
+        self.source_map = sketch.source_map
+
+    def stop_process(self):
+        """
+        Kills the child process of the sketch, if there is one
+        """
+        if self.runner is not None:
+            self.runner.stop()
+            self.runner = None
+
+    def is_waiting(self):
+        """
+        Checks if the sketch is waiting for a delayMicroseconds to end
+        Returns:
+            True if it is waiting
+        """
+        return standard.state.exec_time_us > self.clock.micros()
+
+    def is_finished(self):
+        """
+        Returns:
+            True if the sketch has called exit (or its process has ended)
+        """
+        if self.runner is not None:
+            return not self.runner.is_alive()
+        return standard.state.exited
+
+    def setup(self):
+        """
+        Runs the setup of the sketch. If it is a coroutine, it is only
+        started, and it runs as the engine resumes it
+        """
+        self.reset_budget()
+        if self.coroutines:
+            self.loop_start_ms = None
+            self.scheduler.start(self.module.setup(), self.clock.now_ms())
+        elif not self.is_waiting():
+            self.module.setup()
+            self.__pause_profiler()
+
+    def loop(self):
+        """
+        Runs the loop of the sketch once, unless it is waiting, it has
+        finished or the robot is being moved with the keys
+        """
+        if not self.keys_used and not self.is_waiting() and not self.is_finished():
+            self.reset_budget()
+            self.module.loop()
+            self.__pause_profiler()
+            self.__loop_ended()
+
+    def reset_budget(self):
+        """
+        Starts counting the budget of the loops again, when a call to
+        setup or loop starts or the sketch waits
+        """
+        self.iterations = 0
+        self.busy_start_ms = self.clock.now_ms()
+
+    def check_budget(self, line):
+        """
+        Counts an iteration of a loop of the sketch
+        Arguments:
+            line: the line of the loop in the sketch
+        Raises:
+            LoopBudgetExceeded: if the loops have gone over the budget
+        """
+        self.iterations += 1
+        if self.max_iterations is not None and self.iterations > self.max_iterations:
+            raise LoopBudgetExceeded(line, "El bucle de la línea {} ha dado más de {} vueltas sin esperar. "
+                                           "¿Falta un delay()?".format(line, self.max_iterations))
+        if self.max_busy_ms is not None and self.clock.now_ms() - self.busy_start_ms > self.max_busy_ms:
+            raise LoopBudgetExceeded(line, "El bucle de la línea {} lleva más de {} ms sin esperar. "
+                                           "¿Falta un delay()?".format(line, self.max_busy_ms))
+
+    def step(self):
+        """
+        Advances the physics of the layer one step
+        Returns:
+            True if the step has been drawn
+        """
+        rendering = (self.steps + 1) % self.render_every == 0
+        self.layer.set_rendering(rendering)
+        self.layer.move(self.keys_used, self.move_WASD)
+        self.time_ms += self.step_ms
+        self.steps += 1
+        return rendering
+
+    def tick(self):
+        """
+        Called on every iteration of the loops of the sketch
+        """
+        self.clock.tick()
+        self.advance()
+
+    def advance(self):
+        """
+        Advances the steps up to the time of the clock and lets the
+        observers know. It is called both between the loops of the
+        sketch and while the sketch is busy (in a delay or a loop)
+        """
+        for observer in self.observers:
+            observer.before_steps(self)
+        if self.run_log is not None:
+            self.run_log.keys(self)
+        now = self.clock.now_ms()
+        steps = 0
+        rendered = False
+        while self.time_ms + self.step_ms <= now:
+            if self.clock.real_time and steps == self.max_steps * self.clock.scale:
+                # Too far behind: the steps left are skipped
+                self.time_ms += (now - self.time_ms) // self.step_ms * self.step_ms
+                break
+            rendered = self.step() or rendered
+            steps += 1
+        if rendered:
+            for observer in self.observers:
+                observer.after_steps(self)
+
+    def frame(self, frame_ms=FRAME_MS):
+        """
+        Runs the sketch during a frame of the GUI: one loop with the real
+        time clock, and as many loops as fit in frame_ms of real time
+        with the simulated one. The robot is drawn as it is at the end
+        Arguments:
+            frame_ms: the real time of the frame, in milliseconds
+        """
+        if self.run_log is not None:
+            self.run_log.frame()
+        if self.runner is not None:
+            self.runner.sync()
+            self.advance()
+        elif self.coroutines:
+            end = self.__perf_counter() + frame_ms / 1000
+            self.advance()
+            ended = self.resume(end)
+            while ended and not self.clock.real_time and self.__perf_counter() < end and not self.is_finished():
+                ended = self.resume(end)
+        elif self.clock.real_time:
+            self.advance()
+            self.loop()
+        else:
+            end = self.__perf_counter() + frame_ms / 1000
+            while self.__perf_counter() < end and not self.is_finished():
+                self.run_loop()
+        self.layer.set_rendering(True)
+
+    def run(self, sketch, duration_ms, console=None, clock=None):
+        """
+        Runs a sketch without GUI for an amount of simulated time
+        Arguments:
+            sketch: the compiled sketch
+            duration_ms: the simulated time to run, in milliseconds
+            console: the console used by Serial
+            clock: the clock of the sketch, a simulated one if None
+        """
+        self.prepare(console, robot_state.SimulatedClock() if clock is None else clock)
+        self.load(sketch)
+        self.setup()
+        while self.time_ms < duration_ms and not self.is_finished():
+            if self.coroutines:
+                self.resume(end_ms=duration_ms)
+            else:
+                self.run_loop()
+        self.layer.set_rendering(True)
+
+    def run_loop(self):
+        """
+        Runs one loop of the sketch, which lasts at least one step, and
+        advances the physics up to its end
+        """
+        start = self.clock.now_ms()
+        self.loop()
+        self.clock.wait(start + self.step_ms - self.clock.now_ms())
+        self.advance()
+
+    def resume(self, end=None, end_ms=None):
+        """
+        Resumes the coroutine of the sketch, starting a new loop if the
+        last one has ended, and advances the physics at every yield
+        point, until the loop ends. A loop lasts at least one step
+        Arguments:
+            end: the time (of time.perf_counter) at which the control is
+            given back to the GUI, also when the sketch waits with the
+            real time clock. If None it goes on until the loop ends
+            end_ms: the simulated time at which it stops, None to go on
+            until the loop ends
+        Returns:
+            True if the loop (or the setup) has ended
+        """
+        if not self.scheduler.is_running():
+            if self.keys_used or self.is_finished():
+                if not self.clock.real_time:
+                    self.clock.wait(self.step_ms)
+                self.advance()
+                return True
+            self.loop_start_ms = self.clock.now_ms()
+            self.reset_budget()
+            self.scheduler.start(self.module.loop(), self.loop_start_ms)
+        while True:
+            ended = False
+            if self.scheduler.is_waiting(self.clock):
+                self.reset_budget()
+                if self.clock.real_time and end is not None:
+                    return False
+                self.clock.wait(min(self.scheduler.remaining_ms(self.clock), self.step_ms))
+            else:
+                ended = self.scheduler.resume(self.clock)
+                self.__pause_profiler()
+            if ended and self.loop_start_ms is not None and not self.clock.real_time:
+                self.clock.wait(self.loop_start_ms + self.step_ms - self.clock.now_ms())
+            self.advance()
+            if ended:
+                self.__loop_ended()
+                return True
+            if end is not None and self.__perf_counter() >= end:
+                return False
+            if end_ms is not None and self.time_ms >= end_ms:
+                return False
+
+    def __set_clock(self, clock):
+        """
+        Changes the clock of the sketch
+        Arguments:
+            clock: the new clock
+        """
+        if self.run_log is not None:
+            clock = self.run_log.wrap_clock(clock)
+        self.clock = clock
+        standard.state.clock = clock
+        if self.recorder is not None:
+            self.recorder.clock = clock
+
+    def __loop_ended(self):
+        """
+        Lets the checkpointer know that a loop (or the setup) of the
+        sketch has ended, so its globals can be saved
+        """
+        if self.checkpointer is not None:
+            self.checkpointer.loop_ended(self)
+
+    def __pause_profiler(self):
+        """
+        Pauses the profiler, if there is one, when the sketch gives the
+        control back
+        """
+        if self.profiler is not None:
+            self.profiler.pause()
+
+    def __perf_counter(self):
+        """
+        Returns:
+            the time of the host, in seconds (see time.perf_counter),
+            from the run log if there is one
+        """
+        if self.run_log is not None:
+            return self.run_log.perf_counter()
+        return time.perf_counter()
+
+    def __new_clock(self, time_ms=0):
+        if self.time_scale is None:
+            return robot_state.SimulatedClock(time_ms)
+        return robot_state.RealTimeClock(self.time_scale, time_ms)
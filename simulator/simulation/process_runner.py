@@ -0,0 +1,384 @@
+"""
+Runs a sketch in a child process, so a sketch that never returns (or
+computes for too long) cannot stall the GUI, and it can be killed at
+once.
+
+The child process has no elements: the pins of the board of the robot
+are mirrored in a block of shared memory (a PinTable). The sketch
+writes the values of its outputs (e.g. the angle of a servo) in the
+table, and the GUI, once per frame, gives them to the elements of the
+robot, lets the physics advance, and writes back the values of the
+inputs (e.g. the light sensors) for the sketch to read. What the
+sketch writes to Serial is sent through a queue, and so are its
+errors, at their position in the sketch.
+
+Only the boards that keep their elements in used_pins (the ones of the
+robots) can be mirrored, and only numeric values.
+"""
+
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+import libraries.standard as standard
+import libraries.serial as serial
+import robot_components.boards as boards
+import robot_components.robot_state as robot_state
+import compiler.compile_cache as compile_cache
+import compiler.source_map as source_map
+import output.console as console
+
+# The values kept for every pin in the table
+INPUT_VALUE = 0
+OUTPUT_VALUE = 1
+OUTPUT_COUNT = 2
+MODE = 3
+PULSE = 4
+SLOTS = 5
+
+STOP_TIMEOUT_S = 1
+
+
+class PinTable:
+    """
+    Values of the pins of a board, in shared memory
+    """
+
+    def __init__(self, n_pins, name=None):
+        """
+        Constructor for the pin table
+        Arguments:
+            n_pins: the number of pins (the highest pin plus one)
+            name: the name of the shared memory to attach to, None to
+            create it
+        """
+        self.n_pins = n_pins
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=n_pins * SLOTS * 8)
+        self.values = self.memory.buf.cast("d")
+        if name is None:
+            for i in range(len(self.values)):
+                self.values[i] = 0
+
+    def get_name(self):
+        """
+        Returns:
+            the name of the shared memory
+        """
+        return self.memory.name
+
+    def get(self, pin, slot):
+        """
+        Reads a value of a pin
+        Arguments:
+            pin: the pin
+            slot: the value to read (INPUT_VALUE, OUTPUT_VALUE...)
+        Returns:
+            the value, as an int if it has no decimals
+        """
+        value = self.values[pin * SLOTS + slot]
+        return int(value) if value.is_integer() else value
+
+    def set(self, pin, slot, value):
+        """
+        Writes a value of a pin. Values that are not numbers are ignored
+        Arguments:
+            pin: the pin
+            slot: the value to write (INPUT_VALUE, OUTPUT_VALUE...)
+            value: the value
+        """
+        try:
+            self.values[pin * SLOTS + slot] = value
+        except TypeError:
+            pass
+
+    def write_output(self, pin, value):
+        """
+        Writes the value of an output, counting the writes so the other
+        process knows there is a new one
+        Arguments:
+            pin: the pin
+            value: the value
+        """
+        self.set(pin, OUTPUT_VALUE, value)
+        self.set(pin, OUTPUT_COUNT, self.get(pin, OUTPUT_COUNT) + 1)
+
+    def close(self, unlink=False):
+        """
+        Detaches from the shared memory
+        Arguments:
+            unlink: True to also free it (only the process that created it)
+        """
+        self.values.release()
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+class SharedElement:
+    """
+    Stands for an element of the robot in the child process
+    """
+
+    def __init__(self, table: PinTable, pin):
+        """
+        Constructor for the shared element
+        Arguments:
+            table: the pin table
+            pin: the pin of the element
+        """
+        self.table = table
+        self.pin = pin
+        self.min = 544
+        self.max = 2400
+        self.written = None
+
+    @property
+    def value(self):
+        if self.written is not None:
+            return self.written
+        return self.table.get(self.pin, INPUT_VALUE)
+
+    @value.setter
+    def value(self, value):
+        self.written = value
+        self.table.write_output(self.pin, value)
+
+    def get_value(self, pin=-1):
+        return self.table.get(self.pin if pin == -1 else pin, INPUT_VALUE)
+
+    def set_value(self, pin, value):
+        self.table.write_output(pin, value)
+        return True
+
+    def get_pulse(self, pin, value=1):
+        return self.table.get(pin, PULSE)
+
+
+class SharedBoard(boards.Board):
+    """
+    Board of the child process, whose pins are the ones of the table
+    """
+
+    def __init__(self, table: PinTable, pins, used_pins):
+        """
+        Constructor for the shared board
+        Arguments:
+            table: the pin table
+            pins: the pins of the board of the robot, by type
+            used_pins: the modes of its used pins, by pin
+        """
+        super().__init__()
+        self.table = table
+        self.pins = pins
+        for pin, mode in used_pins.items():
+            self.used_pins[pin] = {"element": SharedElement(table, pin), "mode": mode}
+        self.compile_pins()
+
+    def write_value(self, pin, value):
+        if pin in self.used_pins and self.modes[pin] == self.OUTPUT:
+            self.table.write_output(pin, value)
+            return True
+        return False
+
+    def set_pin_mode(self, pin, mode):
+        if super().set_pin_mode(pin, mode):
+            self.table.set(pin, MODE, mode)
+            return True
+        return False
+
+
+class QueueConsole:
+    """
+    Console of the child process, which sends what the sketch writes
+    to the GUI
+    """
+
+    def __init__(self, messages, inputs):
+        """
+        Constructor for the queue console
+        Arguments:
+            messages: the queue of messages to the GUI
+            inputs: the queue of inputs from the GUI
+        """
+        self.messages = messages
+        self.inputs = inputs
+        self.input_msgs = []
+
+    def begin(self, speed):
+        self.messages.put(("begin", speed))
+
+    def write_output(self, message):
+        self.messages.put(("output", message))
+
+    def get_read_bytes(self):
+        self.__receive()
+        return sum(len(str(msg)) for msg in self.input_msgs)
+
+    def read(self):
+        self.__receive()
+        if len(self.input_msgs) == 0:
+            return -1
+        msg = str(self.input_msgs[0])
+        if len(msg) > 1:
+            self.input_msgs[0] = msg[1:]
+        else:
+            self.input_msgs.pop(0)
+        return msg[0]
+
+    def __receive(self):
+        try:
+            while True:
+                self.input_msgs.append(self.inputs.get_nowait())
+        except queue.Empty:
+            pass
+
+
+def run_sketch(script, table_name, n_pins, pins, used_pins, scale, messages, inputs, sketch_map=None):
+    """
+    Entry point of the child process: runs the setup and then the loop
+    of the sketch until it exits
+    Arguments:
+        script: the Python code of the sketch (not compiled as coroutines)
+        table_name: the name of the shared memory of the pin table
+        n_pins: the number of pins of the table
+        pins: the pins of the board, by type
+        used_pins: the modes of the used pins, by pin
+        scale: how many times faster than real time the clock goes
+        messages: the queue of messages to the GUI
+        inputs: the queue of inputs from the GUI
+        sketch_map: the source map of the sketch, None if there is none
+    """
+    table = PinTable(n_pins, table_name)
+    standard.board = SharedBoard(table, pins, used_pins)
+    standard.state = robot_state.State(robot_state.RealTimeClock(scale))
+    serial.cons = QueueConsole(messages, inputs)
+    try:
+        module = compile_cache.CacheEntry([], [], None, script).new_module()
+        module.setup()
+        while not standard.state.exited:
+            module.loop()
+    except Exception as e:
+        error = source_map.runtime_error(e, sketch_map)
+        messages.put(("error", (error.line, error.column, error.message)))
+    finally:
+        table.close()
+
+
+class ProcessRunner:
+
+    def __init__(self, board: boards.Board, cons=None):
+        """
+        Constructor for the process runner
+        Arguments:
+            board: the board of the robot
+            cons: the console where the messages of the sketch are written
+        """
+        self.board = board
+        self.cons = cons
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.table = None
+        self.messages = None
+        self.inputs = None
+        self.counts = {}
+
+    def start(self, script, scale=1, sketch_map=None):
+        """
+        Starts running a sketch in a child process
+        Arguments:
+            script: the Python code of the sketch (not compiled as coroutines)
+            scale: how many times faster than real time the clock of the
+            sketch goes
+            sketch_map: the source map of the sketch, None if there is none
+        """
+        self.stop()
+        pins = {key: list(value) for key, value in self.board.pins.items()}
+        n_pins = max([pin for values in pins.values() for pin in values] + list(self.board.used_pins)) + 1
+        self.table = PinTable(n_pins)
+        self.counts = {pin: 0 for pin in self.board.used_pins}
+        self.__write_inputs()
+        used_pins = {pin: used["mode"] for pin, used in self.board.used_pins.items()}
+        for pin, mode in used_pins.items():
+            self.table.set(pin, MODE, mode)
+        self.messages = self.context.Queue()
+        self.inputs = self.context.Queue()
+        self.process = self.context.Process(
+            target=run_sketch, daemon=True,
+            args=(script, self.table.get_name(), n_pins, pins, used_pins, scale, self.messages, self.inputs,
+                  sketch_map))
+        self.process.start()
+
+    def is_alive(self):
+        """
+        Returns:
+            True if the sketch is running
+        """
+        return self.process is not None and self.process.is_alive()
+
+    def sync(self):
+        """
+        Exchanges the values of the pins with the sketch: its outputs are
+        given to the elements and the values of the elements are written
+        as its inputs. It also shows the messages of the sketch. If the
+        board has a recorder, the outputs are recorded as they arrive
+        """
+        if self.table is None:
+            return
+        recorder = self.board.recorder
+        for pin, used in self.board.used_pins.items():
+            count = self.table.get(pin, OUTPUT_COUNT)
+            if count != self.counts.get(pin):
+                self.counts[pin] = count
+                value = self.table.get(pin, OUTPUT_VALUE)
+                used["element"].set_value(pin, value)
+                if recorder is not None:
+                    recorder.record(pin, value)
+            self.board.set_pin_mode(pin, self.table.get(pin, MODE))
+        self.__write_inputs()
+        self.__receive_messages()
+        self.__send_inputs()
+
+    def stop(self):
+        """
+        Kills the sketch, if it is running, and frees the pin table
+        """
+        if self.process is not None:
+            self.process.kill()
+            self.process.join(STOP_TIMEOUT_S)
+            self.process = None
+        if self.messages is not None:
+            self.__receive_messages()
+            self.messages.cancel_join_thread()
+            self.inputs.cancel_join_thread()
+            self.messages = None
+            self.inputs = None
+        if self.table is not None:
+            self.table.close(unlink=True)
+            self.table = None
+
+    def __write_inputs(self):
+        for pin, used in self.board.used_pins.items():
+            element = used["element"]
+            self.table.set(pin, INPUT_VALUE, element.get_value(pin))
+            self.table.set(pin, PULSE, element.get_pulse(pin, 1))
+
+    def __receive_messages(self):
+        try:
+            while True:
+                kind, message = self.messages.get_nowait()
+                if self.cons is None:
+                    continue
+                if kind == "output":
+                    self.cons.write_output(message)
+                elif kind == "begin":
+                    self.cons.begin(message)
+                else:
+                    self.cons.write_error(console.Error("Error de ejecución", *message))
+        except queue.Empty:
+            pass
+
+    def __send_inputs(self):
+        if self.cons is None:
+            return
+        while self.cons.input_msgs:
+            self.inputs.put(self.cons.input_msgs.pop(0))
@@ -0,0 +1,92 @@
+"""
+Profiler of the lines of a sketch. A sketch compiled to be profiled
+(see transpiler.build) calls it before every one of its lines, and it
+counts how many times each line runs and adds up the time of the host
+until the next line starts. The engine pauses it whenever the sketch
+gives the control back (its setup or loop returns, or its coroutine
+yields), so the waits of the coroutines are not counted.
+
+The time of a line includes the calls it makes to the libraries, and
+the time of a loop or an if includes the evaluation of its condition.
+"""
+
+import time
+from array import array
+
+TOP_LINES = 5
+
+
+class LineProfiler:
+
+    def __init__(self):
+        """
+        Constructor for the line profiler
+        """
+        self.hits = array("Q")
+        self.times = array("d")
+        self.current = None
+        self.start = 0
+
+    def clear(self):
+        """
+        Forgets the counts and times, when a new run starts
+        """
+        self.hits = array("Q")
+        self.times = array("d")
+        self.current = None
+
+    def line(self, number):
+        """
+        Called when a line of the sketch starts, which ends the last one
+        Arguments:
+            number: the line
+        """
+        now = time.perf_counter()
+        if self.current is not None:
+            self.times[self.current] += now - self.start
+        if number >= len(self.hits):
+            missing = number + 1 - len(self.hits)
+            self.hits.extend([0] * missing)
+            self.times.extend([0.0] * missing)
+        self.hits[number] += 1
+        self.current = number
+        self.start = now
+
+    def pause(self):
+        """
+        Ends the line that is running, when the sketch gives the
+        control back
+        """
+        if self.current is not None:
+            self.times[self.current] += time.perf_counter() - self.start
+            self.current = None
+
+    def lines(self):
+        """
+        Returns:
+            the lines that have run, as tuples of the line, its count and
+            its time in seconds, in the order of the sketch
+        """
+        return [(number, self.hits[number], self.times[number])
+                for number in range(len(self.hits)) if self.hits[number] > 0]
+
+    def total(self):
+        """
+        Returns:
+            the time of all the lines, in seconds
+        """
+        return sum(self.times)
+
+    def report(self, top=TOP_LINES):
+        """
+        Describes the lines that take the most time
+        Arguments:
+            top: the number of lines described
+        Returns:
+            a list of messages, one per line
+        """
+        total = self.total()
+        lines = sorted(self.lines(), key=lambda line: line[2], reverse=True)[:top]
+        return ["Línea {}: {} veces, {:.1f} ms ({:.0f} %)".format(
+            number, hits, seconds * 1000, seconds / total * 100 if total > 0 else 0)
+            for number, hits, seconds in lines]
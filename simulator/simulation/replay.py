@@ -0,0 +1,506 @@
+"""
+Record and replay of the runs of the GUI. A run only depends on the
+sketch, on the initial state of the robot and on what comes from
+outside of the simulation: the seed of random, the times of the host
+(read by the real time clocks and by the frames of the engine), the
+keys, the joystick and the Serial input of the user, and the changes
+of the time scale. A RunRecorder, given to the engine as its run log,
+keeps all of them in a compact binary stream (a gzip file of records
+of a tag byte and a fixed struct, except the Serial input).
+
+A Replayer reads the stream and runs the sketch again, giving back the
+same times, keys and inputs at the same points, so the run is the same
+to the last bit. It never sleeps, so it needs no GUI and goes as fast
+as the host can.
+
+The simulated clock does not depend on the host, so only the seed, the
+frames and the inputs are recorded with it. The runs in a child process
+(see simulation.process_runner) cannot be recorded.
+"""
+
+import gzip
+import json
+import random
+import struct
+import time
+
+import compiler.source_map as source_map
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import output.console as console
+import robot_components.robot_state as robot_state
+import simulation.engine as engine
+
+MAGIC = b"SRUN"
+VERSION = 1
+
+# The header: magic, version, seed, compiled as coroutines and time scale
+# (0 when as fast as possible). It is followed by the size of the setup
+# (code, robot and its initial state, as JSON) and the setup
+HEADER = struct.Struct("<4sBQ?d")
+SIZE = struct.Struct("<I")
+
+# The tags of the records
+TIME = 1
+FRAME = 2
+KEYS = 3
+TIME_SCALE = 4
+JOYSTICK = 5
+SERIAL = 6
+
+RECORDS = {
+    TIME: struct.Struct("<d"),
+    FRAME: struct.Struct("<"),
+    KEYS: struct.Struct("<H"),
+    TIME_SCALE: struct.Struct("<d"),
+    JOYSTICK: struct.Struct("<Bd"),
+    SERIAL: SIZE
+}
+# The records of what the user does, which happen between the others
+EVENTS = (TIME_SCALE, JOYSTICK, SERIAL)
+
+KEYS_ORDER = "wasdWASD"
+JOYSTICK_ELEMENTS = ["dx", "dy", "button"]
+
+
+class ReplayError(Exception):
+    """
+    Raised when a recording cannot be read or does not match the run
+    """
+    pass
+
+
+class ReplayEnded(Exception):
+    """
+    Raised when the run goes on after the end of the recording
+    """
+    pass
+
+
+class LoggedClock(robot_state.RealTimeClock):
+    """
+    Real time clock that takes the times of the host from a run log
+    """
+
+    def __init__(self, run_log, scale=1, time_ms=0):
+        """
+        Constructor for the logged clock
+        Arguments:
+            run_log: the run log
+            scale: how many times faster than the host the time goes
+            time_ms: the time at which the clock starts
+        """
+        self.run_log = run_log
+        super().__init__(scale, time_ms)
+
+    def _perf_counter(self):
+        return self.run_log.perf_counter()
+
+    def _sleep(self, seconds):
+        self.run_log.sleep(seconds)
+
+
+class RunLog:
+    """
+    What the engine records or replays of a run. By itself it lets the
+    run go on as if there was none
+    """
+
+    def start(self, engine):
+        """
+        Called when the engine prepares a new run
+        Arguments:
+            engine: the engine
+        """
+        pass
+
+    def wrap_clock(self, clock):
+        """
+        Gives the clock that the engine must use instead of one of its
+        clocks: the real time ones take the times of the host from the log
+        Arguments:
+            clock: the clock of the engine
+        Returns:
+            the clock to use
+        """
+        if not clock.real_time:
+            return clock
+        return LoggedClock(self, clock.scale, clock.base_ms)
+
+    def perf_counter(self):
+        """
+        Returns:
+            the time of the host, in seconds (see time.perf_counter)
+        """
+        return time.perf_counter()
+
+    def sleep(self, seconds):
+        """
+        Sleeps the host
+        Arguments:
+            seconds: the seconds to sleep
+        """
+        time.sleep(seconds)
+
+    def frame(self):
+        """
+        Called when the engine starts a frame
+        """
+        pass
+
+    def keys(self, engine):
+        """
+        Called when the engine has read the keys of the user
+        Arguments:
+            engine: the engine
+        """
+        pass
+
+    def time_scale(self, time_scale):
+        """
+        Called when the time scale of the engine changes
+        Arguments:
+            time_scale: the new time scale, None if as fast as possible
+        """
+        pass
+
+
+def get_time_scale(scale):
+    """
+    Gets a time scale as the engine has it
+    Arguments:
+        scale: the time scale recorded, 0 if as fast as possible
+    Returns:
+        the time scale, None if as fast as possible
+    """
+    if scale == 0:
+        return None
+    return int(scale) if scale.is_integer() else scale
+
+
+def get_setup(code, layer):
+    """
+    Gets what a recording needs to build the layer of a run again
+    Arguments:
+        code: the code of the sketch
+        layer: the layer of the run, before it starts
+    Returns:
+        a dict of plain values
+    """
+    setup = {"code": code, "state": layer.get_state()}
+    if isinstance(layer, layers.MobileRobotLayer):
+        setup["robot"] = "mobile"
+        setup["n_sens"] = layer.n_sens
+        setup["circuit"] = layer.circuit_opt
+    elif isinstance(layer, layers.LinearActuatorLayer):
+        setup["robot"] = "actuator"
+    else:
+        raise ReplayError("Solo se pueden grabar las ejecuciones del robot móvil y del actuador lineal")
+    return setup
+
+
+def new_layer(setup):
+    """
+    Builds the layer of a recorded run as it was when the run started
+    Arguments:
+        setup: what the recording keeps of the layer (see get_setup)
+    Returns:
+        the layer
+    """
+    if setup["robot"] == "mobile":
+        layer = layers.MobileRobotLayer(setup["n_sens"])
+        if setup["circuit"] is not None:
+            layer.set_circuit(setup["circuit"])
+    else:
+        layer = layers.LinearActuatorLayer()
+    layer.execute()
+    layer.set_state(setup["state"])
+    return layer
+
+
+class RunRecorder(RunLog):
+
+    def __init__(self, code, coroutines=True, seed=None):
+        """
+        Constructor for the run recorder
+        Arguments:
+            code: the code of the sketch that is run
+            coroutines: True if the sketch is compiled as coroutines
+            seed: the seed of random, a random one if None
+        """
+        self.code = code
+        self.coroutines = coroutines
+        self.seed = random.getrandbits(63) if seed is None else seed
+        self.data = None
+        self.last_keys = None
+        self.recording = False
+
+    def start(self, engine):
+        """
+        Starts recording a run, forgetting the last one: seeds random
+        and records the initial state of the layer of the engine
+        Arguments:
+            engine: the engine
+        """
+        random.seed(self.seed)
+        setup = json.dumps(get_setup(self.code, engine.layer), separators=(",", ":")).encode("utf-8")
+        scale = 0 if engine.time_scale is None else engine.time_scale
+        self.data = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.coroutines, scale))
+        self.data += SIZE.pack(len(setup)) + setup
+        self.last_keys = None
+        self.recording = True
+        self.keys(engine)
+
+    def finish(self):
+        """
+        Stops recording, keeping what has been recorded
+        """
+        self.recording = False
+
+    def perf_counter(self):
+        now = time.perf_counter()
+        self.__write(TIME, now)
+        return now
+
+    def frame(self):
+        self.__write(FRAME)
+
+    def keys(self, engine):
+        keys = int(engine.keys_used)
+        for i in range(len(KEYS_ORDER)):
+            if engine.move_WASD[KEYS_ORDER[i]]:
+                keys |= 2 << i
+        if keys != self.last_keys:
+            self.last_keys = keys
+            self.__write(KEYS, keys)
+
+    def time_scale(self, time_scale):
+        self.__write(TIME_SCALE, 0 if time_scale is None else time_scale)
+
+    def joystick(self, elem, value):
+        """
+        Records a change of the joystick
+        Arguments:
+            elem: what changes ("dx", "dy" or "button")
+            value: its new value
+        """
+        self.__write(JOYSTICK, JOYSTICK_ELEMENTS.index(elem), value)
+
+    def serial_input(self, text):
+        """
+        Records an input of Serial
+        Arguments:
+            text: the text sent to the sketch
+        """
+        if self.recording:
+            text = str(text).encode("utf-8")
+            self.__write(SERIAL, len(text))
+            self.data += text
+
+    def save(self, path):
+        """
+        Saves the last run recorded
+        Arguments:
+            path: the path of the file
+        """
+        if self.data is None:
+            raise ReplayError("No se ha grabado ninguna ejecución")
+        with gzip.open(path, "wb") as file:
+            file.write(self.data)
+
+    def __write(self, tag, *values):
+        if self.recording:
+            self.data.append(tag)
+            self.data += RECORDS[tag].pack(*values)
+
+
+class ReplayConsole:
+    """
+    Console of a replayed run, which keeps what the sketch writes
+    """
+
+    def __init__(self):
+        """
+        Constructor for the replay console
+        """
+        self.outputs = []
+        self.errors = []
+        self.input_msgs = []
+
+    def begin(self, speed):
+        pass
+
+    def write_output(self, message):
+        self.outputs.append(message)
+
+    def write_error(self, error):
+        self.errors.append(error.to_string())
+
+    def input(self, message):
+        self.input_msgs.append(message)
+
+    def get_read_bytes(self):
+        return sum(len(str(msg)) for msg in self.input_msgs)
+
+    def read(self):
+        if len(self.input_msgs) == 0:
+            return -1
+        msg = str(self.input_msgs[0])
+        if len(msg) > 1:
+            self.input_msgs[0] = msg[1:]
+        else:
+            self.input_msgs.pop(0)
+        return msg[0]
+
+
+class Replayer(RunLog):
+
+    def __init__(self, path):
+        """
+        Constructor for the replayer
+        Arguments:
+            path: the path of a recording (see RunRecorder.save)
+        Raises:
+            ReplayError: if it is not a recording
+        """
+        with gzip.open(path, "rb") as file:
+            data = file.read()
+        try:
+            magic, version, self.seed, self.coroutines, scale = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                raise ReplayError("El fichero no es una grabación de una ejecución")
+            start = HEADER.size + SIZE.size
+            end = start + SIZE.unpack_from(data, HEADER.size)[0]
+            self.setup = json.loads(data[start:end].decode("utf-8"))
+            self.records = self.__read_records(data, end)
+        except (struct.error, ValueError) as e:
+            raise ReplayError("La grabación está dañada: {}".format(e))
+        self.time_scale_start = get_time_scale(scale)
+        self.position = 0
+        self.engine = None
+        self.console = ReplayConsole()
+
+    def run(self):
+        """
+        Runs the recorded run again, as the GUI does, until the end of
+        the recording or an error of the sketch, which is written in
+        the console
+        Returns:
+            the engine, whose layer has the robot as it was at the end
+        """
+        simulation = engine.SimulationEngine(new_layer(self.setup))
+        simulation.set_time_scale(self.time_scale_start)
+        simulation.set_run_log(self)
+        self.position = 0
+        try:
+            simulation.prepare(self.console)
+            simulation.load(transpiler.build(self.setup["code"], coroutines=self.coroutines))
+            if self.__setup(simulation):
+                while self.__has_records():
+                    simulation.frame()
+        except ReplayEnded:
+            pass
+        except engine.LoopBudgetExceeded as e:
+            self.__error(str(e), e.line)
+        except ReplayError:
+            raise
+        except Exception as e:
+            self.console.write_error(source_map.runtime_error(e, simulation.source_map))
+        simulation.layer.set_rendering(True)
+        return simulation
+
+    def start(self, engine):
+        self.engine = engine
+        random.seed(self.seed)
+        self.keys(engine)
+
+    def perf_counter(self):
+        return self.__take(TIME)[0]
+
+    def sleep(self, seconds):
+        pass
+
+    def frame(self):
+        self.__take(FRAME)
+
+    def keys(self, engine):
+        self.__apply_events()
+        if self.position < len(self.records) and self.records[self.position][0] == KEYS:
+            keys = self.__take(KEYS)[0]
+            engine.keys_used = bool(keys & 1)
+            engine.move_WASD = {KEYS_ORDER[i]: bool(keys & 2 << i) for i in range(len(KEYS_ORDER))}
+
+    def __setup(self, simulation):
+        """
+        Runs the setup of the sketch as the GUI does (see
+        compiler.commands.Setup)
+        Returns:
+            True if the loop can run
+        """
+        try:
+            simulation.setup()
+        except (ReplayEnded, ReplayError):
+            raise
+        except engine.LoopBudgetExceeded as e:
+            self.__error(str(e), e.line)
+            return False
+        except Exception as e:
+            self.console.write_error(source_map.runtime_error(e, simulation.source_map))
+        return True
+
+    def __has_records(self):
+        self.__apply_events()
+        return self.position < len(self.records)
+
+    def __take(self, tag):
+        """
+        Takes the next record, which must be of a tag
+        Raises:
+            ReplayEnded: if there are no more records
+            ReplayError: if the next record is of another tag
+        """
+        self.__apply_events()
+        if self.position >= len(self.records):
+            raise ReplayEnded()
+        record = self.records[self.position]
+        if record[0] != tag:
+            raise ReplayError("La ejecución no coincide con la grabación (registro {})".format(self.position))
+        self.position += 1
+        return record[1:]
+
+    def __apply_events(self):
+        """
+        Applies what the user did at this point of the run
+        """
+        while self.position < len(self.records) and self.records[self.position][0] in EVENTS:
+            record = self.records[self.position]
+            self.position += 1
+            if record[0] == TIME_SCALE:
+                self.engine.set_time_scale(get_time_scale(record[1]))
+            elif record[0] == JOYSTICK:
+                value = int(record[2]) if record[2].is_integer() else record[2]
+                self.engine.layer.robot.move_joystick(JOYSTICK_ELEMENTS[record[1]], value)
+            else:
+                self.console.input(record[1])
+
+    def __error(self, message, line=0):
+        self.console.write_error(console.Error("Error de ejecución", line, 0, message))
+
+    @staticmethod
+    def __read_records(data, position):
+        records = []
+        while position < len(data):
+            tag = data[position]
+            record = RECORDS.get(tag)
+            if record is None:
+                raise ReplayError("La grabación está dañada: registro desconocido {}".format(tag))
+            values = record.unpack_from(data, position + 1)
+            position += 1 + record.size
+            if tag == SERIAL:
+                text = data[position:position + values[0]]
+                if len(text) != values[0]:
+                    raise ReplayError("La grabación está dañada: entrada de Serial incompleta")
+                values = (text.decode("utf-8"),)
+                position += len(text)
+            records.append((tag,) + values)
+        return records
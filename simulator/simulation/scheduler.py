@@ -0,0 +1,85 @@
+"""
+Scheduler of the coroutines of a sketch. When a sketch is compiled
+as coroutines (see compiler.code_generator.CodeGenerator), its setup
+and loop are generators that yield the milliseconds they have to wait
+in every delay, and 0 at the end of every iteration of their loops and
+before every Serial read. Instead of blocking, the scheduler remembers
+until when the sketch waits, and it is resumed only once the clock of
+the simulation gets there, so the GUI keeps responding meanwhile.
+"""
+
+
+class Scheduler:
+
+    def __init__(self):
+        """
+        Constructor for the scheduler
+        """
+        self.coroutine = None
+        self.wake_ms = 0
+
+    def start(self, coroutine, now_ms):
+        """
+        Starts running a coroutine (the setup or a loop of the sketch)
+        Arguments:
+            coroutine: the coroutine
+            now_ms: the time of the clock
+        """
+        self.coroutine = coroutine
+        self.wake_ms = now_ms
+
+    def stop(self):
+        """
+        Drops the coroutine that is running
+        """
+        if self.coroutine is not None:
+            self.coroutine.close()
+        self.coroutine = None
+
+    def is_running(self):
+        """
+        Returns:
+            True if a coroutine has been started and has not ended
+        """
+        return self.coroutine is not None
+
+    def is_waiting(self, clock):
+        """
+        Checks if the coroutine is in a delay
+        Arguments:
+            clock: the clock of the simulation
+        Returns:
+            True if it cannot be resumed yet
+        """
+        return self.coroutine is not None and clock.now_ms() < self.wake_ms
+
+    def remaining_ms(self, clock):
+        """
+        Arguments:
+            clock: the clock of the simulation
+        Returns:
+            the milliseconds until the coroutine can be resumed
+        """
+        return max(0, self.wake_ms - clock.now_ms())
+
+    def resume(self, clock):
+        """
+        Runs the coroutine up to its next yield point
+        Arguments:
+            clock: the clock of the simulation
+        Returns:
+            True if the coroutine has ended
+        """
+        try:
+            wait_ms = self.coroutine.send(None)
+        except StopIteration:
+            self.coroutine = None
+            return True
+        except Exception:
+            self.coroutine = None
+            raise
+        if wait_ms:
+            self.wake_ms = clock.now_ms() + wait_ms
+        else:
+            clock.tick()
+        return False
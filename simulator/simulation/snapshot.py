@@ -0,0 +1,251 @@
+"""
+Snapshots of a run: the state of the robot (the pose of its drawing,
+the values of its elements and the modes of the pins of its board),
+the globals of the sketch and the time of its clock, as plain values,
+so they are cheap to take and can be saved in a small file (JSON
+compressed with zlib).
+
+A snapshot is only taken when a loop of the sketch has ended, so the
+globals are not halfway through a loop. A run goes on from a snapshot
+with the loop of the sketch (see SimulationEngine.restore), and the
+sketch can have changed: the globals that still exist take their
+values, and the objects of the libraries (e.g. a Servo) are attached
+again to the elements they were attached to.
+
+A Checkpointer, given to the engine, takes a snapshot every few seconds
+of simulated time and keeps the last ones.
+"""
+
+import json
+import types
+import zlib
+from collections import deque
+
+import libraries.standard as standard
+import robot_components.robot_state as robot_state
+
+MAGIC = b"SSNP"
+VERSION = 1
+
+INTERVAL_MS = 5000
+CAPACITY = 12
+
+
+class SnapshotError(Exception):
+    """
+    Raised when a snapshot cannot be read or restored
+    """
+    pass
+
+
+def is_plain(value):
+    """
+    Checks if a value can be saved as it is: a number, a string, None or
+    a list (e.g. an array of the sketch) of them
+    Arguments:
+        value: the value
+    Returns:
+        True if it is plain
+    """
+    if isinstance(value, (list, tuple)):
+        return all(is_plain(item) for item in value)
+    return value is None or isinstance(value, robot_state.PLAIN_TYPES)
+
+
+def get_globals(module, elements):
+    """
+    Gets the globals of a sketch: the plain ones as they are and the
+    objects of the libraries as their plain attributes and the elements
+    of the robot they refer to
+    Arguments:
+        module: the module of the sketch
+        elements: the elements of the robot, by name
+    Returns:
+        a dict with the globals, by name
+    """
+    names = {id(element): name for name, element in elements.items()}
+    sketch_globals = {}
+    for name, value in vars(module).items():
+        if name.startswith("__") or isinstance(value, (types.ModuleType, types.FunctionType, type)):
+            continue
+        if is_plain(value):
+            sketch_globals[name] = {"value": value}
+        elif hasattr(value, "__dict__"):
+            attributes = {}
+            references = {}
+            for attribute, attribute_value in vars(value).items():
+                if is_plain(attribute_value):
+                    attributes[attribute] = attribute_value
+                elif id(attribute_value) in names:
+                    references[attribute] = names[id(attribute_value)]
+            sketch_globals[name] = {"class": type(value).__name__, "attributes": attributes,
+                                    "elements": references}
+    return sketch_globals
+
+
+def set_globals(module, sketch_globals, elements):
+    """
+    Gives the globals of a sketch the values they had. The ones that no
+    longer exist, or are no longer of the same kind, are left as they are
+    Arguments:
+        module: the module of the sketch
+        sketch_globals: the globals, as given by get_globals
+        elements: the elements of the robot, by name
+    """
+    for name, saved in sketch_globals.items():
+        if not hasattr(module, name):
+            continue
+        current = getattr(module, name)
+        if "value" in saved:
+            if is_plain(current):
+                setattr(module, name, saved["value"])
+        elif type(current).__name__ == saved["class"]:
+            robot_state.set_attributes(current, saved["attributes"])
+            for attribute, element in saved["elements"].items():
+                setattr(current, attribute, elements[element])
+
+
+class Snapshot:
+
+    def __init__(self, robot, layer, sketch_globals, clock_ms, time_ms, steps, exec_time_us=0):
+        """
+        Constructor for the snapshot
+        Arguments:
+            robot: the name of the class of the layer of the robot
+            layer: the state of the layer (see Layer.get_state)
+            sketch_globals: the globals of the sketch (see get_globals)
+            clock_ms: the time of the clock of the sketch, in milliseconds
+            time_ms: the simulated time of the steps of the engine
+            steps: the number of steps of the engine
+            exec_time_us: the time until which the sketch is waiting
+            (see delayMicroseconds)
+        """
+        self.robot = robot
+        self.layer = layer
+        self.sketch_globals = sketch_globals
+        self.clock_ms = clock_ms
+        self.time_ms = time_ms
+        self.steps = steps
+        self.exec_time_us = exec_time_us
+
+    @staticmethod
+    def take(engine):
+        """
+        Takes a snapshot of the run of an engine
+        Arguments:
+            engine: the engine, with a sketch loaded
+        Returns:
+            the snapshot
+        """
+        elements = engine.layer.robot.get_elements()
+        return Snapshot(type(engine.layer).__name__, engine.layer.get_state(),
+                        get_globals(engine.module, elements), engine.clock.now_ms(),
+                        engine.time_ms, engine.steps, standard.state.exec_time_us)
+
+    def restore_sketch(self, engine):
+        """
+        Gives the sketch loaded in an engine the state it had
+        Arguments:
+            engine: the engine
+        """
+        set_globals(engine.module, self.sketch_globals, engine.layer.robot.get_elements())
+        standard.state.exec_time_us = self.exec_time_us
+
+    def check(self, layer):
+        """
+        Checks that the snapshot can be restored in a layer
+        Arguments:
+            layer: the layer
+        Raises:
+            SnapshotError: if it is of another robot
+        """
+        if (self.robot != type(layer).__name__
+                or set(self.layer["robot"]["elements"]) != set(layer.robot.get_elements())):
+            raise SnapshotError("La instantánea es de otro robot")
+
+    def to_bytes(self):
+        """
+        Returns:
+            the snapshot, compressed
+        """
+        data = json.dumps(vars(self), separators=(",", ":")).encode("utf-8")
+        return MAGIC + bytes([VERSION]) + zlib.compress(data)
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Reads a snapshot
+        Arguments:
+            data: the snapshot, as given by to_bytes
+        Returns:
+            the snapshot
+        Raises:
+            SnapshotError: if it is not a snapshot
+        """
+        if data[:len(MAGIC)] != MAGIC or data[len(MAGIC):len(MAGIC) + 1] != bytes([VERSION]):
+            raise SnapshotError("El fichero no es una instantánea de la simulación")
+        try:
+            return Snapshot(**json.loads(zlib.decompress(data[len(MAGIC) + 1:]).decode("utf-8")))
+        except (zlib.error, ValueError, TypeError) as e:
+            raise SnapshotError("La instantánea está dañada: {}".format(e))
+
+    def save(self, path):
+        """
+        Saves the snapshot in a file
+        Arguments:
+            path: the path of the file
+        """
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @staticmethod
+    def load(path):
+        """
+        Loads a snapshot from a file
+        Arguments:
+            path: the path of the file
+        Returns:
+            the snapshot
+        """
+        with open(path, "rb") as file:
+            return Snapshot.from_bytes(file.read())
+
+
+class Checkpointer:
+
+    def __init__(self, interval_ms=INTERVAL_MS, capacity=CAPACITY):
+        """
+        Constructor for the checkpointer
+        Arguments:
+            interval_ms: the simulated time between snapshots
+            capacity: the number of snapshots kept, the oldest ones are
+            forgotten
+        """
+        self.interval_ms = interval_ms
+        self.snapshots = deque(maxlen=capacity)
+        self.next_ms = 0
+
+    def clear(self):
+        """
+        Forgets all the snapshots, when a new run starts
+        """
+        self.snapshots.clear()
+        self.next_ms = 0
+
+    def loop_ended(self, engine):
+        """
+        Called when a loop of the sketch has ended: takes a snapshot if
+        it is time for one
+        Arguments:
+            engine: the engine
+        """
+        if engine.time_ms >= self.next_ms:
+            self.snapshots.append(Snapshot.take(engine))
+            self.next_ms = engine.time_ms + self.interval_ms
+
+    def last(self):
+        """
+        Returns:
+            the last snapshot, None if there are none
+        """
+        return self.snapshots[-1] if self.snapshots else None
@@ -0,0 +1,146 @@
+"""
+Recorder of the signals of the pins of a board. The board lets it know
+of every value written to (and read from) a pin, and it keeps only the
+transitions, with the time of the clock of the sketch, in a ring buffer
+of fixed size: once it is full the oldest transitions are overwritten,
+so it can stay on during a whole run with bounded memory and a constant
+cost per read or write.
+
+The transitions can be exported as a VCD file, to see them in a
+waveform viewer (e.g. GTKWave): the pins that only take the values 0
+and 1 as wires and the rest (e.g. the angles of the servos or the
+analog values) as real numbers.
+"""
+
+from array import array
+
+CAPACITY = 65536
+
+# The identifiers of the signals of a VCD file are printable characters
+FIRST_ID = 33
+LAST_ID = 126
+
+
+class TraceRecorder:
+
+    def __init__(self, capacity=CAPACITY, clock=None):
+        """
+        Constructor for the trace recorder
+        Arguments:
+            capacity: the number of transitions kept
+            clock: the clock of the sketch, which gives the time of the
+            transitions
+        """
+        self.capacity = capacity
+        self.clock = clock
+        self.times = array("d", bytes(8 * capacity))
+        self.pins = array("i", bytes(4 * capacity))
+        self.values = array("d", bytes(8 * capacity))
+        self.last = {}
+        self.next = 0
+        self.count = 0
+        self.total = 0
+
+    def clear(self):
+        """
+        Forgets all the transitions recorded
+        """
+        self.last = {}
+        self.next = 0
+        self.count = 0
+        self.total = 0
+
+    def record(self, pin, value):
+        """
+        Records the value of a pin if it is not the last one recorded
+        for it. Values that are not numbers are ignored
+        Arguments:
+            pin: the pin
+            value: the value written or read
+        """
+        if self.last.get(pin) == value:
+            return
+        i = self.next
+        try:
+            self.values[i] = value
+        except TypeError:
+            return
+        self.last[pin] = value
+        self.times[i] = self.clock.now_ms() if self.clock is not None else 0
+        self.pins[i] = pin
+        i += 1
+        self.next = 0 if i == self.capacity else i
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def dropped(self):
+        """
+        Returns:
+            the number of transitions overwritten because the buffer was
+            full
+        """
+        return self.total - self.count
+
+    def transitions(self):
+        """
+        Returns:
+            the transitions kept, from the oldest, as tuples of the time
+            (in milliseconds), the pin and the value
+        """
+        start = self.next - self.count
+        result = []
+        for i in range(start, self.next):
+            result.append((self.times[i], self.pins[i], self.__value(self.values[i])))
+        return result
+
+    def export_vcd(self, path, name="board"):
+        """
+        Writes the transitions kept in a VCD file, with a time scale of
+        one microsecond
+        Arguments:
+            path: the path of the file
+            name: the name of the module of the signals
+        """
+        transitions = self.transitions()
+        binary = {}
+        for time_ms, pin, value in transitions:
+            binary[pin] = binary.get(pin, True) and value in (0, 1)
+        ids = {pin: self.__id(i) for i, pin in enumerate(sorted(binary))}
+        with open(path, "w") as file:
+            file.write("$timescale 1us $end\n")
+            file.write("$scope module {} $end\n".format(name))
+            for pin in sorted(binary):
+                kind, size = ("wire", 1) if binary[pin] else ("real", 64)
+                file.write("$var {} {} {} pin{} $end\n".format(kind, size, ids[pin], pin))
+            file.write("$upscope $end\n")
+            file.write("$enddefinitions $end\n")
+            time_us = None
+            for time_ms, pin, value in transitions:
+                if round(time_ms * 1000) != time_us:
+                    time_us = round(time_ms * 1000)
+                    file.write("#{}\n".format(time_us))
+                if binary[pin]:
+                    file.write("{}{}\n".format(value, ids[pin]))
+                else:
+                    file.write("r{} {}\n".format(value, ids[pin]))
+
+    @staticmethod
+    def __value(value):
+        return int(value) if value.is_integer() else value
+
+    @staticmethod
+    def __id(index):
+        """
+        Gets the identifier of a signal of a VCD file
+        Arguments:
+            index: the number of the signal
+        Returns:
+            the identifier, of one or more printable characters
+        """
+        base = LAST_ID - FIRST_ID + 1
+        identifier = chr(FIRST_ID + index % base)
+        while index >= base:
+            index = index // base - 1
+            identifier = chr(FIRST_ID + index % base) + identifier
+        return identifier
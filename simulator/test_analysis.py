@@ -0,0 +1,75 @@
+import glob
+import unittest
+
+import compiler.analysis as analysis
+import compiler.ast_builder_visitor as ast_builder_visitor
+import compiler.code_generator as code_generator
+import compiler.front_end as front_end
+import compiler.semantical_errors as semantical_analysis
+import compiler.warnings as warnings
+import libraries.libs as libraries
+
+
+class TestAnalysisEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.front = front_end.FrontEnd()
+
+    def build_ast(self, file):
+        tree, errors = self.front.parse(open(file, encoding="utf-8").read())
+        if errors:
+            return None
+        return ast_builder_visitor.ASTBuilderVisitor().visitProgram(tree)
+
+    def separate_passes(self, file):
+        ast = self.build_ast(file)
+        lib_manager = libraries.LibraryManager()
+        semantic = semantical_analysis.Semantic(lib_manager)
+        semantic.execute(ast)
+        if semantic.errors:
+            return semantic.errors, [], None
+        function_definer = code_generator.FunctionDefiner()
+        function_definer.visit_program(ast, None)
+        warning_analysis = warnings.WarningAnalyzer()
+        warning_analysis.visit_program(ast, None)
+        return semantic.errors, warning_analysis.warnings, function_definer.functions
+
+    def fused_pass(self, file):
+        ast = self.build_ast(file)
+        engine = analysis.AnalysisEngine(libraries.LibraryManager())
+        engine.execute(ast)
+        functions = None
+        if not engine.errors:
+            functions = engine.get_rule(analysis.FunctionNamesRule).functions
+        return engine.errors, engine.warnings, functions
+
+    def assertSameDiagnostics(self, file):
+        try:
+            expected = self.separate_passes(file)
+        except Exception as e:
+            with self.assertRaises(type(e)):
+                self.fused_pass(file)
+            return
+        errors, warns, functions = self.fused_pass(file)
+        self.assertEqual([e.to_string() for e in expected[0]], [e.to_string() for e in errors])
+        self.assertEqual([w.to_string() for w in expected[1]], [w.to_string() for w in warns])
+        self.assertEqual(expected[2], functions)
+
+    def test_same_diagnostics(self):
+        for file in sorted(glob.glob("tests/*/*.txt")):
+            if self.build_ast(file) is not None:
+                with self.subTest(file=file):
+                    self.assertSameDiagnostics(file)
+
+    def test_nested_not_implemented(self):
+        errors, warns, functions = self.fused_pass("tests/warning-tests/nested.txt")
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(["Uso", "Uso", "No implementado", "No implementado",
+                          "No implementado", "No implementado", "Uso"], [w.r_type for w in warns])
+        self.assertEqual(warns[2].line, 15)
+        self.assertEqual(warns[2].column, 15)
+        self.assertEqual(warns[3].column, 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
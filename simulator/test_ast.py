@@ -1174,5 +1174,30 @@ class TestConversion(TestBaseAST):
         )
 
 
+class TestDispatch(unittest.TestCase):
+
+    class Visitor:
+
+        def visit_while(self, node, param):
+            return "while", param
+
+        def visit_int(self, node, param):
+            return "int", param
+
+    def test_visit_names(self):
+        self.assertEqual(WhileNode._visit_name, "visit_while")
+        self.assertEqual(DoWhileNode._visit_name, "visit_do_while")
+        self.assertEqual(IntNode._visit_name, "visit_int")
+        self.assertIsNone(ASTNode._visit_name)
+
+    def test_accept(self):
+        visitor = self.Visitor()
+        self.assertEqual(WhileNode().accept(visitor, 1), ("while", 1))
+        self.assertEqual(WhileNode().accept(visitor, 2), ("while", 2))
+        self.assertEqual(IntNode().accept(visitor, 3), ("int", 3))
+        with self.assertRaises(AttributeError):
+            DoWhileNode().accept(visitor, None)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import graphics.layers as layers
+import libraries.standard as standard
+import robot_components.boards as boards
+import robot_components.elements as elements
+
+
+class TestBoard(unittest.TestCase):
+
+    def setUp(self):
+        self.board = boards.BQzumBT328()
+
+    def tearDown(self):
+        standard.board = None
+
+    def test_pin_types(self):
+        self.assertTrue(self.board.is_digital(2))
+        self.assertTrue(self.board.is_digital(0))
+        self.assertFalse(self.board.is_digital(14))
+        self.assertTrue(self.board.is_analog(14))
+        self.assertTrue(self.board.is_txrx(1))
+        for pin in [-1, 20, 100, None, "A0"]:
+            self.assertFalse(self.board.is_digital(pin))
+            self.assertFalse(self.board.is_analog(pin))
+        self.assertTrue(boards.ArduinoUno().is_digital(13))
+        self.assertFalse(boards.ArduinoUno().is_digital(0))
+
+    def test_attach_and_detach(self):
+        element = elements.Element()
+        self.assertTrue(self.board.attach_pin(13, element))
+        self.assertFalse(self.board.attach_pin(13, elements.Element()))
+        self.assertFalse(self.board.attach_pin(30, elements.Element()))
+        self.assertIs(self.board.get_pin_element(13), element)
+        self.assertTrue(self.board.detach_pin(13))
+        self.assertIsNone(self.board.get_pin_element(13))
+        self.assertFalse(self.board.detach_pin(13))
+
+    def test_modes(self):
+        element = elements.Element()
+        element.value = 1
+        self.board.attach_pin(13, element)
+        self.assertEqual(self.board.read(13), 1)
+        self.assertFalse(self.board.write_value(13, 0))
+        self.assertTrue(self.board.set_pin_mode(13, boards.Board.OUTPUT))
+        self.assertEqual(self.board.used_pins[13]["mode"], boards.Board.OUTPUT)
+        self.assertIsNone(self.board.read(13))
+        self.assertTrue(self.board.write_value(13, 0))
+        self.assertEqual(element.value, 0)
+        self.assertEqual(self.board.get_pin_value(13), 0)
+        self.assertFalse(self.board.set_pin_mode(12, boards.Board.OUTPUT))
+
+    def test_standard_library(self):
+        robot = layers.MobileRobotLayer(2).robot
+        standard.board = robot.board
+        robot.set_light_sens_value([1, 0])
+        pins = [sensor.pin for sensor in robot.light_sensors]
+        self.assertEqual([standard.digital_read(pin) for pin in pins], [1, 0])
+        self.assertEqual(standard.digital_write(pins[0], standard.HIGH), standard.ERROR)
+        standard.pin_mode(pins[0], boards.Board.OUTPUT)
+        self.assertEqual(standard.digital_write(pins[0], standard.LOW), standard.OK)
+        self.assertEqual(robot.light_sensors[0].value, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import tempfile
+
+import compiler.compile_cache as compile_cache
+import compiler.transpiler as transpiler
+
+
+class TestCompileCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.cache = compile_cache.CompileCache(max_entries=2)
+
+    def test_key_changes(self):
+        key = self.cache.make_key("void setup(){}", ["Serial", "Servo"])
+        self.assertEqual(key, self.cache.make_key("void setup(){}", ["Servo", "Serial"]))
+        self.assertNotEqual(key, self.cache.make_key("void setup(){ }", ["Serial", "Servo"]))
+        self.assertNotEqual(key, self.cache.make_key("void setup(){}", ["Serial"]))
+
+    def test_lru_eviction(self):
+        for key in ("a", "b"):
+            self.cache.put(key, compile_cache.CacheEntry([], [], None, None))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.cache.put("c", compile_cache.CacheEntry([], [], None, None))
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertIsNotNone(self.cache.get("c"))
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = compile_cache.CompileCache(persist_dir=directory)
+            cache.put("a", compile_cache.CacheEntry(["w"], [], None, "x = 1"))
+            cache = compile_cache.CompileCache(persist_dir=directory)
+            entry = cache.get("a")
+            self.assertIsNotNone(entry)
+            self.assertEqual(entry.warnings, ["w"])
+            self.assertEqual(entry.script, "x = 1")
+
+
+class TestTranspileCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.code = open('tests/file-tests/arrays.txt', encoding="utf-8").read()
+        transpiler.cache.clear()
+
+    def test_hit(self):
+        warns, errors, ast = transpiler.transpile(self.code)
+        hits = transpiler.cache.hits
+        cached_warns, cached_errors, cached_ast = transpiler.transpile(self.code)
+        self.assertEqual(transpiler.cache.hits, hits + 1)
+        self.assertIs(cached_ast, ast)
+        self.assertEqual(cached_warns, warns)
+        self.assertEqual(cached_errors, errors)
+
+    def test_new_module(self):
+        code = open('tests/error-tests/blinking-ok.txt', encoding="utf-8").read()
+        sketch = transpiler.build(code)
+        module = sketch.new_module()
+        self.assertTrue(callable(module.setup))
+        self.assertTrue(callable(module.loop))
+        self.assertIsNot(module, sketch.new_module())
+
+    def test_errors_cached(self):
+        code = self.code + "\nint"
+        warns, errors, ast = transpiler.transpile(code)
+        self.assertTrue(len(errors) > 0)
+        self.assertEqual(transpiler.transpile(code)[1], errors)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,304 @@
+import os
+import unittest
+from math import cos, radians, sin
+from unittest import mock
+
+import graphics.huds as huds
+import graphics.image_cache as image_cache
+import graphics.layers as layers
+import graphics.raster as raster
+import graphics.robot_drawings as robot_drawings
+
+ASSETS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class FakeCanvas:
+    """
+    Canvas that keeps its items without drawing them
+    """
+
+    def __init__(self):
+        self.items = {}
+        self.next_item = 1
+        self.created = 0
+        self.configured = 0
+
+    def create_image(self, x, y, image=None, tags=None, **options):
+        item = self.next_item
+        self.next_item += 1
+        self.created += 1
+        self.items[item] = {"coords": [x, y], "image": image, "tags": tags}
+        return item
+
+    def create_text(self, x, y, **options):
+        return self.create_image(x, y, tags=options.get("tags"))
+
+    def create_rectangle(self, x0, y0, x1, y1, **options):
+        return self.create_image(x0, y0, tags=options.get("tags"))
+
+    def create_arc(self, x0, y0, x1, y1, **options):
+        return self.create_image(x0, y0, tags=options.get("tags"))
+
+    def find_withtag(self, tag):
+        return tuple(item for item, values in self.items.items() if values["tags"] == tag)
+
+    def itemconfigure(self, item, image=None):
+        self.configured += 1
+        self.items[item]["image"] = image
+
+    def coords(self, item, x, y):
+        self.items[item]["coords"] = [x, y]
+
+    def move(self, tag, dx, dy):
+        for item in self.find_withtag(tag):
+            self.items[item]["coords"][0] += dx
+            self.items[item]["coords"][1] += dy
+
+    def delete(self, *tags):
+        for tag in tags:
+            for item in self.find_withtag(tag) if tag != "all" else list(self.items):
+                del self.items[item]
+
+    def configure(self, **options):
+        pass
+
+    def tag_bind(self, *args):
+        pass
+
+
+class PhotoImage:
+    """
+    Stands for a PhotoImage, which needs a display
+    """
+
+    def __init__(self, image):
+        self.image = image
+
+    def width(self):
+        return self.image.width
+
+    def height(self):
+        return self.image.height
+
+
+class TestDrawing(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(ASSETS)
+        patcher = mock.patch("PIL.ImageTk.PhotoImage", PhotoImage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.layer = layers.MobileRobotLayer(2)
+        self.canvas = FakeCanvas()
+        self.layer.drawing.set_canvas(self.canvas)
+        self.layer.drawing.set_size(self.layer.robot_drawing.drawing_width,
+                                    self.layer.robot_drawing.drawing_height)
+        self.layer.execute()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def turn(self, turns):
+        for i in range(turns * 360 // 5):
+            self.layer.robot_drawing.change_angle(5)
+
+    def robot_item(self):
+        items = self.canvas.find_withtag("robot")
+        self.assertEqual(len(items), 1)
+        return self.canvas.items[items[0]]
+
+    def test_rotation_sprites(self):
+        item = self.robot_item()
+        self.turn(1)
+        misses = self.layer.drawing.image_cache.misses
+        self.turn(2)
+        # The second and third turns neither resample the images (of the
+        # robot and of the light sensors) nor create the item again
+        self.assertEqual(self.layer.drawing.image_cache.misses, misses)
+        self.assertIs(self.robot_item(), item)
+
+    def test_rotated_image(self):
+        self.layer.robot_drawing.change_angle(90)
+        image = self.robot_item()["image"].image
+        self.assertEqual(image.size, (int(584 * self.layer.drawing.scale), int(516 * self.layer.drawing.scale)))
+        self.assertEqual(self.layer.robot_drawing.angle % 360, 180)
+
+    def test_zoom_levels(self):
+        self.turn(1)
+        misses = self.layer.drawing.image_cache.misses
+        self.layer.zoom_in()
+        image = self.robot_item()["image"].image
+        self.assertEqual(image.size, (int(516 * self.layer.drawing.scale), int(584 * self.layer.drawing.scale)))
+        self.assertGreater(self.layer.drawing.image_cache.misses, misses)
+        # Going back to a zoom finds its images
+        misses = self.layer.drawing.image_cache.misses
+        self.layer.zoom_out()
+        self.assertEqual(self.layer.drawing.image_cache.misses, misses)
+
+    def test_items_kept(self):
+        created = self.canvas.created
+        items = {group: values["item"] for group, values in self.layer.drawing.canvas_images.items()}
+        self.turn(1)
+        self.layer.robot_drawing.repaint_light_sensors()
+        self.layer.robot_drawing.move(-20)
+        self.assertEqual(self.canvas.created, created)
+        for group, item in items.items():
+            self.assertEqual(self.canvas.find_withtag(group), (item,))
+
+    def test_zoom_forgets_items(self):
+        self.layer.zoom_in()
+        for group, values in self.layer.drawing.canvas_images.items():
+            self.assertEqual(self.canvas.find_withtag(group), (values["item"],))
+        created = self.canvas.created
+        self.turn(1)
+        self.assertEqual(self.canvas.created, created)
+
+    def test_hud_arrows(self):
+        hud = huds.MobileHUD()
+        canvas = FakeCanvas()
+        hud.set_canvas(canvas)
+        for vels in ([0, 0], [300, -300], [150, 50], [-150, 50]):
+            hud.set_wheel(vels)
+        arrows = canvas.find_withtag("arr_img")
+        self.assertEqual(len(arrows), 2)
+        self.assertIs(canvas.items[arrows[0]]["image"], hud.arrows[("mid", True)])
+        self.assertIs(canvas.items[arrows[1]]["image"], hud.arrows[("slow", False)])
+        hud.reboot()
+        hud.set_wheel([0, 0])
+        self.assertEqual(len(canvas.find_withtag("arr_img")), 2)
+
+    def test_hud_arrow_buckets(self):
+        hud = huds.MobileHUD()
+        canvas = FakeCanvas()
+        hud.set_canvas(canvas)
+        arrows = hud.arrows
+        self.assertEqual(len(arrows), 6)
+        self.assertEqual(arrows[("full", True)].image.size, arrows[("full", False)].image.size)
+        hud.set_wheel([150, -250])
+        configured = canvas.configured
+        # Velocities with the same arrows change nothing
+        for vel in range(101, 200, 7):
+            hud.set_wheel([vel, -vel - 100])
+        self.assertEqual(canvas.configured, configured)
+        hud.set_wheel([50, -250])
+        self.assertEqual(canvas.configured, configured + 1)
+        self.assertIs(hud.arrows, arrows)
+        self.assertEqual(huds.get_arrow(0), ("slow", False))
+        self.assertEqual(huds.get_arrow(-201), ("full", True))
+
+    def test_same_image_in_many_groups(self):
+        drawing = self.layer.drawing
+        for i in range(10):
+            drawing.draw_image({"x": i * 10, "y": 0, "image": "assets/point.png"}, "button{}".format(i))
+            drawing.redraw_image({"x": i * 10, "y": 0, "image": "assets/point.png"}, "button{}".format(i))
+        self.assertEqual(len(self.canvas.find_withtag("button9")), 1)
+        self.assertEqual(len([key for key in drawing.image_cache.entries if key[0] == "assets/point.png"]), 1)
+
+
+class TestCircuitRaster(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(ASSETS)
+        patcher = mock.patch("PIL.ImageTk.PhotoImage", PhotoImage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.layer = layers.MobileRobotLayer(2)
+        self.layer.set_circuit(0)
+        self.canvas = FakeCanvas()
+        self.layer.drawing.set_canvas(self.canvas)
+        self.layer.drawing.set_size(self.layer.robot_drawing.drawing_width,
+                                    self.layer.robot_drawing.drawing_height)
+        self.layer.execute()
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def circuit_items(self):
+        return self.canvas.find_withtag("circuit")
+
+    def test_render(self):
+        scale = 0.2
+        image, left, top = self.layer.circuit.raster.render(scale)
+        for part in self.layer.circuit.circuit_parts:
+            if isinstance(part, robot_drawings.Circuit.CircuitTurn):
+                # The middle of the turn, with the angles of Tk
+                angle = radians(part.starting_angle + part.angle / 2)
+                x = (part.x + part.width / 2 + part.radius * cos(angle)) * scale
+                y = (part.y + part.height / 2 - part.radius * sin(angle)) * scale
+            elif type(part) is robot_drawings.Circuit.CircuitStraight:
+                x = (part.x + part.width / 2) * scale
+                y = (part.y + part.height / 2) * scale
+            else:
+                continue
+            self.assertEqual(image.getpixel((int(x) - left, int(y) - top))[3], 255)
+
+    def test_single_item(self):
+        self.assertEqual(len(self.circuit_items()), 1)
+        shapes = len(self.layer.circuit.raster.shapes)
+        parts = len(self.layer.circuit.circuit_parts)
+        for zoom in (self.layer.zoom_in, self.layer.zoom_in, self.layer.zoom_out):
+            zoom()
+            self.assertEqual(len(self.circuit_items()), 1)
+        self.layer.execute()
+        self.assertEqual(len(self.circuit_items()), 1)
+        # The parts are not created again
+        self.assertEqual(len(self.layer.circuit.circuit_parts), parts)
+        self.assertEqual(len(self.layer.circuit.raster.shapes), shapes)
+
+    def test_rendered_once_per_zoom(self):
+        cache = self.layer.drawing.image_cache
+        self.layer.zoom_in()
+        self.layer.zoom_out()
+        misses = cache.misses
+        self.layer.zoom_in()
+        self.layer.zoom_out()
+        self.layer.execute()
+        self.assertEqual(cache.misses, misses)
+        keys = [key for key in cache.entries if key[0] is self.layer.circuit.raster]
+        self.assertEqual(len(keys), 2)
+
+    def test_too_big(self):
+        with mock.patch.object(raster, "MAX_PIXELS", 100):
+            self.layer.zoom_in()
+        self.assertEqual(len(self.circuit_items()), len(self.layer.circuit.raster.shapes))
+
+
+class TestImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        os.chdir(ASSETS)
+        patcher = mock.patch("PIL.ImageTk.PhotoImage", PhotoImage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+
+    def test_keys(self):
+        cache = image_cache.ImageCache()
+        image = cache.get("assets/mobile-robot.png", 0, 0.5)
+        self.assertEqual(image.image.size, (258, 292))
+        self.assertIs(cache.get("assets/mobile-robot.png", 360, 0.5), image)
+        self.assertIsNot(cache.get("assets/mobile-robot.png", 0, 0.2), image)
+        self.assertEqual(cache.get("assets/mobile-robot.png", -90, 0.5).image.size, (292, 258))
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+    def test_memory_cap(self):
+        one_image = 258 * 292 * 4
+        cache = image_cache.ImageCache(max_bytes=one_image * 3)
+        for angle in (0, 180, 0, 0, 180):
+            cache.get("assets/mobile-robot.png", angle, 0.5)
+        self.assertEqual(cache.misses, 2)
+        cache.get("assets/mobile-robot.png", 90, 0.5)
+        cache.get("assets/mobile-robot.png", 270, 0.5)
+        self.assertLessEqual(cache.bytes, cache.max_bytes)
+        self.assertEqual(len(cache), 3)
+        # The least recently used one has been evicted
+        self.assertNotIn(("assets/mobile-robot.png", 0, 0.5), cache.entries)
+        self.assertIn(("assets/mobile-robot.png", 180, 0.5), cache.entries)
+
+if __name__ == '__main__':
+    unittest.main()
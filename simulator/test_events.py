@@ -0,0 +1,82 @@
+import unittest
+
+import graphics.layers as layers
+import robot_components.elements as elements
+import robot_components.events as events
+
+
+class TestEventBus(unittest.TestCase):
+
+    def setUp(self):
+        self.bus = events.EventBus()
+        self.changes = []
+
+    def record(self, element, value):
+        self.changes.append((element, value))
+
+    def test_publish_on_change(self):
+        servo = elements.Servo()
+        self.bus.watch(servo)
+        self.bus.subscribe(servo, self.record)
+        servo.set_value(8, 180)
+        servo.set_value(8, 180)
+        servo.value = 0
+        servo.set_value(8, 200)
+        self.assertEqual(self.changes, [(servo, 180), (servo, 0)])
+        self.assertEqual(servo.get_value(), 0)
+
+    def test_unsubscribe(self):
+        light = elements.LightSensor()
+        self.bus.watch(light)
+        self.bus.subscribe(light, self.record)
+        self.bus.subscribe(light, self.record)
+        light.value = 1
+        self.bus.unsubscribe(light, self.record)
+        light.value = 0
+        self.assertEqual(self.changes, [(light, 1)])
+        self.assertEqual(self.bus.subscribers, {})
+
+    def test_not_watched(self):
+        button = elements.Button()
+        self.bus.subscribe(button, self.record)
+        button.value = 0
+        self.assertEqual(self.changes, [])
+
+
+class TestIdleFrames(unittest.TestCase):
+
+    def setUp(self):
+        self.layer = layers.MobileRobotLayer(2)
+        self.layer.set_circuit(0)
+        self.layer.execute()
+        self.keys = {key: False for key in "wasdWASD"}
+        self.updates = 0
+        set_wheel = self.layer.hud.set_wheel
+
+        def count_updates(vels):
+            self.updates += 1
+            set_wheel(vels)
+
+        self.layer.hud.set_wheel = count_updates
+
+    def test_idle_frames_are_skipped(self):
+        for i in range(5):
+            self.layer.move(False, self.keys)
+        self.assertEqual(self.updates, 1)
+
+    def test_servo_change_moves_robot(self):
+        self.layer.move(False, self.keys)
+        y = self.layer.robot_drawing.real_y
+        self.layer.robot.servo_left.set_value(8, 180)
+        self.layer.robot.servo_right.set_value(9, 0)
+        self.layer.move(False, self.keys)
+        self.assertNotEqual(self.layer.robot_drawing.real_y, y)
+        self.layer.robot.servo_left.set_value(8, 90)
+        self.layer.robot.servo_right.set_value(9, 90)
+        for i in range(5):
+            self.layer.move(False, self.keys)
+        self.assertEqual(self.updates, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
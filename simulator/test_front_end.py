@@ -0,0 +1,49 @@
+import unittest
+from antlr4 import *
+from compiler.ArduinoLexer import ArduinoLexer
+from compiler.ArduinoParser import ArduinoParser
+from compiler.error_listener import CompilerErrorListener
+import compiler.front_end as front_end
+
+
+class TestFrontEnd(unittest.TestCase):
+
+    def setUp(self):
+        self.front = front_end.FrontEnd()
+
+    def parse_ll(self, code):
+        lexer = ArduinoLexer(InputStream(code))
+        error_listener = CompilerErrorListener(False)
+        lexer.removeErrorListeners()
+        lexer.addErrorListener(error_listener)
+        parser = ArduinoParser(CommonTokenStream(lexer))
+        parser.removeErrorListeners()
+        parser.addErrorListener(error_listener)
+        return parser.program(), error_listener.errors
+
+    def assertSameErrors(self, file):
+        code = open(file, encoding="utf-8").read()
+        expected = self.parse_ll(code)[1]
+        errors = self.front.parse(code)[1]
+        self.assertEqual([e.to_string() for e in expected], [e.to_string() for e in errors])
+
+    def test_valid_sketch_sll(self):
+        tree, errors = self.front.parse(open("tests/error-tests/blinking-ok.txt", encoding="utf-8").read())
+        self.assertEqual(len(errors), 0)
+        self.assertEqual(self.front.sll_parses, 1)
+        self.assertEqual(self.front.ll_parses, 0)
+        self.assertEqual(tree.getText(), self.parse_ll(open("tests/error-tests/blinking-ok.txt",
+                                                            encoding="utf-8").read())[0].getText())
+
+    def test_syntax_errors_ll(self):
+        self.assertSameErrors("tests/error-tests/lex-syn.txt")
+        self.assertEqual(self.front.ll_parses, 1)
+
+    def test_reuse(self):
+        self.assertSameErrors("tests/error-tests/lex-syn.txt")
+        self.assertSameErrors("tests/error-tests/mixed-ok.txt")
+        self.assertSameErrors("tests/error-tests/lex-syn.txt")
+
+
+if __name__ == '__main__':
+    unittest.main()
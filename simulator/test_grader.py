@@ -0,0 +1,53 @@
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import grader
+
+
+class TestGrader(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        shutil.copy("codes/challenge1", os.path.join(self.directory, "correct.ino"))
+        shutil.copy("tests/error-tests/blinking-ok.txt", os.path.join(self.directory, "other.ino"))
+        os.mkdir(os.path.join(self.directory, "group"))
+        shutil.copy("tests/error-tests/lex-syn.txt", os.path.join(self.directory, "group", "wrong.txt"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_grade(self):
+        results = grader.grade(self.directory, 1, jobs=2)
+        self.assertEqual([os.path.basename(result["file"]) for result in results],
+                         ["correct.ino", "wrong.txt", "other.ino"])
+        correct, wrong, other = results
+        self.assertTrue(correct["passed"])
+        self.assertFalse(other["passed"])
+        self.assertTrue(other["compiles"])
+        self.assertFalse(other["code"])
+        self.assertFalse(wrong["compiles"])
+        self.assertGreater(len(wrong["errors"]), 0)
+
+    def test_csv(self):
+        results = grader.grade(self.directory, 1, jobs=1)
+        report = io.StringIO()
+        grader.write_csv(results, report)
+        lines = report.getvalue().splitlines()
+        self.assertEqual(lines[0], ",".join(grader.CSV_FIELDS))
+        self.assertEqual(len(lines), 4)
+
+    def test_without_gui(self):
+        code = "import sys; import grader; " \
+               "print(any(m.startswith(('tkinter', '_tkinter', 'PIL')) for m in sys.modules))"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                env=dict(os.environ, PYTHONPATH="simulator"))
+        self.assertEqual(output.stdout.strip(), "False")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+
+import compiler.transpiler as transpiler
+import graphics.screen_updater as screen_updater
+import simulation.engine as engine
+import simulation.profiler as profiler
+from test_simulation import CountingLayer
+
+SKETCH = "int n = 0;\n" \
+         "\n" \
+         "void setup() {\n" \
+         "  n = 0;\n" \
+         "}\n" \
+         "\n" \
+         "void loop() {\n" \
+         "  n = n + 1;\n" \
+         "  if (n % 4 == 0) {\n" \
+         "    n = n + 0;\n" \
+         "  } else if (n % 4 == 1) {\n" \
+         "    n = n + 0;\n" \
+         "  } else {\n" \
+         "    n = n + 0;\n" \
+         "  }\n" \
+         "  int i = 0;\n" \
+         "  while (i < 3) {\n" \
+         "    i = i + 1;\n" \
+         "  }\n" \
+         "  delay(10);\n" \
+         "}\n"
+
+
+class TestProfiler(unittest.TestCase):
+
+    def run_sketch(self, coroutines, duration_ms=1000):
+        simulation = engine.SimulationEngine(CountingLayer(), step_ms=10)
+        line_profiler = profiler.LineProfiler()
+        simulation.set_profiler(line_profiler)
+        simulation.run(transpiler.build(SKETCH, coroutines=coroutines, profile=True), duration_ms)
+        return simulation, {line[0]: line[1] for line in line_profiler.lines()}, line_profiler
+
+    def test_no_overhead_without_profiling(self):
+        for coroutines in (False, True):
+            script = transpiler.build(SKETCH, coroutines=coroutines).script
+            self.assertNotIn("screen_updater.line", script)
+            self.assertIn("screen_updater.line(8)", transpiler.build(SKETCH, coroutines=coroutines, profile=True).script)
+
+    def test_counts(self):
+        for coroutines in (False, True):
+            simulation, hits, line_profiler = self.run_sketch(coroutines)
+            loops = simulation.module.n
+            self.assertGreater(loops, 10)
+            self.assertEqual(hits[3], 1)
+            self.assertEqual(hits[7], loops)
+            self.assertEqual(hits[8], loops)
+            self.assertEqual(hits[10] + hits[12] + hits[14], loops)
+            self.assertEqual(hits[10], loops // 4)
+            # The condition of the loop is counted once more than its body
+            self.assertEqual(hits[18], 3 * loops)
+            self.assertEqual(hits[17], 4 * loops)
+            self.assertIsNone(line_profiler.current)
+
+    def test_report(self):
+        simulation, hits, line_profiler = self.run_sketch(True, 200)
+        self.assertGreater(line_profiler.total(), 0)
+        report = line_profiler.report(3)
+        self.assertEqual(len(report), 3)
+        self.assertTrue(report[0].startswith("Línea "))
+        line_profiler.clear()
+        self.assertEqual(line_profiler.lines(), [])
+
+    def test_profiled_without_profiler(self):
+        simulation = engine.SimulationEngine(CountingLayer(), step_ms=10)
+        simulation.run(transpiler.build(SKETCH, coroutines=True, profile=True), 100)
+        self.assertIsNone(screen_updater.profiler)
+        self.assertGreater(simulation.module.n, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import os
+import tempfile
+import time
+import unittest
+
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import simulation.engine as engine
+import simulation.replay as replay
+
+MOBILE_SKETCH = "#include <Servo.h>\n\nServo left;\nServo right;\nlong last = 0;\n\n" \
+                "void setup() {\n  Serial.begin(9600);\n  left.attach(8);\n  right.attach(9);\n}\n\n" \
+                "void loop() {\n  if (Serial.available() > 0) {\n    char c = Serial.read();\n" \
+                "    Serial.println(c);\n  }\n  if (millis() - last > 50) {\n    last = millis();\n" \
+                "    Serial.println(random(100));\n    left.write(180);\n    right.write(0);\n  }\n  delay(5);\n}\n"
+ACTUATOR_SKETCH = "#include <Servo.h>\n\nServo servo;\n\nvoid setup() {\n  Serial.begin(9600);\n" \
+                  "  servo.attach(8);\n}\n\nvoid loop() {\n  Serial.println(random(1000));\n  delay(10);\n}\n"
+
+
+class KeysObserver(engine.Observer):
+    """
+    Presses A, as the user does in the GUI, during some of the advances
+    """
+
+    def __init__(self, start, end):
+        self.advances = 0
+        self.start = start
+        self.end = end
+
+    def before_steps(self, simulation):
+        self.advances += 1
+        simulation.keys_used = self.start <= self.advances < self.end
+        simulation.move_WASD = {key: key == "a" and simulation.keys_used for key in "wasdWASD"}
+
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run.srun")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def record(self, layer, code, frames, events=None, time_scale=1):
+        """
+        Runs a sketch as the GUI does, recording it
+        Arguments:
+            layer: the layer of the robot
+            code: the code of the sketch
+            frames: the number of frames
+            events: what the user does, called before every frame with
+            the frame, the engine, the console and the recorder
+            time_scale: the time scale at the start
+        Returns:
+            the engine and the console
+        """
+        simulation = engine.SimulationEngine(layer)
+        simulation.set_time_scale(time_scale)
+        recorder = replay.RunRecorder(code)
+        simulation.set_run_log(recorder)
+        simulation.add_observer(KeysObserver(20, 30))
+        console = replay.ReplayConsole()
+        simulation.prepare(console)
+        simulation.load(transpiler.build(code, coroutines=True))
+        simulation.setup()
+        for i in range(frames):
+            if events is not None:
+                events(i, simulation, console, recorder)
+            simulation.frame()
+            if simulation.clock.real_time:
+                time.sleep(0.005)
+        recorder.finish()
+        recorder.save(self.path)
+        return simulation, console
+
+    def assert_replayed(self, simulation, console):
+        replayer = replay.Replayer(self.path)
+        replayed = replayer.run()
+        self.assertEqual(replayed.steps, simulation.steps)
+        self.assertEqual(replayed.time_ms, simulation.time_ms)
+        self.assertEqual(replayed.layer.get_state(), simulation.layer.get_state())
+        self.assertEqual(replayer.console.outputs, console.outputs)
+        self.assertEqual(replayer.console.errors, [])
+
+    def test_replay_mobile(self):
+        def events(frame, simulation, console, recorder):
+            if frame == 10:
+                console.input("ok")
+                recorder.serial_input("ok")
+            if frame == 40:
+                simulation.set_time_scale(4)
+
+        layer = layers.MobileRobotLayer(2)
+        layer.set_circuit(0)
+        layer.execute()
+        # The robot does not start where a new one does
+        layer.robot_drawing.change_angle(45)
+        simulation, console = self.record(layer, MOBILE_SKETCH, 60, events)
+        self.assertIn("o\n", console.outputs)
+        self.assertIn("k\n", console.outputs)
+        self.assert_replayed(simulation, console)
+
+    def test_replay_actuator(self):
+        def events(frame, simulation, console, recorder):
+            if frame == 10:
+                simulation.layer.robot.move_joystick("dx", 900)
+                recorder.joystick("dx", 900)
+            if frame == 20:
+                simulation.layer.robot.move_joystick("button", 0)
+                recorder.joystick("button", 0)
+
+        simulation, console = self.record(layers.LinearActuatorLayer(), ACTUATOR_SKETCH, 30, events)
+        self.assertEqual(simulation.layer.robot.joystick.dx, 900)
+        self.assert_replayed(simulation, console)
+
+    def test_replay_simulated_clock(self):
+        layer = layers.MobileRobotLayer(2)
+        simulation, console = self.record(layer, MOBILE_SKETCH, 10, time_scale=None)
+        self.assertGreater(simulation.steps, 10)
+        self.assert_replayed(simulation, console)
+
+    def test_keys_recorded_on_change(self):
+        layer = layers.MobileRobotLayer(2)
+        self.record(layer, MOBILE_SKETCH, 10, time_scale=None)
+        replayer = replay.Replayer(self.path)
+        keys = [record for record in replayer.records if record[0] == replay.KEYS]
+        # Not pressed, pressed and released
+        self.assertEqual(len(keys), 3)
+
+    def test_not_a_recording(self):
+        with open(self.path, "wb") as file:
+            file.write(b"no")
+        with self.assertRaises((replay.ReplayError, OSError)):
+            replay.Replayer(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
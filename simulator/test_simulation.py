@@ -0,0 +1,422 @@
+import inspect
+import time
+import types
+import unittest
+
+import compiler.transpiler as transpiler
+import graphics.drawing as drawing
+import graphics.layers as layers
+import libraries.standard as standard
+import robot_components.robot_state as robot_state
+import simulation.engine as engine
+import simulation.process_runner as process_runner
+
+SERVO_SKETCH = "#include <Servo.h>\n\nServo left;\nServo right;\n\n" \
+               "void setup() {\n  left.attach(8);\n  right.attach(9);\n  left.write(180);\n  right.write(0);\n}\n\n" \
+               "void loop() {\n  delay(20);\n}\n"
+LONG_DELAY_SKETCH = "void setup() {\n}\n\nvoid loop() {\n  delay(10000);\n}\n"
+BUSY_LOOP_SKETCH = "void setup() {\n}\n\nvoid loop() {\n  long t = millis();\n" \
+                   "  while (millis() - t < 100) {\n  }\n}\n"
+SERIAL_SKETCH = "int c = 0;\n\nvoid setup() {\n  Serial.begin(9600);\n}\n\nvoid loop() {\n" \
+                "  while (Serial.available() == 0) {\n  }\n  c = Serial.read();\n}\n"
+WAIT_INPUT_SKETCH = "int c = 0;\n\nvoid setup() {\n  Serial.begin(9600);\n}\n\nvoid loop() {\n" \
+                    "  while (Serial.available() == 0) {\n  }\n  c = Serial.read();\n  exit(0);\n}\n"
+CONTINUE_LOOP_SKETCH = "void setup() {\n}\n\nvoid loop() {\n  long t = millis();\n  int i = 0;\n" \
+                       "  while (millis() - t < 100) {\n    i = i + 1;\n    if (i > 0) {\n      continue;\n" \
+                       "    }\n  }\n}\n"
+RUNAWAY_SKETCH = "void setup() {\n}\n\nvoid loop() {\n  while (true) {\n  }\n}\n"
+RUNAWAY_CONTINUE_SKETCH = "int x = 0;\n\nvoid setup() {\n}\n\nvoid loop() {\n  while (true) {\n    x++;\n" \
+                          "    if (x > 0) {\n      continue;\n    }\n  }\n}\n"
+WAITING_LOOP_SKETCH = "void setup() {\n}\n\nvoid loop() {\n  int i = 0;\n  while (i < 5) {\n" \
+                      "    delay(100);\n    i = i + 1;\n  }\n}\n"
+ERROR_SKETCH = "void setup() {\n  Serial.begin(9600);\n  Serial.println(\"hola\");\n  int x = 1 / 0;\n}\n\n" \
+               "void loop() {\n}\n"
+
+
+class CountingLayer:
+
+    def __init__(self):
+        self.moves = 0
+        self.robot = types.SimpleNamespace(board=None)
+
+        self.rendered = []
+
+    def move(self, using_keys, move_WASD):
+        self.moves += 1
+
+    def set_rendering(self, rendering):
+        self.rendered.append(rendering)
+
+
+class InputConsole:
+
+    def __init__(self, text, available_ms, clock):
+        self.text = list(text)
+        self.available_ms = available_ms
+        self.clock = clock
+
+    def begin(self, speed):
+        pass
+
+    def get_read_bytes(self):
+        return len(self.text) if self.clock.now_ms() >= self.available_ms else 0
+
+    def read(self):
+        return ord(self.text.pop(0)) if self.text else -1
+
+
+class RecordingConsole:
+
+    def __init__(self):
+        self.outputs = []
+        self.errors = []
+        self.input_msgs = []
+
+    def begin(self, speed):
+        pass
+
+    def write_output(self, message):
+        self.outputs.append(message)
+
+    def write_error(self, error):
+        self.errors.append(error.to_string())
+
+
+class RecordingCanvas:
+
+    def __init__(self):
+        self.moves = []
+
+    def move(self, group, dx, dy):
+        self.moves.append((group, dx, dy))
+
+
+class TestSimulationEngine(unittest.TestCase):
+
+    def test_fixed_steps(self):
+        layer = CountingLayer()
+        simulation = engine.SimulationEngine(layer, step_ms=10)
+        for i in range(3):
+            simulation.step()
+        self.assertEqual(layer.moves, 3)
+        self.assertEqual(simulation.time_ms, 30)
+
+    def test_max_steps(self):
+        layer = CountingLayer()
+        simulation = engine.SimulationEngine(layer, step_ms=10, max_steps=4)
+        simulation.clock = robot_state.RealTimeClock(1, 1000)
+        simulation.advance()
+        self.assertEqual(layer.moves, 4)
+        self.assertEqual(simulation.time_ms, 1000)
+
+    def test_simulated_catch_up(self):
+        layer = CountingLayer()
+        simulation = engine.SimulationEngine(layer, step_ms=10, max_steps=4)
+        simulation.clock = robot_state.SimulatedClock()
+        simulation.clock.wait(1005)
+        simulation.advance()
+        self.assertEqual(layer.moves, 100)
+        self.assertEqual(simulation.time_ms, 1000)
+
+    def test_observers(self):
+        events = []
+
+        class Recorder(engine.Observer):
+            def before_steps(self, simulation):
+                events.append("before")
+
+            def after_steps(self, simulation):
+                events.append("after")
+
+        simulation = engine.SimulationEngine(CountingLayer(), step_ms=10)
+        simulation.clock = robot_state.SimulatedClock()
+        simulation.add_observer(Recorder())
+        simulation.advance()
+        simulation.clock.wait(10)
+        simulation.advance()
+        self.assertEqual(events, ["before", "before", "after"])
+
+    def test_headless_mobile_robot(self):
+        sketch = transpiler.build(SERVO_SKETCH)
+        self.assertEqual(len(sketch.errors), 0)
+        layer = layers.MobileRobotLayer(2)
+        layer.set_circuit(2)
+        layer.execute()
+        self.assertIsNone(layer.drawing.canvas)
+        simulation = engine.SimulationEngine(layer)
+        simulation.run(sketch, 200)
+        self.assertEqual(simulation.steps, 13)
+        self.assertEqual(layer.robot_drawing.real_x, 500)
+        self.assertEqual(layer.robot_drawing.real_y, 500 + 18 * 13)
+
+    def test_real_time_run(self):
+        sketch = transpiler.build(SERVO_SKETCH)
+        layer = layers.MobileRobotLayer(2)
+        simulation = engine.SimulationEngine(layer)
+        start = time.perf_counter()
+        simulation.run(sketch, 100, clock=robot_state.RealTimeClock())
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+        self.assertEqual(layer.robot_drawing.real_y, 500 + 18 * simulation.steps)
+
+    def test_long_delay(self):
+        sketch = transpiler.build(LONG_DELAY_SKETCH)
+        simulation = engine.SimulationEngine(CountingLayer())
+        start = time.perf_counter()
+        simulation.run(sketch, 60000)
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual(simulation.steps, 3750)
+        self.assertEqual(simulation.clock.millis(), 60000)
+
+    def test_busy_loop(self):
+        sketch = transpiler.build(BUSY_LOOP_SKETCH)
+        simulation = engine.SimulationEngine(CountingLayer())
+        simulation.run(sketch, 1000)
+        self.assertEqual(simulation.clock.millis(), 1100)
+        self.assertEqual(simulation.steps, 68)
+
+    def test_render_every(self):
+        layer = CountingLayer()
+        simulation = engine.SimulationEngine(layer, step_ms=10)
+        simulation.set_time_scale(4)
+        simulation.clock = robot_state.SimulatedClock()
+        simulation.clock.wait(80)
+        simulation.advance()
+        self.assertEqual(layer.rendered, [False, False, False, True] * 2)
+
+    def test_change_time_scale(self):
+        simulation = engine.SimulationEngine(CountingLayer())
+        simulation.set_time_scale(None)
+        simulation.prepare()
+        self.assertFalse(simulation.clock.real_time)
+        simulation.clock.wait(5000)
+        simulation.set_time_scale(16)
+        self.assertTrue(simulation.clock.real_time)
+        self.assertIs(standard.state.clock, simulation.clock)
+        self.assertEqual(simulation.clock.scale, 16)
+        self.assertGreaterEqual(simulation.clock.millis(), 5000)
+        self.assertEqual(simulation.render_every, 16)
+        standard.state = None
+
+    def test_fast_forward_frame(self):
+        sketch = transpiler.build(SERVO_SKETCH)
+        layer = layers.MobileRobotLayer(2)
+        simulation = engine.SimulationEngine(layer)
+        simulation.set_time_scale(None)
+        simulation.prepare()
+        simulation.load(sketch)
+        simulation.setup()
+        simulation.frame(50)
+        self.assertGreater(simulation.steps, 50)
+        self.assertTrue(layer.drawing.rendering)
+        standard.state = None
+
+
+class TestCoroutines(unittest.TestCase):
+
+    def tearDown(self):
+        standard.state = None
+
+    def test_generated_coroutines(self):
+        sketch = transpiler.build(SERVO_SKETCH, coroutines=True)
+        self.assertIn("(yield 20)", sketch.script)
+        self.assertIsNot(sketch, transpiler.build(SERVO_SKETCH))
+        module = sketch.new_module()
+        self.assertTrue(inspect.isgeneratorfunction(module.setup))
+        self.assertTrue(inspect.isgeneratorfunction(module.loop))
+
+    def test_same_simulation(self):
+        positions = []
+        for coroutines in [False, True]:
+            layer = layers.MobileRobotLayer(2)
+            simulation = engine.SimulationEngine(layer)
+            simulation.run(transpiler.build(SERVO_SKETCH, coroutines=coroutines), 1000)
+            positions.append((simulation.steps, layer.robot_drawing.real_y))
+        self.assertEqual(positions[0], positions[1])
+
+    def test_stops_inside_a_loop(self):
+        simulation = engine.SimulationEngine(CountingLayer())
+        simulation.run(transpiler.build(BUSY_LOOP_SKETCH, coroutines=True), 1000)
+        self.assertEqual(simulation.steps, 63)
+        self.assertLess(simulation.clock.millis(), 1100)
+        self.assertTrue(simulation.scheduler.is_running())
+
+    def test_stops_inside_a_loop_that_continues(self):
+        simulation = engine.SimulationEngine(CountingLayer())
+        simulation.run(transpiler.build(CONTINUE_LOOP_SKETCH, coroutines=True), 1000)
+        self.assertEqual(simulation.steps, 63)
+        self.assertLess(simulation.clock.millis(), 1100)
+        self.assertTrue(simulation.scheduler.is_running())
+
+    def test_frame_does_not_block(self):
+        layer = CountingLayer()
+        simulation = engine.SimulationEngine(layer)
+        simulation.prepare()
+        simulation.load(transpiler.build(LONG_DELAY_SKETCH, coroutines=True))
+        simulation.setup()
+        start = time.perf_counter()
+        for i in range(3):
+            simulation.frame(20)
+            time.sleep(0.02)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertTrue(simulation.scheduler.is_waiting(simulation.clock))
+        self.assertGreater(layer.moves, 0)
+
+    def test_serial_read(self):
+        simulation = engine.SimulationEngine(CountingLayer())
+        clock = robot_state.SimulatedClock()
+        console = InputConsole("A", 500, clock)
+        simulation.run(transpiler.build(SERIAL_SKETCH, coroutines=True), 1000, console, clock)
+        self.assertEqual(simulation.module.c, ord("A"))
+        self.assertGreaterEqual(simulation.steps, 500 // simulation.step_ms)
+
+
+class TestLoopBudget(unittest.TestCase):
+
+    def tearDown(self):
+        standard.state = None
+
+    def test_runaway_loop(self):
+        for coroutines in [False, True]:
+            simulation = engine.SimulationEngine(CountingLayer(), max_busy_ms=100)
+            with self.assertRaises(engine.LoopBudgetExceeded) as raised:
+                simulation.run(transpiler.build(RUNAWAY_SKETCH, coroutines=coroutines), 60000)
+            self.assertEqual(raised.exception.line, 5)
+            self.assertIn("línea 5", str(raised.exception))
+            self.assertLess(simulation.clock.millis(), 200)
+
+    def test_runaway_loop_with_continue(self):
+        for coroutines in [False, True]:
+            simulation = engine.SimulationEngine(CountingLayer(), max_busy_ms=100)
+            with self.assertRaises(engine.LoopBudgetExceeded) as raised:
+                simulation.run(transpiler.build(RUNAWAY_CONTINUE_SKETCH, coroutines=coroutines), 60000)
+            self.assertEqual(raised.exception.line, 7)
+            self.assertLess(simulation.clock.millis(), 200)
+
+    def test_max_iterations(self):
+        simulation = engine.SimulationEngine(CountingLayer(), max_iterations=50)
+        with self.assertRaises(engine.LoopBudgetExceeded) as raised:
+            simulation.run(transpiler.build(BUSY_LOOP_SKETCH), 1000)
+        self.assertEqual(raised.exception.line, 6)
+        self.assertEqual(simulation.iterations, 51)
+
+    def test_input_resets_budget(self):
+        for coroutines in [False, True]:
+            simulation = engine.SimulationEngine(CountingLayer(), max_busy_ms=100)
+            clock = robot_state.SimulatedClock()
+            console = InputConsole("A", 500, clock)
+            simulation.run(transpiler.build(WAIT_INPUT_SKETCH, coroutines=coroutines), 1000, console, clock)
+            self.assertEqual(simulation.module.c, ord("A"))
+            self.assertGreaterEqual(clock.now_ms(), 500)
+
+    def test_delay_resets_budget(self):
+        for coroutines in [False, True]:
+            simulation = engine.SimulationEngine(CountingLayer(), max_busy_ms=150)
+            simulation.run(transpiler.build(WAITING_LOOP_SKETCH, coroutines=coroutines), 1000)
+            self.assertGreaterEqual(simulation.clock.millis(), 1000)
+
+
+class TestProcessRunner(unittest.TestCase):
+
+    def setUp(self):
+        self.layer = layers.MobileRobotLayer(2)
+        self.console = RecordingConsole()
+        self.simulation = engine.SimulationEngine(self.layer)
+        self.simulation.prepare(self.console)
+
+    def tearDown(self):
+        self.simulation.stop_process()
+        standard.state = None
+
+    def run_frames(self, condition, timeout=10):
+        end = time.perf_counter() + timeout
+        while not condition() and time.perf_counter() < end:
+            self.simulation.frame()
+            time.sleep(0.01)
+
+    def test_pin_table(self):
+        table = process_runner.PinTable(4)
+        other = process_runner.PinTable(4, table.get_name())
+        other.write_output(2, 180)
+        other.set(3, process_runner.INPUT_VALUE, 0.5)
+        self.assertEqual(table.get(2, process_runner.OUTPUT_VALUE), 180)
+        self.assertEqual(table.get(2, process_runner.OUTPUT_COUNT), 1)
+        self.assertEqual(table.get(3, process_runner.INPUT_VALUE), 0.5)
+        other.close()
+        table.close(unlink=True)
+
+    def test_servo_robot(self):
+        self.simulation.start_process(transpiler.build(SERVO_SKETCH))
+        self.run_frames(lambda: self.layer.robot_drawing.real_y > 500)
+        self.assertGreater(self.layer.robot_drawing.real_y, 500)
+        self.assertEqual(self.layer.robot.servo_left.get_value(), 180)
+        self.assertFalse(self.simulation.is_finished())
+
+    def test_kill_runaway_sketch(self):
+        self.simulation.start_process(transpiler.build(RUNAWAY_SKETCH))
+        runner = self.simulation.runner
+        start = time.perf_counter()
+        self.simulation.frame()
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertTrue(runner.is_alive())
+        start = time.perf_counter()
+        self.simulation.stop_process()
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertFalse(runner.is_alive())
+
+    def test_output_and_errors(self):
+        self.simulation.start_process(transpiler.build(ERROR_SKETCH))
+        self.run_frames(lambda: self.console.errors)
+        self.assertEqual(self.console.outputs, ["hola\n"])
+        self.assertEqual(len(self.console.errors), 1)
+        self.assertIn("ZeroDivisionError", self.console.errors[0])
+        self.assertIn("[l=4, col=2]", self.console.errors[0])
+
+
+class TestDeferredDrawing(unittest.TestCase):
+
+    def test_pending_moves(self):
+        robot_drawing = drawing.Drawing()
+        robot_drawing.canvas = RecordingCanvas()
+        robot_drawing.canvas_images["robot"] = {"x": 0, "y": 0}
+        robot_drawing.set_rendering(False)
+        robot_drawing.move_image("robot", 100, 100)
+        robot_drawing.move_image("robot", 200, 50)
+        self.assertEqual(robot_drawing.canvas.moves, [])
+        robot_drawing.set_rendering(True)
+        self.assertEqual(robot_drawing.canvas.moves, [("robot", 40, 10)])
+        robot_drawing.move_image("robot", 250, 50)
+        self.assertEqual(robot_drawing.canvas.moves[-1], ("robot", 10, 0))
+
+
+class TestClocks(unittest.TestCase):
+
+    def tearDown(self):
+        standard.state = None
+
+    def test_simulated_clock(self):
+        standard.state = robot_state.State(robot_state.SimulatedClock())
+        standard.delay(1500)
+        standard.delay_microseconds(250)
+        self.assertEqual(standard.millis(), 1500)
+        self.assertEqual(standard.micros(), 1500000)
+        self.assertEqual(standard.state.exec_time_us, 1500250)
+
+    def test_real_time_clock_sleeps(self):
+        standard.state = robot_state.State()
+        start = time.perf_counter()
+        cpu = time.process_time()
+        standard.delay(200)
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+        self.assertLess(time.process_time() - cpu, 0.1)
+        self.assertGreaterEqual(standard.millis(), 200)
+
+    def test_scaled_clock(self):
+        clock = robot_state.RealTimeClock(4, 1000)
+        start = time.perf_counter()
+        clock.delay(400, lambda: None)
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertGreaterEqual(clock.millis(), 1400)
+
+
+if __name__ == '__main__':
+    unittest.main()
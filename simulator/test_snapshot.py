@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import simulation.engine as engine
+import simulation.replay as replay
+import simulation.snapshot as snapshot
+
+SKETCH = "#include <Servo.h>\n\nServo left;\nServo right;\nint turns = 0;\nint history[3] = {0, 0, 0};\n\n" \
+         "void setup() {\n  left.attach(8);\n  right.attach(9);\n  pinMode(2, INPUT);\n}\n\n" \
+         "void loop() {\n  turns = turns + 1;\n  history[0] = digitalRead(2);\n  history[1] = turns;\n" \
+         "  if (turns % 50 < 25) {\n    left.write(180);\n    right.write(0);\n  } else {\n" \
+         "    left.write(180);\n    right.write(180);\n  }\n  delay(20);\n}\n"
+CHANGED_SKETCH = SKETCH.replace("int history[3] = {0, 0, 0};\n", "").replace("  history[0] = digitalRead(2);\n  history[1] = turns;\n", "") \
+    .replace("right.write(180);", "right.write(90);")
+
+
+def new_engine(checkpointer=None):
+    layer = layers.MobileRobotLayer(2)
+    layer.set_circuit(1)
+    layer.execute()
+    simulation = engine.SimulationEngine(layer)
+    simulation.set_time_scale(None)
+    simulation.set_checkpointer(checkpointer)
+    return simulation
+
+
+def run_until(simulation, end_ms):
+    while simulation.time_ms < end_ms:
+        simulation.resume(end_ms=end_ms)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_checkpoints(self):
+        checkpointer = snapshot.Checkpointer(interval_ms=1000, capacity=3)
+        simulation = new_engine(checkpointer)
+        simulation.run(transpiler.build(SKETCH, coroutines=True), 10000)
+        self.assertEqual(len(checkpointer.snapshots), 3)
+        times = [taken.time_ms for taken in checkpointer.snapshots]
+        self.assertGreaterEqual(times[1] - times[0], 1000)
+        self.assertEqual(checkpointer.last().sketch_globals["left"]["elements"], {"servo": "servo_left"})
+
+    def test_go_on_from_snapshot(self):
+        sketch = transpiler.build(SKETCH, coroutines=True)
+        checkpointer = snapshot.Checkpointer(interval_ms=3000)
+        simulation = new_engine(checkpointer)
+        simulation.run(sketch, 4000)
+        taken = checkpointer.last()
+        self.assertLess(taken.time_ms, simulation.time_ms)
+        run_until(simulation, 8000)
+
+        restored = new_engine()
+        restored.restore(snapshot.Snapshot.from_bytes(taken.to_bytes()), sketch, replay.ReplayConsole())
+        self.assertEqual(restored.module.turns, taken.sketch_globals["turns"]["value"])
+        self.assertIs(restored.module.left.servo, restored.layer.robot.servo_left)
+        run_until(restored, 8000)
+        self.assertEqual(restored.steps, simulation.steps)
+        self.assertEqual(restored.module.turns, simulation.module.turns)
+        self.assertEqual(restored.module.history, simulation.module.history)
+        self.assertEqual(restored.layer.get_state(), simulation.layer.get_state())
+
+    def test_changed_sketch(self):
+        checkpointer = snapshot.Checkpointer(interval_ms=3000)
+        simulation = new_engine(checkpointer)
+        simulation.run(transpiler.build(SKETCH, coroutines=True), 4000)
+        restored = new_engine()
+        taken = checkpointer.last()
+        restored.restore(taken, transpiler.build(CHANGED_SKETCH, coroutines=True))
+        self.assertEqual(restored.module.turns, taken.sketch_globals["turns"]["value"])
+        self.assertFalse(hasattr(restored.module, "history"))
+        run_until(restored, 6000)
+        self.assertGreater(restored.module.turns, simulation.module.turns)
+
+    def test_other_robot(self):
+        checkpointer = snapshot.Checkpointer()
+        simulation = new_engine(checkpointer)
+        simulation.run(transpiler.build(SKETCH, coroutines=True), 100)
+        layer = layers.MobileRobotLayer(3)
+        with self.assertRaises(snapshot.SnapshotError):
+            engine.SimulationEngine(layer).restore(checkpointer.last(), transpiler.build(SKETCH, coroutines=True))
+
+    def test_save_and_load(self):
+        checkpointer = snapshot.Checkpointer()
+        simulation = new_engine(checkpointer)
+        simulation.run(transpiler.build(SKETCH, coroutines=True), 100)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run.snap")
+            checkpointer.last().save(path)
+            loaded = snapshot.Snapshot.load(path)
+            with open(path, "wb") as file:
+                file.write(b"not a snapshot")
+            with self.assertRaises(snapshot.SnapshotError):
+                snapshot.Snapshot.load(path)
+        self.assertEqual(vars(loaded), vars(checkpointer.last()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import re
+import unittest
+
+import compiler.source_map as source_map
+import compiler.transpiler as transpiler
+import simulation.engine as engine
+from simulation.replay import ReplayConsole
+from test_simulation import CountingLayer, ERROR_SKETCH
+
+FUNCTION_SKETCH = "int f(int a) {\n" \
+                  "  return 10 / a;\n" \
+                  "}\n" \
+                  "\n" \
+                  "int n = 3;\n" \
+                  "\n" \
+                  "void setup() {\n" \
+                  "}\n" \
+                  "\n" \
+                  "void loop() {\n" \
+                  "  n = n - 1;\n" \
+                  "  if (n > 5) {\n" \
+                  "    n = 1;\n" \
+                  "  } else if (10 / n > 1) {\n" \
+                  "    f(n - 2);\n" \
+                  "  }\n" \
+                  "  delay(10);\n" \
+                  "}\n"
+
+ELIF_SKETCH = FUNCTION_SKETCH.replace("f(n - 2);", "n = n - 1;")
+
+
+class TestSourceMap(unittest.TestCase):
+
+    def run_error(self, code, coroutines):
+        simulation = engine.SimulationEngine(CountingLayer(), step_ms=10)
+        try:
+            simulation.run(transpiler.build(code, coroutines=coroutines), 1000, ReplayConsole())
+        except ZeroDivisionError as e:
+            return source_map.runtime_error(e, simulation.source_map)
+        self.fail("The sketch has not failed")
+
+    def test_find(self):
+        lines = source_map.SourceMap()
+        lines.add(1, 0, 0)
+        lines.add(3, 2, 4)
+        lines.add(4, 2, 4)
+        lines.add(6, 5, 2)
+        lines.add(6, 6, 2)
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines.find(0), None)
+        self.assertEqual(lines.find(2), (0, 0))
+        self.assertEqual(lines.find(5), (2, 4))
+        self.assertEqual(lines.find(6), (6, 2))
+        self.assertEqual(lines.find(100), (6, 2))
+
+    def test_errors(self):
+        for coroutines in (False, True):
+            error = self.run_error(ERROR_SKETCH, coroutines)
+            self.assertEqual((error.line, error.column), (4, 2))
+            self.assertIn("ZeroDivisionError", error.message)
+            # The error is in the function, not in the loop that calls it
+            error = self.run_error(FUNCTION_SKETCH, coroutines)
+            self.assertEqual((error.line, error.column), (2, 2))
+            error = self.run_error(ELIF_SKETCH, coroutines)
+            self.assertEqual(error.line, 14)
+
+    def test_profiled_lines(self):
+        # Every line mark of a profiled sketch is mapped to its own line
+        with open(os.path.join(os.path.dirname(__file__), "..", "codes", "challenge1")) as file:
+            code = file.read()
+        for coroutines in (False, True):
+            sketch = transpiler.build(code, coroutines=coroutines, profile=True)
+            marks = 0
+            for number, generated in enumerate(sketch.script.splitlines(), 1):
+                mark = re.search(r"screen_updater\.line\((\d+)\)", generated)
+                if mark is not None:
+                    marks += 1
+                    self.assertEqual(sketch.source_map.find(number)[0], int(mark.group(1)))
+            self.assertGreater(marks, 0)
+
+    def test_outside_the_sketch(self):
+        self.assertEqual(source_map.runtime_error(ValueError("x")).line, 0)
+        try:
+            raise ValueError("x")
+        except ValueError as e:
+            self.assertIsNone(source_map.SourceMap().locate(e))
+
+
+if __name__ == '__main__':
+    unittest.main()
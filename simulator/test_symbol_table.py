@@ -0,0 +1,127 @@
+import unittest
+
+import compiler.ast as ast
+import compiler.symbol_table as symbol_table
+import compiler.transpiler as transpiler
+
+SHADOWING_SKETCH = """int speed = 90;
+int value = 1;
+int seen = 0;
+int inner = 0;
+int outer = 0;
+int local = 0;
+
+void setSpeed(int speed) {
+    seen = speed;
+}
+
+void setLocal() {
+    int value = 7;
+    local = value;
+}
+
+void setup() {
+    setSpeed(5);
+    setLocal();
+    int x = 1;
+    if (x > 0) {
+        int x = 2;
+        inner = x;
+    }
+    outer = x;
+    int n = 0;
+    while (n < 2) {
+        String value = "a";
+        n++;
+    }
+}
+
+void loop() {
+}
+"""
+
+
+class TestSymbolTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = symbol_table.SymbolTable()
+        self.function = ast.FunctionNode()
+        self.block = ast.WhileNode()
+
+    def test_scope_chain(self):
+        global_x = ast.DeclarationNode(ast.IntTypeNode(), "x")
+        local_x = ast.DeclarationNode(ast.IntTypeNode(), "x")
+        self.table.declare("x", global_x)
+        self.table.open_scope(self.function)
+        self.assertIs(self.table.lookup("x"), global_x)
+        self.assertIsNone(self.table.lookup_local("x"))
+        self.table.declare("x", local_x)
+        self.assertIs(self.table.lookup("x"), local_x)
+        self.table.close_scope()
+        self.assertIs(self.table.lookup("x"), global_x)
+
+    def test_reenter_scope(self):
+        self.table.open_scope(self.function)
+        self.table.open_scope(self.block)
+        block_y = ast.DeclarationNode(ast.IntTypeNode(), "y")
+        self.table.declare("y", block_y)
+        self.table.close_scope()
+        self.assertIsNone(self.table.lookup("y"))
+        self.table.close_scope()
+        self.table.open_scope(self.function)
+        self.table.open_scope(self.block)
+        self.assertIs(self.table.lookup("y"), block_y)
+        self.table.close_scope()
+        self.table.close_scope()
+        self.assertIs(self.table.current, self.table.globals)
+
+    def test_descriptors(self):
+        self.assertTrue(symbol_table.describe(ast.IntTypeNode()).integer)
+        self.assertTrue(symbol_table.describe(ast.FloatTypeNode()).numerical)
+        self.assertFalse(symbol_table.describe(ast.FloatTypeNode()).integer)
+        self.assertFalse(symbol_table.describe(ast.StringTypeNode()).numerical)
+        self.assertFalse(symbol_table.describe(None).numerical)
+
+
+class TestBlockScopes(unittest.TestCase):
+
+    def test_errors(self):
+        code = open("tests/error-tests/scopes.txt", encoding="utf-8").read()
+        warns, errors, ast_tree = transpiler.transpile(code, use_cache=False)
+        self.assertEqual(len(errors), 2)
+        self.assertEqual((errors[0].line, errors[0].message), (21, "La variable ya ha sido declarada"))
+        self.assertEqual((errors[1].line, errors[1].message), (7, "La variable no está declarada"))
+
+    def test_shadowing(self):
+        for coroutines in [False, True]:
+            sketch = transpiler.build(SHADOWING_SKETCH, coroutines=coroutines)
+            self.assertEqual(sketch.errors, [])
+            module = sketch.new_module()
+            if coroutines:
+                for wait in module.setup():
+                    pass
+            else:
+                module.setup()
+            # The parameters and locals do not change the globals they
+            # shadow, nor the blocks the locals of the function
+            self.assertEqual((module.speed, module.seen), (90, 5))
+            self.assertEqual((module.value, module.local), (1, 7))
+            self.assertEqual((module.inner, module.outer), (2, 1))
+
+    def test_array_index(self):
+        code = "const int K = 5;\nint arr[3];\n\nvoid f(int k) {\n    int j = 4;\n    arr[k] = 1;\n" \
+               "    arr[j] = 1;\n    arr[K] = 1;\n    arr[3] = 1;\n}\n\nvoid setup() {\n}\n\nvoid loop() {\n}\n"
+        warns, errors, ast_tree = transpiler.transpile(code, use_cache=False)
+        # Only the indexes known when compiling are checked
+        self.assertEqual([(error.line, error.message) for error in errors],
+                         [(8, "El índice sobrepasa el tamaño del array"),
+                          (9, "El índice sobrepasa el tamaño del array")])
+
+    def test_same_loop_variable(self):
+        code = open("tests/grammar-tests/ejemploFor.txt", encoding="utf-8").read()
+        warns, errors, ast_tree = transpiler.transpile(code, use_cache=False)
+        self.assertEqual(len(errors), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+
+import compiler.transpiler as transpiler
+import graphics.layers as layers
+import robot_components.robot_state as robot_state
+import simulation.engine as engine
+import simulation.trace as trace
+
+SERVO_SKETCH = "#include <Servo.h>\n\nServo left;\n\n" \
+               "void setup() {\n  left.attach(8);\n}\n\n" \
+               "void loop() {\n  left.write(180);\n  delay(100);\n  left.write(90);\n  delay(100);\n}\n"
+
+
+class TestTraceRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = robot_state.SimulatedClock()
+        self.recorder = trace.TraceRecorder(4, self.clock)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_only_transitions(self):
+        for value in [1, 1, 0, 0, 1]:
+            self.recorder.record(13, value)
+            self.clock.wait(10)
+        self.recorder.record(13, "texto")
+        self.assertEqual(self.recorder.transitions(), [(0, 13, 1), (20, 13, 0), (40, 13, 1)])
+
+    def test_ring_buffer(self):
+        for i in range(10):
+            self.recorder.record(i % 2 + 2, i)
+        self.assertEqual([value for time, pin, value in self.recorder.transitions()], [6, 7, 8, 9])
+        self.assertEqual(self.recorder.dropped(), 6)
+        self.recorder.clear()
+        self.assertEqual(self.recorder.transitions(), [])
+
+    def test_export_vcd(self):
+        self.recorder.record(13, 1)
+        self.recorder.record(8, 90)
+        self.clock.wait(1.5)
+        self.recorder.record(13, 0)
+        self.recorder.record(8, 180.5)
+        path = os.path.join(self.directory.name, "trace.vcd")
+        self.recorder.export_vcd(path)
+        with open(path) as file:
+            lines = file.read().splitlines()
+        self.assertIn("$var real 64 ! pin8 $end", lines)
+        self.assertIn("$var wire 1 \" pin13 $end", lines)
+        self.assertEqual(lines[lines.index("$enddefinitions $end") + 1:],
+                         ["#0", "1\"", "r90 !", "#1500", "0\"", "r180.5 !"])
+
+
+class TestEngineRecording(unittest.TestCase):
+
+    def test_servo_writes(self):
+        layer = layers.MobileRobotLayer(2)
+        simulation = engine.SimulationEngine(layer)
+        recorder = trace.TraceRecorder()
+        simulation.set_recorder(recorder)
+        simulation.run(transpiler.build(SERVO_SKETCH), 1000)
+        servo = [(time, value) for time, pin, value in recorder.transitions() if pin == 8]
+        self.assertEqual(servo[:4], [(0, 180), (100, 90), (200, 180), (300, 90)])
+        light_pins = [sensor.pin for sensor in layer.robot.light_sensors]
+        self.assertTrue(all(pin == 8 or pin in light_pins for time, pin, value in recorder.transitions()))
+
+
+if __name__ == '__main__':
+    unittest.main()